@@ -1,20 +1,103 @@
+import time
 from .auto_arima import ajustar_auto_arima
-from .arima import ajustar_arima
-from .holt_winters import ajustar_holt_winters
-from .prophet import ajustar_prophet, predir_prophet
+from .preseleccio import ajustar_auto_arima_preseleccio, preseleccionar_ordres, comparar_cerca
+from .arima import ajustar_arima, predir_arima_interval
+from .fourier import ajustar_arima_fourier, ModelArimaFourier, termes_fourier
+from .holt_winters import ajustar_holt_winters, predir_holt_winters_interval
+from .holt_winters_natiu import ajustar_holt_winters_natiu, ajustar_holt_winters_lot, comprovar_paritat, comparar_motors
+from .prophet import ajustar_prophet, predir_prophet, predir_prophet_interval
+from .intervals import PrediccioInterval
+from .ensemble import ModelEnsemble, ajustar_ensemble
+from .estat import EstatModel, EstatArima, EstatHoltWinters, EstatProphet, compactar_model, expandir_model
+from .limits import LimitsAjust, RegistreFallada, AjustInterromput, TempsEsgotat, MemoriaExcedida, AjustCancellat, ErrorAjust, executar_aillat, desconnectar_limits
 
-def obtindre_model(config):
+# Models que admeten variables exògenes: les funcions d'ajust i de predicció accepten l'argument X
+MODELS_AMB_EXOGENES = ("AUTO-ARIMA", "AUTO-ARIMA HR", "ARIMA", "ARIMA Fourier", "Prophet", "Ensemble")
+
+def obtindre_model(config, membres=None, prediccions=None):
+    # L'ensemble no ajusta res: combina els `membres` ja ajustats i reutilitza les seues `prediccions`
     return {
-        "AUTO-ARIMA": lambda train: ajustar_auto_arima(train, m=config["m"]),
-        "ARIMA": lambda train: ajustar_arima(train, m=config["m"]),
-        "Holt-Winters": lambda train: ajustar_holt_winters(train, seasonal="add", seasonal_periods=config["m"]),
-        "Prophet": lambda train: ajustar_prophet(train, m=config["m"]),
+        "AUTO-ARIMA": lambda train, X=None, limits=None: ajustar_auto_arima(train, m=config["m"], X=X, limits=limits),
+        "AUTO-ARIMA HR": lambda train, X=None, limits=None: ajustar_auto_arima_preseleccio(train, m=config["m"], X=X, limits=limits),
+        "ARIMA": lambda train, X=None, limits=None: ajustar_arima(train, m=config["m"], X=X, limits=limits),
+        "ARIMA Fourier": lambda train, X=None, limits=None: ajustar_arima_fourier(
+            train, periodes=config.get("periodes_estacionals") or [config["m"]], X=X, limits=limits
+        ),
+        "Holt-Winters": lambda train, limits=None: ajustar_holt_winters(train, seasonal="add", seasonal_periods=config["m"], limits=limits),
+        "Holt-Winters natiu": lambda train, limits=None: ajustar_holt_winters_natiu(train, seasonal="add", seasonal_periods=config["m"], limits=limits),
+        "Prophet": lambda train, X=None, limits=None: ajustar_prophet(train, m=config["m"], X=X, limits=limits),
+        "Ensemble": lambda train, X=None, limits=None: ajustar_ensemble(
+            train, membres or {}, metode=config.get("ensemble", {}).get("metode", "mitjana"), prediccions=prediccions, m=config["m"],
+            validacio=config.get("ensemble", {}).get("validacio"), X=X, limits=limits,
+            exogenes=[nom for nom in (membres or {}) if nom in MODELS_AMB_EXOGENES] if X is not None else (),
+        ),
     }
 
+def ajustar_model(config, model_name, train, X=None, limits=None):
+    """
+    Ajusta un model del registre. Funció de nivell de mòdul perquè es puga executar en un procés
+    independent (vegeu `executar_aillat`).
+    """
+    ajust = obtindre_model(config)[model_name]
+    model = ajust(train, limits=limits) if X is None else ajust(train, X=X, limits=limits)
+    desconnectar_limits(model)
+    return model
+
+def ajustar_model_aillat(config, model_name, train, X=None):
+    """
+    Ajust dins d'un procés fill: els límits per candidat es construeixen al fill a partir de la
+    configuració, i les fallades es retornen com a diccionaris perquè es puguen serialitzar.
+    """
+    limits = LimitsAjust.des_de_config(config)
+    try:
+        model = ajustar_model(config, model_name, train, X, limits)
+    except AjustInterromput as e:
+        limits.fallades.append(RegistreFallada.des_de_error(e, durada=time.perf_counter() - limits.inici_model))
+        model = None
+    return model, [fallada.a_dict() for fallada in limits.fallades]
+
+def _admetre_estat(funcio, predir_estat):
+    # Els estats compactes (vegeu estat.py) tenen els seus propis mètodes de predicció
+    def predir(model, *args, **kwargs):
+        if isinstance(model, EstatModel):
+            return predir_estat(model, *args)
+        return funcio(model, *args, **kwargs)
+    return predir
+
 def obtindre_prediccio():
-    return {
-        "Prophet": lambda model, n_periods, freq, test_index: predir_prophet(model, n_periods, freq, test_index),
+    prediccions = {
+        "Prophet": lambda model, n_periods, freq, test_index, X=None: predir_prophet(model, n_periods, freq, test_index, X=X),
         "Holt-Winters": lambda model, n_periods, *_: model.forecast(steps=n_periods),
-        "AUTO-ARIMA": lambda model, n_periods, *_: model.predict(n_periods=n_periods),
-        "ARIMA": lambda model, n_periods, *_: model.predict(n_periods=n_periods),
-    }
\ No newline at end of file
+        "Holt-Winters natiu": lambda model, n_periods, *_: model.forecast(steps=n_periods),
+        "AUTO-ARIMA": lambda model, n_periods, *_, X=None: model.predict(n_periods=n_periods, X=X),
+        "AUTO-ARIMA HR": lambda model, n_periods, *_, X=None: model.predict(n_periods=n_periods, X=X),
+        "ARIMA": lambda model, n_periods, *_, X=None: model.predict(n_periods=n_periods, X=X),
+        "ARIMA Fourier": lambda model, n_periods, *_, X=None: model.predict(n_periods, X=X),
+        "Ensemble": lambda model, n_periods, freq, test_index, X=None: model.forecast(n_periods, test_index, freq, X=X),
+    }
+    return {
+        nom: _admetre_estat(funcio, lambda estat, n_periods, *_: estat.forecast(n_periods))
+        for nom, funcio in prediccions.items()
+    }
+
+def obtindre_prediccio_interval(config):
+    nivells = config.get("nivells_interval", (0.8, 0.95))
+    # Els intervals per mostreig (Prophet i Holt-Winters) es llavoren per crida, sense estat global
+    llavor = config.get("llavor", 20)
+    prediccions = {
+        "Prophet": lambda model, n_periods, freq, test_index, X=None: predir_prophet_interval(model, n_periods, freq, test_index, nivells, X=X, llavor=llavor),
+        "Holt-Winters": lambda model, n_periods, freq, test_index: predir_holt_winters_interval(model, n_periods, test_index, nivells, llavor=llavor),
+        "Holt-Winters natiu": lambda model, n_periods, freq, test_index: model.predir_interval(n_periods, test_index, nivells),
+        "AUTO-ARIMA": lambda model, n_periods, freq, test_index, X=None: predir_arima_interval(model, n_periods, test_index, nivells, X=X),
+        "AUTO-ARIMA HR": lambda model, n_periods, freq, test_index, X=None: predir_arima_interval(model, n_periods, test_index, nivells, X=X),
+        "ARIMA": lambda model, n_periods, freq, test_index, X=None: predir_arima_interval(model, n_periods, test_index, nivells, X=X),
+        "ARIMA Fourier": lambda model, n_periods, freq, test_index, X=None: model.predir_interval(n_periods, test_index, nivells, X=X),
+        "Ensemble": lambda model, n_periods, freq, test_index, X=None: model.predir_interval(n_periods, test_index, nivells, freq, X=X),
+    }
+    def predir_estat(estat, n_periods, freq, test_index):
+        # Només l'estat de Prophet mostreja; la resta d'estats tenen intervals analítics
+        if isinstance(estat, EstatProphet):
+            return estat.predir_interval(n_periods, test_index, nivells, llavor=llavor)
+        return estat.predir_interval(n_periods, test_index, nivells)
+
+    return {nom: _admetre_estat(funcio, predir_estat) for nom, funcio in prediccions.items()}
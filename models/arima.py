@@ -1,8 +1,12 @@
 from pmdarima.arima import ARIMA
 import itertools
 import time
+import numpy as np
+import pandas as pd
+from .intervals import PrediccioInterval
+from .limits import arguments_ajust, iniciar_candidat, registrar_fallada
 
-def ajustar_arima(train, p_range=(0,2), d_range=(0,2), q_range=(0,2), P_range=(0,1), D_range=(0,1), Q_range=(0,1), m=12):
+def ajustar_arima(train, p_range=(0,2), d_range=(0,2), q_range=(0,2), P_range=(0,1), D_range=(0,1), Q_range=(0,1), m=12, X=None, limits=None):
     """
     Ajusta un model ARIMA provant diferents valors dels paràmetres i seleccionant el millor segons AIC.
 
@@ -11,6 +15,8 @@ def ajustar_arima(train, p_range=(0,2), d_range=(0,2), q_range=(0,2), P_range=(0
     - p_range, d_range, q_range: Rangs per als paràmetres ARIMA.
     - P_range, D_range, Q_range: Rangs per als paràmetres estacionals SARIMA.
     - m: Periodicitat estacional.
+    - X: Variables exògenes de l'entrenament (opcional).
+    - limits: LimitsAjust amb el temps màxim per candidat i per model, la memòria màxima i la cancel·lació.
 
     Retorna:
     - El millor model ARIMA segons AIC.
@@ -34,11 +40,12 @@ def ajustar_arima(train, p_range=(0,2), d_range=(0,2), q_range=(0,2), P_range=(0
         for ordre_estacional in combinacions_estacionals:
             try:
                 inici_temps = time.time()
+                iniciar_candidat(limits)
                 model = ARIMA(
                     order=ordre,
                     seasonal_order=ordre_estacional + (m,),
                     suppress_warnings=True
-                ).fit(train)
+                ).fit(train, X=X, **arguments_ajust(limits))
                 temps_execucio = time.time() - inici_temps
 
                 aic = model.aic()
@@ -54,8 +61,32 @@ def ajustar_arima(train, p_range=(0,2), d_range=(0,2), q_range=(0,2), P_range=(0
 
             except Exception as e:
                 print(f"Error amb ARIMA{ordre}{ordre_estacional + (m,)}: {e}")
+                registrar_fallada(limits, e, f"ARIMA{ordre}{ordre_estacional + (m,)}")
                 continue
 
     print(f"\nMillor model seleccionat: ARIMA{millor_ordre} Seasonal{millor_ordre_estacional + (m,)} | AIC={millor_aic:.3f}")
 
-    return millor_model
\ No newline at end of file
+    return millor_model
+
+def predir_arima_interval(model, n_periods, index=None, nivells=(0.8, 0.95), X=None):
+    """
+    Genera la predicció puntual i els quantils d'un model ARIMA de pmdarima amb una única crida.
+
+    Arguments:
+    - model: Model ARIMA ajustat (pmdarima).
+    - n_periods: Nombre de períodes a predir.
+    - index: Índex de les prediccions (per defecte, el que genera el model).
+    - nivells: Nivells dels intervals de predicció.
+    - X: Valors futurs de les variables exògenes, si el model en té.
+
+    Retorna:
+    - PrediccioInterval amb la mitjana i els quantils.
+    """
+    forecast = model.arima_res_.get_forecast(steps=n_periods, exog=X)
+    mitjana = np.asarray(forecast.predicted_mean)
+    desviacio = np.asarray(forecast.se_mean)
+
+    if index is None:
+        index = getattr(forecast.predicted_mean, "index", pd.RangeIndex(n_periods))
+
+    return PrediccioInterval.des_de_normal(index, mitjana, desviacio, nivells)
@@ -1,13 +1,18 @@
 from pmdarima import auto_arima
 import time
+from .limits import arguments_ajust, iniciar_candidat, interrupcio, registrar_fallada
 
-def ajustar_auto_arima(train, m=1):
+def ajustar_auto_arima(train, m=1, X=None, limits=None):
     """
     Ajusta un model ARIMA automàtic provant tots els valors de d i D fins als màxims definits.
 
     Arguments:
     - train: Sèrie temporal d'entrenament.
     - m: Període d'estacionalitat.
+    - X: Variables exògenes de l'entrenament (opcional).
+    - limits: LimitsAjust (opcional). Cada cerca amb uns d i D fixos compta com un candidat. Amb
+      error_action='warn', pmdarima captura les interrupcions dels límits dins de la cerca: es registren
+      igualment amb el seu tipus (temps, memòria o cancel·lació) i les de tot el model aturen la cerca.
 
     Retorna:
     - El millor model ARIMA segons AIC.
@@ -28,8 +33,10 @@ def ajustar_auto_arima(train, m=1):
             print(f"Provant model amb d={d}, D={D}...")
             try:
                 inici_temps = time.time()
+                iniciar_candidat(limits)
                 model = auto_arima(
                     train,
+                    X=X,
                     start_p=0, start_q=0,
                     max_p=2, max_q=2,
                     d=d, start_P=0, D=D, start_Q=0,
@@ -40,10 +47,15 @@ def ajustar_auto_arima(train, m=1):
                     suppress_warnings=True,
                     stepwise=False,
                     random_state=20,
-                    n_fits=50
+                    n_fits=50,
+                    **arguments_ajust(limits)
                 )
                 temps_execucio = time.time() - inici_temps
 
+                # Alguns ajustos de la cerca s'han interromput: es conserva el millor dels que han acabat
+                if interrupcio(limits) is not None:
+                    registrar_fallada(limits, interrupcio(limits), f"d={d}, D={D}")
+
                 aic = model.aic()
                 ordre = model.order
                 ordre_estacional = model.seasonal_order
@@ -57,7 +69,10 @@ def ajustar_auto_arima(train, m=1):
                     millor_ordre_estacional = ordre_estacional
 
             except Exception as e:
+                # Si cap ajust de la cerca no acaba, pmdarima llança un error genèric en lloc de la interrupció
+                e = interrupcio(limits) or e
                 print(f"S'ha produït un error amb d={d}, D={D}: {e}")
+                registrar_fallada(limits, e, f"d={d}, D={D}")
                 continue
 
     print(f"Model òptim seleccionat: ARIMA{millor_ordre}{millor_ordre_estacional}[{m}] | AIC={millor_aic:.3f}")
@@ -0,0 +1,206 @@
+import warnings
+import numpy as np
+import pandas as pd
+from .estat import EstatArima, EstatHoltWinters, EstatProphet, compactar_model
+from .fourier import ModelArimaFourier
+from .intervals import PrediccioInterval, quantils_nivells
+from .limits import iniciar_candidat
+
+METODES_ENSEMBLE = ("mitjana", "mediana", "pesos")
+
+class ModelEnsemble:
+    """
+    Combinació de models ja ajustats. No reentrena cap membre: guarda referències als models
+    (complets o compactes) i, si es proporcionen, reutilitza les seues prediccions. Els membres de
+    `exogenes` s'han ajustat amb variables exògenes i en necessiten els valors futurs per predir.
+    """
+
+    def __init__(self, membres, metode="mitjana", pesos=None, prediccions=None, exogenes=()):
+        if metode not in METODES_ENSEMBLE:
+            raise ValueError(f"Mètode d'ensemble '{metode}' no vàlid. Opcions: {METODES_ENSEMBLE}")
+        if not membres:
+            raise ValueError("L'ensemble necessita almenys un model membre.")
+        self.membres = dict(membres)
+        self.metode = metode
+        self.pesos = pesos
+        self.prediccions = dict(prediccions or {})
+        self.exogenes = tuple(exogenes)
+
+    def _prediccions_membres(self, n_periods, freq, index, nivells, X=None):
+        from . import obtindre_prediccio_interval
+
+        funcions = obtindre_prediccio_interval({"nivells_interval": nivells})
+        prediccions = {}
+        for nom, model in self.membres.items():
+            previa = self.prediccions.get(nom)
+            if previa is not None and len(previa) == n_periods and np.array_equal(previa.quantils, quantils_nivells(nivells)):
+                prediccions[nom] = previa
+            elif nom in self.exogenes:
+                if X is None:
+                    raise ValueError(f"El membre {nom} s'ha ajustat amb variables exògenes: cal passar-ne els valors futurs (X).")
+                prediccions[nom] = funcions[nom](model, n_periods, freq, index, X=X)
+            else:
+                prediccions[nom] = funcions[nom](model, n_periods, freq, index)
+        return prediccions
+
+    def predir_interval(self, n_periods, index=None, nivells=(0.8, 0.95), freq=None, X=None):
+        """
+        Combina la mitjana i els quantils dels membres (els quantils es combinen quantil a quantil).
+        `X` són els valors futurs de les variables exògenes, per als membres que les usen.
+        """
+        prediccions = self._prediccions_membres(n_periods, freq, index, nivells, X)
+        noms = list(prediccions)
+        mitjanes = np.vstack([prediccions[nom].mitjana for nom in noms])
+        quantils = np.stack([prediccions[nom].valors for nom in noms])
+
+        if self.metode == "mediana":
+            mitjana, valors = np.median(mitjanes, axis=0), np.median(quantils, axis=0)
+        else:
+            pesos = np.array([self.pesos.get(nom, 0.0) for nom in noms]) if self.metode == "pesos" else np.ones(len(noms))
+            pesos = pesos / pesos.sum()
+            mitjana, valors = pesos @ mitjanes, np.tensordot(pesos, quantils, axes=1)
+
+        primer = prediccions[noms[0]]
+        return PrediccioInterval(primer.index if index is None else index, mitjana, primer.quantils, valors)
+
+    def forecast(self, steps=1, index=None, freq=None, X=None):
+        interval = self.predir_interval(steps, index, nivells=(0.8,), freq=freq, X=X)
+        return pd.Series(interval.mitjana, index=interval.index, name="Predicció")
+
+    def summary(self):
+        files = [f"Ensemble ({self.metode}) de {len(self.membres)} models:"]
+        for nom in self.membres:
+            pes = f" pes={self.pesos[nom]:.3f}" if self.pesos else ""
+            files.append(f" - {nom}{pes}")
+        return "\n".join(files)
+
+def _filtrar_arima(resultats, y, horitzo, X_anterior=None, X_validacio=None):
+    # Mateix model i paràmetres sobre la sèrie retallada: filter() aplica el filtre de Kalman sense optimitzar
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        filtrat = resultats.model.clone(y, exog=X_anterior).filter(resultats.params)
+        return np.asarray(filtrat.forecast(horitzo, exog=X_validacio), dtype=np.float64)
+
+def prediccio_validacio(model, anterior, validacio, X_anterior=None, X_validacio=None):
+    """
+    Predicció puntual de les observacions de `validacio` des del final d'`anterior`, amb els paràmetres
+    que el membre ja té ajustats amb tot l'entrenament. No s'executa cap optimitzador: els ARIMA tornen a
+    filtrar `anterior` amb els seus paràmetres, els Holt-Winters hi apliquen les recursions des de l'estat
+    inicial (vegeu `EstatHoltWinters.a_model`) i Prophet, sense estat recursiu, s'avalua a les dates de validació.
+
+    Arguments:
+    - model: Membre ajustat (complet o compacte).
+    - anterior: Entrenament sense les observacions de validació.
+    - validacio: Observacions finals de l'entrenament que es prediuen.
+    - X_anterior, X_validacio: Variables exògenes de cada tram, si el membre en té.
+
+    Retorna:
+    - Array amb una predicció per observació de validació.
+    """
+    horitzo = len(validacio)
+    y = np.asarray(anterior, dtype=np.float64).ravel()
+    X_anterior = None if X_anterior is None else np.asarray(X_anterior, dtype=np.float64)
+    X_validacio = None if X_validacio is None else np.asarray(X_validacio, dtype=np.float64)
+
+    if isinstance(model, ModelArimaFourier):
+        termes = model.exogenes(len(y) + horitzo)
+        if X_anterior is not None:
+            termes = np.column_stack([termes, np.vstack([X_anterior, X_validacio])])
+        return _filtrar_arima(model.model.arima_res_, y, horitzo, termes[:len(y)], termes[len(y):])
+    if hasattr(model, "arima_res_") or type(model).__name__.startswith("SARIMAXResults"):
+        return _filtrar_arima(getattr(model, "arima_res_", model), y, horitzo, X_anterior, X_validacio)
+    if isinstance(model, (EstatArima, EstatHoltWinters)) or type(model).__name__.startswith("HoltWintersResults"):
+        reconstruit = compactar_model(model).a_model(anterior)
+        return np.asarray(reconstruit.predict(n_periods=horitzo) if isinstance(model, EstatArima) else reconstruit.forecast(horitzo), dtype=np.float64)
+    if isinstance(model, EstatProphet) or type(model).__name__ == "Prophet":
+        from .prophet import afegir_regressors
+
+        prophet = model._model() if isinstance(model, EstatProphet) else model
+        columnes = list(prophet.extra_regressors)
+        future = afegir_regressors(pd.DataFrame({"ds": validacio.index}), None if X_validacio is None else pd.DataFrame(X_validacio, columns=columnes))
+        mostres_originals = prophet.uncertainty_samples
+        try:
+            prophet.uncertainty_samples = 0
+            return prophet.predict(future)["yhat"].to_numpy(dtype=np.float64)
+        finally:
+            prophet.uncertainty_samples = mostres_originals
+    raise TypeError(f"No es pot validar un model de tipus {type(model).__name__}.")
+
+def pesos_per_validacio(membres, train, horitzo, X=None, exogenes=(), limits=None):
+    """
+    Calcula pesos inversament proporcionals a l'error quadràtic mitjà de cada membre en una validació
+    al final de l'entrenament.
+
+    Cada membre prediu les darreres `horitzo` observacions d'una vegada des del punt anterior, com si foren
+    el test, amb els paràmetres que ja té ajustats (vegeu `prediccio_validacio`): l'error és de predicció a
+    diversos passos, no de l'ajust dins la mostra (que afavoreix els models sobreajustats), i no es torna a
+    ajustar cap membre.
+
+    Arguments:
+    - membres: Diccionari {nom: model ajustat}.
+    - train: Sèrie temporal d'entrenament.
+    - horitzo: Nombre d'observacions finals de validació.
+    - X: Variables exògenes de tot l'entrenament (opcional).
+    - exogenes: Membres que usen les variables exògenes.
+    - limits: LimitsAjust (opcional); es comproven abans de validar cada membre.
+
+    Retorna:
+    - Diccionari {nom: pes}, amb pesos que sumen 1, o None si no s'ha pogut validar cap membre.
+    """
+    anterior, validacio = train.iloc[:-horitzo], train.iloc[-horitzo:]
+    reals = np.asarray(validacio, dtype=np.float64).ravel()
+
+    errors = {}
+    for nom, model in membres.items():
+        iniciar_candidat(limits)
+        X_membre = X if nom in exogenes else None
+        try:
+            if X_membre is None:
+                prediccio = prediccio_validacio(model, anterior, validacio)
+            else:
+                prediccio = prediccio_validacio(model, anterior, validacio, X_membre.iloc[:-horitzo], X_membre.iloc[-horitzo:])
+        except Exception as e:
+            print(f"No s'ha pogut validar el model {nom} ({e}); s'exclou del càlcul de pesos.")
+            continue
+        errors[nom] = np.mean((reals - prediccio) ** 2)
+        print(f"Validació {nom}: RMSE={np.sqrt(errors[nom]):.2f} en les darreres {horitzo} observacions")
+
+    if not errors:
+        return None
+
+    inversos = {nom: 1 / max(error, np.finfo(float).tiny) for nom, error in errors.items()}
+    total = sum(inversos.values())
+    return {nom: inversos.get(nom, 0.0) / total for nom in membres}
+
+def ajustar_ensemble(train, membres, metode="mitjana", prediccions=None, m=1, validacio=None, X=None, exogenes=(), limits=None):
+    """
+    Construeix un ensemble a partir de models ja ajustats, sense reentrenar-ne cap.
+
+    Arguments:
+    - train: Sèrie temporal d'entrenament (només per calcular els pesos).
+    - membres: Diccionari {nom: model ajustat}.
+    - metode: "mitjana", "mediana" o "pesos" (inversos de l'error quadràtic de validació, vegeu `pesos_per_validacio`).
+    - prediccions: Prediccions (PrediccioInterval) ja calculades dels membres, que es reutilitzen.
+    - m: Període d'estacionalitat.
+    - validacio: Observacions finals de validació per als pesos (per defecte, l'horitzó de les
+      prediccions reutilitzades o 2·m, i com a màxim una quarta part de l'entrenament).
+    - X: Variables exògenes de l'entrenament.
+    - exogenes: Membres ajustats amb variables exògenes.
+    - limits: LimitsAjust de la validació (opcional).
+
+    Retorna:
+    - ModelEnsemble.
+    """
+    pesos = None
+    if metode == "pesos":
+        if not validacio:
+            validacio = len(next(iter(prediccions.values()))) if prediccions else 2 * max(m, 1)
+        validacio = max(1, min(validacio, len(train) // 4))
+        pesos = pesos_per_validacio(membres, train, validacio, X=X, exogenes=exogenes, limits=limits)
+        if pesos is None:
+            print("No s'ha pogut validar cap membre. S'usa la mitjana simple.")
+            metode = "mitjana"
+
+    model = ModelEnsemble(membres, metode=metode, pesos=pesos, prediccions=prediccions, exogenes=exogenes)
+    print(model.summary())
+    return model
@@ -0,0 +1,387 @@
+import copy
+import pickle
+import warnings
+import numpy as np
+import pandas as pd
+from .intervals import PrediccioInterval
+
+class EstatModel:
+    """
+    Estat compacte d'un model ajustat: només els paràmetres i l'estat final necessaris per predir
+    i actualitzar amb noves observacions, sense còpies de les dades d'entrenament, els valors
+    ajustats ni els residus.
+    """
+    __slots__ = ("ultim_index", "freq", "n_obs")
+
+    def _inicialitzar_index(self, index):
+        index = pd.Index(index)
+        self.n_obs = len(index)
+        self.freq = getattr(index, "freqstr", None)
+        self.ultim_index = index[-1] if len(index) else None
+
+    def index_futur(self, steps):
+        """
+        Índex dels `steps` períodes següents al final de les dades ajustades.
+        """
+        if self.freq is None:
+            return pd.RangeIndex(self.n_obs, self.n_obs + steps)
+        return pd.date_range(self.ultim_index, periods=steps + 1, freq=self.freq)[1:]
+
+    def _avancar_index(self, steps):
+        if self.freq is not None:
+            self.ultim_index = self.index_futur(steps)[-1]
+        self.n_obs += steps
+
+    def mida_bytes(self):
+        """
+        Mida de l'estat serialitzat, en bytes.
+        """
+        return len(pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def summary(self):
+        return repr(self)
+
+class EstatHoltWinters(EstatModel):
+    """
+    Estat compacte d'un model Holt-Winters: paràmetres de suavització, nivell, pendent i
+    els `m` últims factors estacionals.
+    """
+    __slots__ = ("tendencia", "estacionalitat", "m", "alfa", "beta", "gamma", "phi",
+                 "nivell", "pendent", "estacional", "inicials", "sigma2", "biaix")
+
+    @classmethod
+    def des_de_model(cls, resultats):
+        """
+        Construeix l'estat a partir d'un `HoltWintersResults` de statsmodels.
+        """
+        model = resultats.model
+        params = resultats.params
+        if model.trend == "mul":
+            raise NotImplementedError("La tendència multiplicativa no està suportada en l'estat compacte.")
+        if params.get("use_boxcox"):
+            raise NotImplementedError("La transformació Box-Cox no està suportada en l'estat compacte.")
+
+        estat = cls()
+        estat.tendencia = model.trend
+        estat.estacionalitat = model.seasonal
+        estat.m = int(model.seasonal_periods or 1)
+        estat.alfa = float(params["smoothing_level"])
+        estat.beta = float(params["smoothing_trend"]) if model.trend else 0.0
+        estat.gamma = float(params["smoothing_seasonal"]) if model.seasonal else 0.0
+        estat.phi = float(params["damping_trend"]) if model.damped_trend else 1.0
+        estat.nivell = float(np.asarray(resultats.level)[-1])
+        estat.pendent = float(np.asarray(resultats.trend)[-1]) if model.trend else 0.0
+        estat.estacional = np.asarray(resultats.season, dtype=np.float64)[-estat.m:].copy() if model.seasonal else np.zeros(0)
+        estat.inicials = (
+            float(params["initial_level"]),
+            float(params["initial_trend"]) if model.trend else None,
+            np.asarray(params["initial_seasons"], dtype=np.float64).copy() if model.seasonal else None,
+        )
+        residus = np.asarray(resultats.resid, dtype=np.float64)
+        estat.sigma2 = float(np.mean(residus ** 2))
+        estat.biaix = float(np.mean(residus)) if params.get("remove_bias") else 0.0
+        estat._inicialitzar_index(resultats.fittedvalues.index)
+        return estat
+
+    def _factors_horitzo(self, steps):
+        h = np.arange(1, steps + 1)
+        if self.phi != 1.0:
+            return np.cumsum(self.phi ** h)
+        return h.astype(np.float64)
+
+    def forecast(self, steps=1):
+        """
+        Prediccions puntuals dels `steps` períodes següents.
+
+        A diferència de statsmodels, l'horitzó h=m usa el factor estacional actualitzat
+        amb l'última observació, igual que la resta d'horitzons.
+        """
+        prediccio = self.nivell + self.pendent * self._factors_horitzo(steps)
+        if self.estacionalitat == "add":
+            prediccio = prediccio + self.estacional[np.arange(steps) % self.m]
+        elif self.estacionalitat == "mul":
+            prediccio = prediccio * self.estacional[np.arange(steps) % self.m]
+        return pd.Series(prediccio + self.biaix, index=self.index_futur(steps), name="Predicció")
+
+    def actualitzar(self, valors):
+        """
+        Incorpora noves observacions aplicant les recursions de Holt-Winters a l'estat final.
+        """
+        for y in np.asarray(valors, dtype=np.float64).ravel():
+            anterior = self.nivell + self.phi * self.pendent
+            estacional = self.estacional[0] if self.estacionalitat else 0.0
+
+            if self.estacionalitat == "mul":
+                nivell = self.alfa * y / estacional + (1 - self.alfa) * anterior
+                nou_estacional = self.gamma * y / anterior + (1 - self.gamma) * estacional
+            else:
+                nivell = self.alfa * (y - estacional) + (1 - self.alfa) * anterior
+                nou_estacional = self.gamma * (y - anterior) + (1 - self.gamma) * estacional
+
+            if self.tendencia:
+                self.pendent = self.beta * (nivell - self.nivell) + (1 - self.beta) * self.phi * self.pendent
+            self.nivell = nivell
+            if self.estacionalitat:
+                self.estacional = np.roll(self.estacional, -1)
+                self.estacional[-1] = nou_estacional
+
+        self._avancar_index(len(np.ravel(valors)))
+        return self
+
+    def predir_interval(self, n_periods, index=None, nivells=(0.8, 0.95)):
+        """
+        Predicció amb intervals gaussians a partir de la variància dels errors a un pas.
+
+        La variància a l'horitzó h segueix la fórmula del model ETS additiu equivalent; per a
+        l'estacionalitat multiplicativa és una aproximació.
+        """
+        mitjana = self.forecast(n_periods)
+        j = np.arange(1, n_periods)
+        coeficients = self.alfa * (1 + self.beta * self._factors_horitzo(n_periods - 1))
+        if self.estacionalitat:
+            coeficients = coeficients + self.gamma * (j % self.m == 0)
+        variancia = self.sigma2 * (1 + np.concatenate(([0.0], np.cumsum(coeficients ** 2))))
+        return PrediccioInterval.des_de_normal(mitjana.index if index is None else index, mitjana.to_numpy(), np.sqrt(variancia), nivells)
+
+    def a_model(self, train):
+        """
+        Reconstrueix el `HoltWintersResults` complet sobre `train` amb els paràmetres de l'estat.
+        """
+        from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+        nivell_inicial, tendencia_inicial, estacional_inicial = self.inicials
+        return ExponentialSmoothing(
+            train,
+            trend=self.tendencia,
+            damped_trend=self.phi != 1.0,
+            seasonal=self.estacionalitat,
+            seasonal_periods=self.m if self.estacionalitat else None,
+            initialization_method="known",
+            initial_level=nivell_inicial,
+            initial_trend=tendencia_inicial,
+            initial_seasonal=estacional_inicial,
+        ).fit(
+            smoothing_level=self.alfa,
+            smoothing_trend=self.beta if self.tendencia else None,
+            smoothing_seasonal=self.gamma if self.estacionalitat else None,
+            damping_trend=self.phi if self.phi != 1.0 else None,
+            optimized=False,
+            remove_bias=self.biaix != 0.0,
+        )
+
+    def __repr__(self):
+        return (f"EstatHoltWinters(tendencia={self.tendencia}, estacionalitat={self.estacionalitat}, m={self.m}, "
+                f"alfa={self.alfa:.3f}, beta={self.beta:.3f}, gamma={self.gamma:.3f}, phi={self.phi:.3f})")
+
+def _ultim(matriu, dimensions):
+    matriu = np.asarray(matriu, dtype=np.float64)
+    if matriu.ndim > dimensions:
+        matriu = matriu[..., -1]
+    return matriu.copy()
+
+class EstatArima(EstatModel):
+    """
+    Estat compacte d'un model (S)ARIMA: paràmetres, matrius de l'espai d'estats i la
+    predicció a un pas de l'estat (mitjana i covariància) al final de l'entrenament.
+    """
+    __slots__ = ("kwds", "params", "Z", "d", "H", "T", "c", "RQR", "a", "P")
+
+    @classmethod
+    def des_de_model(cls, model):
+        """
+        Construeix l'estat a partir d'un ARIMA de pmdarima o d'uns resultats SARIMAX de statsmodels.
+        """
+        resultats = getattr(model, "arima_res_", model)
+        kwds = resultats.model._get_init_kwds()
+        if resultats.model.k_exog:
+            raise NotImplementedError("Els models amb variables exògenes no estan suportats en l'estat compacte.")
+        if kwds.get("trend") not in (None, "n", "c"):
+            raise NotImplementedError(f"La tendència '{kwds.get('trend')}' no està suportada en l'estat compacte.")
+
+        ssm = resultats.model.ssm
+        estat = cls()
+        estat.kwds = kwds
+        estat.params = np.asarray(resultats.params, dtype=np.float64).copy()
+        estat.Z = _ultim(ssm["design"], 2)
+        estat.d = _ultim(ssm["obs_intercept"], 1)
+        estat.H = _ultim(ssm["obs_cov"], 2)
+        estat.T = _ultim(ssm["transition"], 2)
+        estat.c = _ultim(ssm["state_intercept"], 1)
+        R = _ultim(ssm["selection"], 2)
+        estat.RQR = R @ _ultim(ssm["state_cov"], 2) @ R.T
+        estat.a = np.asarray(resultats.predicted_state, dtype=np.float64)[:, -1].copy()
+        estat.P = np.asarray(resultats.predicted_state_cov, dtype=np.float64)[:, :, -1].copy()
+        estat._inicialitzar_index(resultats.model._index)
+        return estat
+
+    def _predir(self, steps):
+        a, P = self.a, self.P
+        mitjana = np.empty(steps)
+        variancia = np.empty(steps)
+        for h in range(steps):
+            mitjana[h] = (self.Z @ a + self.d)[0]
+            variancia[h] = (self.Z @ P @ self.Z.T + self.H)[0, 0]
+            a = self.T @ a + self.c
+            P = self.T @ P @ self.T.T + self.RQR
+        return mitjana, variancia
+
+    def predict(self, n_periods=10):
+        """
+        Prediccions puntuals dels `n_periods` períodes següents.
+        """
+        mitjana, _ = self._predir(n_periods)
+        return pd.Series(mitjana, index=self.index_futur(n_periods), name="Predicció")
+
+    def forecast(self, steps=1):
+        return self.predict(n_periods=steps)
+
+    def actualitzar(self, valors):
+        """
+        Incorpora noves observacions amb un pas del filtre de Kalman per observació.
+        """
+        for y in np.asarray(valors, dtype=np.float64).ravel():
+            v = y - (self.Z @ self.a + self.d)[0]
+            F = (self.Z @ self.P @ self.Z.T + self.H)[0, 0]
+            K = (self.T @ self.P @ self.Z.T)[:, 0] / F
+            self.a = self.T @ self.a + self.c + K * v
+            self.P = self.T @ self.P @ self.T.T + self.RQR - np.outer(K, K) * F
+        self._avancar_index(len(np.ravel(valors)))
+        return self
+
+    def predir_interval(self, n_periods, index=None, nivells=(0.8, 0.95)):
+        """
+        Predicció amb intervals gaussians a partir de la variància del filtre.
+        """
+        mitjana, variancia = self._predir(n_periods)
+        index = self.index_futur(n_periods) if index is None else index
+        return PrediccioInterval.des_de_normal(index, mitjana, np.sqrt(np.maximum(variancia, 0)), nivells)
+
+    def a_model(self, train):
+        """
+        Reconstrueix l'ARIMA complet de pmdarima sobre `train` filtrant amb els paràmetres de l'estat.
+        """
+        import pmdarima
+        from pmdarima.arima import ARIMA
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+        kwds = dict(self.kwds)
+        ordre, ordre_estacional, tendencia = kwds.pop("order"), kwds.pop("seasonal_order"), kwds.pop("trend")
+        y = train.iloc[:, 0] if isinstance(train, pd.DataFrame) else train
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            resultats = SARIMAX(y, order=ordre, seasonal_order=ordre_estacional, trend=tendencia, **kwds).filter(self.params)
+
+        model = ARIMA(order=ordre, seasonal_order=ordre_estacional, trend=tendencia,
+                      with_intercept=tendencia == "c", suppress_warnings=True)
+        model.arima_res_ = resultats
+        model.fit_with_exog_ = False
+        model.nobs_ = len(y)
+        model.endog_index_ = y.index
+        model.pkg_version_ = pmdarima.__version__
+        model.oob_ = np.nan
+        model.oob_preds_ = None
+        return model
+
+    def __repr__(self):
+        return f"EstatArima(ordre={self.kwds['order']}, ordre_estacional={self.kwds['seasonal_order']}, estats={len(self.a)})"
+
+class EstatProphet(EstatModel):
+    """
+    Estat compacte d'un model Prophet: el model serialitzat en JSON sense l'historial d'entrenament
+    (només se'n conserva l'última observació, necessària per generar les dates futures).
+    """
+    __slots__ = ("json", "desplacament")
+
+    @classmethod
+    def des_de_model(cls, model):
+        from prophet.serialize import model_to_json
+
+        if model.extra_regressors:
+            raise NotImplementedError("Els models Prophet amb regressors no estan suportats en l'estat compacte.")
+
+        reduit = copy.copy(model)
+        reduit.history = model.history.tail(1)
+        reduit.history_dates = model.history_dates.tail(1)
+
+        estat = cls()
+        estat.json = model_to_json(reduit)
+        estat.desplacament = 0
+        estat._inicialitzar_index(pd.DatetimeIndex(model.history_dates))
+        estat.freq = pd.infer_freq(model.history_dates) if len(model.history_dates) >= 3 else None
+        return estat
+
+    def _model(self):
+        from prophet.serialize import model_from_json
+        return model_from_json(self.json)
+
+    def actualitzar(self, valors):
+        """
+        Prophet no té un estat recursiu: les noves observacions només desplacen l'origen de la predicció.
+        """
+        self.desplacament += len(np.ravel(valors))
+        self._avancar_index(len(np.ravel(valors)))
+        return self
+
+    def predir_interval(self, n_periods, index=None, nivells=(0.8, 0.95), llavor=None):
+        from .prophet import predir_prophet_interval
+
+        passos = self.desplacament + n_periods
+        interval = predir_prophet_interval(self._model(), passos, self.freq, pd.RangeIndex(passos), nivells, llavor=llavor)
+        index = self.index_futur(n_periods) if index is None else index
+        return PrediccioInterval(index, interval.mitjana[-n_periods:], interval.quantils, interval.valors[:, -n_periods:])
+
+    def forecast(self, steps=1):
+        from .prophet import predir_prophet
+
+        # La predicció puntual no mostreja: és la component determinista de Prophet
+        prediccions = predir_prophet(self._model(), self.desplacament + steps, self.freq)
+        return pd.Series(prediccions.to_numpy()[-steps:], index=self.index_futur(steps), name="Predicció")
+
+    def a_model(self, train):
+        """
+        Reconstrueix el model Prophet complet restaurant l'historial d'entrenament.
+        """
+        model = self._model()
+        df_train = train.reset_index().rename(columns={train.index.name: "ds", train.columns[0]: "y"})
+        model.history = model.setup_dataframe(df_train.copy())
+        model.history_dates = pd.to_datetime(df_train["ds"]).sort_values()
+        return model
+
+    def __repr__(self):
+        return f"EstatProphet(n_obs={self.n_obs}, bytes={len(self.json)})"
+
+def compactar_model(model):
+    """
+    Converteix un model ajustat en el seu estat compacte.
+
+    Arguments:
+    - model: Model Holt-Winters (statsmodels), ARIMA (pmdarima) o Prophet ajustat.
+
+    Retorna:
+    - EstatHoltWinters, EstatArima o EstatProphet.
+    """
+    if isinstance(model, EstatModel):
+        return model
+    if hasattr(model, "arima_res_") or type(model).__name__.startswith("SARIMAXResults"):
+        return EstatArima.des_de_model(model)
+    if type(model).__name__.startswith("HoltWintersResults"):
+        return EstatHoltWinters.des_de_model(model)
+    if type(model).__name__ == "Prophet":
+        return EstatProphet.des_de_model(model)
+    raise TypeError(f"No es pot compactar un model de tipus {type(model).__name__}.")
+
+def expandir_model(estat, train):
+    """
+    Reconstrueix el model complet a partir de l'estat compacte i les dades d'entrenament.
+
+    Arguments:
+    - estat: Estat compacte del model.
+    - train: Sèrie temporal d'entrenament amb què es va ajustar el model.
+
+    Retorna:
+    - Model complet equivalent a l'original.
+    """
+    if not isinstance(estat, EstatModel):
+        return estat
+    return estat.a_model(train)
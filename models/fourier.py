@@ -0,0 +1,177 @@
+from pmdarima.arima import ARIMA
+import itertools
+import time
+import numpy as np
+from .arima import predir_arima_interval
+from .limits import arguments_ajust, iniciar_candidat, registrar_fallada
+from .preseleccio import preseleccionar_ordres, rss_mascares
+
+def termes_fourier(n, periodes, ordres, inici=0):
+    """
+    Termes de Fourier sin(2πkt/P) i cos(2πkt/P), k = 1..K, per a cada període P.
+
+    Arguments:
+    - n: Nombre d'observacions.
+    - periodes: Llista de períodes estacionals (poden ser no enters, p. ex. 365.25).
+    - ordres: Nombre d'harmònics K de cada període.
+    - inici: Índex temporal de la primera observació (per generar els termes futurs).
+
+    Retorna:
+    - Array (n × 2·ΣK).
+    """
+    t = np.arange(inici, inici + n, dtype=np.float64)[:, np.newaxis]
+    columnes = []
+    for periode, K in zip(periodes, ordres):
+        angle = 2 * np.pi * t * np.arange(1, K + 1) / periode
+        columnes.extend([np.sin(angle), np.cos(angle)])
+    return np.hstack(columnes) if columnes else np.empty((n, 0))
+
+def _ordre_maxim(periode, maxim):
+    # Per sota de P/2 harmònics perquè les columnes siguen linealment independents
+    return max(1, min(maxim, int(np.ceil(periode / 2)) - 1))
+
+def seleccionar_ordres_fourier(y, periodes, maxim=10):
+    """
+    Tria el nombre d'harmònics de cada període minimitzant l'AIC d'una regressió MCO de la sèrie
+    sobre una constant, una tendència lineal i els termes de Fourier.
+
+    Totes les combinacions d'ordres s'avaluen alhora amb la mateixa matriu de Gram.
+
+    Retorna:
+    - Llista amb el nombre d'harmònics de cada període.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    maxims = [_ordre_maxim(periode, maxim) for periode in periodes]
+    Z = np.hstack([np.ones((n, 1)), np.arange(n)[:, np.newaxis] / n, termes_fourier(n, periodes, maxims)])
+
+    combinacions = list(itertools.product(*[range(1, K + 1) for K in maxims]))
+    mascares = np.zeros((len(combinacions), Z.shape[1]))
+    mascares[:, :2] = 1.0
+    for c, ordres in enumerate(combinacions):
+        posicio = 2
+        for K, K_maxim in zip(ordres, maxims):
+            mascares[c, posicio:posicio + K] = 1.0
+            mascares[c, posicio + K_maxim:posicio + K_maxim + K] = 1.0
+            posicio += 2 * K_maxim
+
+    aic = n * np.log(rss_mascares(Z, y, mascares) / n) + 2 * mascares.sum(axis=1)
+    return list(combinacions[int(np.argmin(aic))])
+
+def exogenes_fourier(n, periodes, ordres, n_obs, tendencia=False, inici=0):
+    """
+    Regressors del model: els termes de Fourier i, opcionalment, una tendència lineal escalada
+    amb la mida de l'entrenament (t / n_obs) perquè el coeficient siga comparable amb la resta.
+    """
+    X = termes_fourier(n, periodes, ordres, inici)
+    if tendencia:
+        X = np.column_stack([np.arange(inici, inici + n) / n_obs, X])
+    return X
+
+class ModelArimaFourier:
+    """
+    ARIMA no estacional amb termes de Fourier com a regressors (regressió harmònica dinàmica).
+
+    Substitueix els retards estacionals de SARIMA per uns pocs harmònics, de manera que els
+    períodes llargs (52, 365.25) o múltiples (7 i 365.25 per a dades diàries) no fan créixer
+    l'espai d'estats. Sense diferenciació (d=0) s'hi afegeix també una tendència lineal determinista.
+    """
+
+    def __init__(self, model, periodes, ordres, n_obs, tendencia=False):
+        self.model = model
+        self.periodes = list(periodes)
+        self.ordres = list(ordres)
+        self.n_obs = n_obs
+        self.tendencia = tendencia
+
+    def exogenes(self, n, inici=0):
+        return exogenes_fourier(n, self.periodes, self.ordres, self.n_obs, self.tendencia, inici)
+
+    def termes_futurs(self, n_periods, X=None):
+        """
+        Regressors de l'horitzó de predicció, amb les variables exògenes addicionals `X` al final.
+        """
+        termes = self.exogenes(n_periods, inici=self.n_obs)
+        return termes if X is None else np.column_stack([termes, np.asarray(X, dtype=np.float64)])
+
+    def predict(self, n_periods, X=None):
+        return self.model.predict(n_periods=n_periods, X=self.termes_futurs(n_periods, X))
+
+    def predir_interval(self, n_periods, index=None, nivells=(0.8, 0.95), X=None):
+        return predir_arima_interval(self.model, n_periods, index, nivells, X=self.termes_futurs(n_periods, X))
+
+    def resid(self):
+        return self.model.resid()
+
+    def aic(self):
+        return self.model.aic()
+
+    def summary(self):
+        harmonics = ", ".join(f"P={periode:g} (K={K})" for periode, K in zip(self.periodes, self.ordres))
+        tendencia = " i tendència lineal" if self.tendencia else ""
+        return f"ARIMA{self.model.order} amb termes de Fourier{tendencia}: {harmonics}\n{self.model.summary()}"
+
+def ajustar_arima_fourier(train, periodes=(12,), maxim_harmonics=10, llista_curta=5, X=None, limits=None):
+    """
+    Ajusta un ARIMA amb estacionalitat de Fourier.
+
+    1. Tria el nombre d'harmònics de cada període per AIC (MCO vectoritzat).
+    2. Preselecciona els ordres (p, d, q) sobre la sèrie sense la component de Fourier.
+    3. Ajusta per màxima versemblança només la llista curta, amb els termes de Fourier com a exògenes.
+
+    Arguments:
+    - train: Sèrie temporal d'entrenament.
+    - periodes: Períodes estacionals, en nombre d'observacions (p. ex. [7, 365.25] per a dades diàries).
+    - maxim_harmonics: Nombre màxim d'harmònics per període.
+    - llista_curta: Nombre d'ordres que s'ajusten per màxima versemblança.
+    - X: Variables exògenes addicionals de l'entrenament (opcional); s'afegeixen darrere dels termes de Fourier.
+    - limits: LimitsAjust amb els límits de cada ajust exacte (opcional).
+
+    Retorna:
+    - ModelArimaFourier o None si cap ajust no convergeix.
+    """
+    inici_temps = time.time()
+    y = np.asarray(train, dtype=np.float64).ravel()
+    periodes = [float(periode) for periode in periodes if periode > 1]
+
+    ordres = seleccionar_ordres_fourier(y, periodes, maxim_harmonics)
+    F = termes_fourier(len(y), periodes, ordres)
+    coeficients, *_ = np.linalg.lstsq(np.column_stack([np.ones(len(y)), F]), y, rcond=None)
+    preseleccio = preseleccionar_ordres(y - F @ coeficients[1:], m=1, llista_curta=llista_curta)
+
+    # Amb d=1 la constant ja fa de deriva; amb d=0 la tendència ha d'entrar com a regressor
+    tendencia = preseleccio["d"] == 0
+    regressors = exogenes_fourier(len(y), periodes, ordres, len(y), tendencia)
+    if X is not None:
+        regressors = np.column_stack([regressors, np.asarray(X, dtype=np.float64)])
+
+    harmonics = ", ".join(f"P={periode:g}: K={K}" for periode, K in zip(periodes, ordres))
+    print(f"Termes de Fourier ({harmonics}) i preselecció amb d={preseleccio['d']} en {time.time() - inici_temps:.2f} segons.")
+
+    millor_model = None
+    millor_aic = float("inf")
+    for ordre, _ in preseleccio["llista_curta"]:
+        try:
+            inici_ajust = time.time()
+            iniciar_candidat(limits)
+            model = ARIMA(order=ordre, with_intercept=preseleccio["constant"], suppress_warnings=True).fit(
+                y, X=regressors, **arguments_ajust(limits)
+            )
+            aic = model.aic()
+            print(f" {f'ARIMA{ordre} + Fourier':<35}: AIC={aic:.3f}, Temps={time.time() - inici_ajust:.2f} segons")
+
+            if aic < millor_aic:
+                millor_aic = aic
+                millor_model = model
+
+        except Exception as e:
+            print(f"S'ha produït un error amb ARIMA{ordre} + Fourier: {e}")
+            registrar_fallada(limits, e, f"ARIMA{ordre} + Fourier")
+            continue
+
+    if millor_model is None:
+        return None
+
+    print(f"Model òptim seleccionat: ARIMA{millor_model.order} + Fourier | AIC={millor_aic:.3f} | "
+          f"Temps total={time.time() - inici_temps:.2f} segons")
+    return ModelArimaFourier(millor_model, periodes, ordres, len(y), tendencia)
@@ -1,6 +1,9 @@
 from statsmodels.tsa.holtwinters import ExponentialSmoothing
+import numpy as np
+from .intervals import PrediccioInterval
+from .limits import iniciar_candidat, registrar_fallada
 
-def ajustar_holt_winters(train, seasonal="add", seasonal_periods=1, trend="add", damped_trend=False):
+def ajustar_holt_winters(train, seasonal="add", seasonal_periods=1, trend="add", damped_trend=False, limits=None):
     """
     Ajusta un model Holt-Winters (Suavització Exponencial).
 
@@ -10,18 +13,21 @@ def ajustar_holt_winters(train, seasonal="add", seasonal_periods=1, trend="add",
     - seasonal_periods: Període d'estacionalitat.
     - trend: Tipus de tendència ("add", "mul" o None).
     - damped_trend: Indica si la tendència ha d'estar esmorteïda.
+    - limits: LimitsAjust (opcional); els límits es comproven a cada iteració de l'optimitzador.
 
     Retorna:
-    - Model Holt-Winters ajustat o None si hi ha un error.
+    - Model Holt-Winters ajustat o None si hi ha un error (el motiu queda a `limits.fallades`).
     """
     try:
+        iniciar_candidat(limits)
         model = ExponentialSmoothing(
             train,
             seasonal=seasonal,
             seasonal_periods=seasonal_periods,
             trend=trend,
             damped_trend=damped_trend
-        ).fit(optimized=True, use_boxcox=None, remove_bias=True)
+        ).fit(optimized=True, use_boxcox=None, remove_bias=True,
+              minimize_kwargs={"callback": limits.comprovar} if limits is not None else None)
 
         print(
             f"Model Holt-Winters ajustat correctament amb estacionalitat {seasonal}, període {seasonal_periods}, tendència {trend} i damped_trend {damped_trend}.")
@@ -29,4 +35,34 @@ def ajustar_holt_winters(train, seasonal="add", seasonal_periods=1, trend="add",
 
     except Exception as e:
         print(f"S'ha produït un error en ajustar Holt-Winters: {e}")
-        return None
\ No newline at end of file
+        registrar_fallada(limits, e, "Holt-Winters")
+        return None
+
+def predir_holt_winters_interval(model, n_periods, index=None, nivells=(0.8, 0.95), repeticions=1000, llavor=None):
+    """
+    Genera la predicció puntual i els quantils d'un model Holt-Winters.
+
+    Statsmodels no ofereix intervals analítics per a Holt-Winters, de manera que els quantils
+    s'obtenen de trajectòries simulades des del final de l'entrenament en una sola crida. La
+    simulació usa un generador propi, de manera que no depèn de l'estat aleatori global.
+
+    Arguments:
+    - model: Model Holt-Winters ajustat (statsmodels).
+    - n_periods: Nombre de períodes a predir.
+    - index: Índex de les prediccions (per defecte, el que genera el model).
+    - nivells: Nivells dels intervals de predicció.
+    - repeticions: Nombre de trajectòries simulades.
+    - llavor: Llavor del generador de la simulació (None per no fixar-la).
+
+    Retorna:
+    - PrediccioInterval amb la mitjana i els quantils.
+    """
+    mitjana = model.forecast(steps=n_periods)
+    mostres = model.simulate(
+        n_periods, repetitions=repeticions, error="add", anchor="end", random_state=np.random.RandomState(llavor)
+    )
+
+    if index is None:
+        index = mitjana.index
+
+    return PrediccioInterval.des_de_mostres(index, np.asarray(mitjana), np.asarray(mostres), nivells)
@@ -0,0 +1,390 @@
+import time
+import numpy as np
+import pandas as pd
+from .estat import EstatHoltWinters, compactar_model
+from .holt_winters import ajustar_holt_winters
+from .limits import iniciar_candidat, registrar_fallada
+
+# Límits de cerca dels paràmetres de suavització i de l'esmorteïment
+LIMITS_SUAVITZACIO = (1e-4, 0.9999)
+LIMITS_ESMORTEIMENT = (0.8, 0.995)
+
+# Graella inicial: cada combinació s'avalua per a totes les sèries alhora
+GRAELLA = {
+    "alfa": (0.1, 0.3, 0.5, 0.7, 0.9),
+    "beta": (0.01, 0.1, 0.3),
+    "gamma": (0.01, 0.1, 0.3, 0.5),
+    "phi": (0.85, 0.95, 0.98),
+}
+
+def recursions(y, alfa, beta, gamma, phi, nivell, pendent, estacional, tendencia="add", estacionalitat="add"):
+    """
+    Aplica les recursions de Holt-Winters (forma de correcció d'errors de statsmodels) a un lot de sèries.
+
+    El bucle només recorre el temps; cada pas s'aplica a totes les sèries (i combinacions de
+    paràmetres) del lot amb operacions vectoritzades.
+
+    Arguments:
+    - y: Array (lot × T) amb les observacions.
+    - alfa, beta, gamma, phi: Arrays (lot,) amb els paràmetres de cada fila.
+    - nivell, pendent: Arrays (lot,) amb l'estat inicial (t = -1).
+    - estacional: Array (lot × m) amb els factors estacionals inicials dels temps 0..m-1.
+    - tendencia: "add" o None.
+    - estacionalitat: "add", "mul" o None.
+
+    Retorna:
+    - ajustats: Array (lot × T) de prediccions a un pas.
+    - nivell, pendent: Estat final.
+    - estacional: Array (lot × m) amb els factors dels m períodes següents, en ordre.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    T = y.shape[1]
+    m = estacional.shape[1]
+    nivell, pendent, estacional = nivell.copy(), pendent.copy(), estacional.copy()
+    ajustats = np.empty_like(y)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for t in range(T):
+            s = estacional[:, t % m]
+            anterior = nivell + phi * pendent
+            if estacionalitat == "mul":
+                ajustats[:, t] = anterior * s
+                nou_nivell = alfa * y[:, t] / s + (1 - alfa) * anterior
+                estacional[:, t % m] = gamma * y[:, t] / anterior + (1 - gamma) * s
+            else:
+                ajustats[:, t] = anterior + s
+                nou_nivell = alfa * (y[:, t] - s) + (1 - alfa) * anterior
+                if estacionalitat == "add":
+                    estacional[:, t % m] = gamma * (y[:, t] - anterior) + (1 - gamma) * s
+            if tendencia:
+                pendent = beta * (nou_nivell - nivell) + (1 - beta) * phi * pendent
+            nivell = nou_nivell
+
+    return ajustats, nivell, pendent, np.roll(estacional, -(T % m), axis=1)
+
+def _estat_inicial(y, m, tendencia, estacionalitat):
+    # Heurística de descomposició clàssica sobre els primers cicles (com la inicialització heurística de
+    # statsmodels): tendència amb mitjana mòbil centrada 2×m, factors estacionals mitjans per posició i
+    # nivell i pendent d'una recta ajustada a la tendència
+    lot, T = y.shape
+    if not estacionalitat:
+        nivell = y[:, 0].copy()
+        pendent = y[:, 1] - y[:, 0] if tendencia else np.zeros(lot)
+        return nivell, pendent, np.zeros((lot, 1))
+
+    y = y[:, :min(5, T // m) * m]
+    pesos = np.r_[0.5, np.ones(m - 1), 0.5] / m if m % 2 == 0 else np.ones(m) / m
+    tendencia_mm = np.apply_along_axis(lambda fila: np.convolve(fila, pesos, mode="valid"), 1, y)
+    inici = (len(pesos) - 1) // 2
+    temps = np.arange(inici, inici + tendencia_mm.shape[1])
+    observat = y[:, temps]
+    desviacions = observat / tendencia_mm if estacionalitat == "mul" else observat - tendencia_mm
+
+    estacional = np.empty((lot, m))
+    for j in range(m):
+        estacional[:, j] = desviacions[:, (temps % m) == j].mean(axis=1)
+    estacional = estacional / estacional.mean(axis=1, keepdims=True) if estacionalitat == "mul" else estacional - estacional.mean(axis=1, keepdims=True)
+
+    # Recta sobre els dos primers cicles de la tendència, extrapolada a t = -1
+    primers = min(2 * m, tendencia_mm.shape[1])
+    x = temps[:primers] - temps[:primers].mean()
+    pendent = tendencia_mm[:, :primers] @ x / (x @ x) if tendencia else np.zeros(lot)
+    nivell = tendencia_mm[:, :primers].mean(axis=1) - pendent * (temps[:primers].mean() + 1)
+    return nivell, pendent, estacional
+
+def _sse(y, parametres, noms, nivell, pendent, estacional, tendencia, estacionalitat):
+    # Suma d'errors quadràtics de cada fila; les files no finites (p. ex. factors negatius) queden a infinit
+    valors = dict(zip(noms, parametres.T))
+    lot = parametres.shape[0]
+    ajustats, *_ = recursions(
+        y,
+        valors["alfa"], valors.get("beta", np.zeros(lot)), valors.get("gamma", np.zeros(lot)), valors.get("phi", np.ones(lot)),
+        valors.get("nivell", nivell), valors.get("pendent", pendent), estacional,
+        tendencia, estacionalitat
+    )
+    sse = np.sum((y - ajustats) ** 2, axis=1)
+    return np.where(np.isfinite(sse), sse, np.inf)
+
+def _refinar_estat(y, valors, nivell, pendent, estacional, tendencia, estacionalitat, passos=1):
+    """
+    Refina l'estat inicial (nivell, pendent i factors estacionals) per a uns paràmetres de suavització
+    donats amb passos de Gauss-Newton.
+
+    El jacobià de les prediccions respecte de l'estat inicial s'obté per diferències finites en una
+    sola passada, afegint una fila al lot per cada component de l'estat. Amb estacionalitat additiva
+    (o sense) les recursions són lineals en l'estat i un sol pas dona el mínim exacte. Els factors
+    estacionals es restringeixen a sumar zero (additius) o a tindre mitjana u (multiplicatius).
+    """
+    lot, T = y.shape
+    m = estacional.shape[1]
+    lliures = m - 1 if estacionalitat else 0
+    k = 1 + bool(tendencia) + lliures
+    n = lot * (k + 1)
+    noms = list(valors)
+    matriu = np.column_stack([valors[nom] for nom in noms])
+    parametres = {nom: np.repeat(valor, k + 1) for nom, valor in valors.items()}
+
+    escala = np.maximum(np.std(y, axis=1), 1e-8)
+    h = np.column_stack([1e-3 * escala] * (1 + bool(tendencia)) + [1e-3 * (np.ones(lot) if estacionalitat == "mul" else escala)] * lliures)
+    pertorbacions = np.zeros((lot, k + 1, k))
+    pertorbacions[:, 1:] = np.eye(k)[np.newaxis] * h[:, np.newaxis]
+
+    def desplacar(estacional, canvis):
+        # L'últim factor compensa els canvis dels altres per mantindre la restricció
+        estacional = estacional.copy()
+        estacional[:, :-1] += canvis
+        estacional[:, -1] -= canvis.sum(axis=1)
+        return estacional
+
+    for _ in range(passos):
+        nivells = (nivell[:, np.newaxis] + pertorbacions[:, :, 0]).ravel()
+        pendents = (pendent[:, np.newaxis] + pertorbacions[:, :, 1]).ravel() if tendencia else np.zeros(n)
+        estacionals = np.repeat(estacional, k + 1, axis=0)
+        if estacionalitat:
+            estacionals = desplacar(estacionals, pertorbacions[:, :, k - lliures:].reshape(n, lliures))
+
+        ajustats, *_ = recursions(
+            np.repeat(y, k + 1, axis=0),
+            parametres["alfa"], parametres.get("beta", np.zeros(n)), parametres.get("gamma", np.zeros(n)), parametres.get("phi", np.ones(n)),
+            nivells, pendents, estacionals, tendencia, estacionalitat
+        )
+        ajustats = ajustats.reshape(lot, k + 1, T)
+        J = ((ajustats[:, 1:] - ajustats[:, :1]) / h[:, :, np.newaxis]).transpose(0, 2, 1)
+        residus = (y - ajustats[:, 0])[:, :, np.newaxis]
+        invalides = ~(np.isfinite(J).all(axis=(1, 2)) & np.isfinite(residus).all(axis=(1, 2)))
+        J[invalides], residus[invalides] = 0.0, 0.0
+
+        JtJ = J.transpose(0, 2, 1) @ J
+        regularitzacio = (1e-10 * np.trace(JtJ, axis1=1, axis2=2) + 1e-12)[:, np.newaxis, np.newaxis] * np.eye(k)
+        pas = np.linalg.solve(JtJ + regularitzacio, J.transpose(0, 2, 1) @ residus)[:, :, 0]
+
+        # El pas només s'accepta a les sèries on redueix l'error
+        nou_nivell = nivell + pas[:, 0]
+        nou_pendent = pendent + pas[:, 1] if tendencia else pendent
+        nou_estacional = desplacar(estacional, pas[:, k - lliures:]) if estacionalitat else estacional
+        actual = _sse(y, matriu, noms, nivell, pendent, estacional, tendencia, estacionalitat)
+        nou = _sse(y, matriu, noms, nou_nivell, nou_pendent, nou_estacional, tendencia, estacionalitat)
+        millora = nou < actual
+        nivell = np.where(millora, nou_nivell, nivell)
+        pendent = np.where(millora, nou_pendent, pendent)
+        estacional = np.where(millora[:, np.newaxis], nou_estacional, estacional)
+
+    return nivell, pendent, estacional
+
+def _optimitzar(y, m, tendencia, estacionalitat, damped_trend, iteracions, rondes=3, limits=None):
+    """
+    Optimitzador per lots sobre totes les sèries alhora: graella inicial i cerca de patrons (compass
+    search) dels paràmetres de suavització, alternada amb el refinament de l'estat inicial.
+    """
+    lot, T = y.shape
+    nivell, pendent, estacional = _estat_inicial(y, m, tendencia, estacionalitat)
+    passos_estat = 1 if estacionalitat != "mul" else 3
+
+    noms = ["alfa"] + (["beta"] if tendencia else []) + (["gamma"] if estacionalitat else []) + (["phi"] if damped_trend else [])
+    graella = np.array(np.meshgrid(*[GRAELLA[nom] for nom in noms], indexing="ij")).reshape(len(noms), -1).T
+
+    # Avaluació de la graella: (lot · K) files en una sola passada
+    K = len(graella)
+    sse = _sse(
+        np.repeat(y, K, axis=0), np.tile(graella, (lot, 1)), noms,
+        np.repeat(nivell, K), np.repeat(pendent, K), np.repeat(estacional, K, axis=0), tendencia, estacionalitat
+    ).reshape(lot, K)
+    parametres = graella[np.argmin(sse, axis=1)]
+
+    inferiors = np.array([LIMITS_ESMORTEIMENT[0] if nom == "phi" else LIMITS_SUAVITZACIO[0] for nom in noms])
+    superiors = np.array([LIMITS_ESMORTEIMENT[1] if nom == "phi" else LIMITS_SUAVITZACIO[1] for nom in noms])
+    d = len(noms)
+    direccions = np.vstack([np.eye(d), -np.eye(d)])
+
+    for _ in range(rondes):
+        nivell, pendent, estacional = _refinar_estat(
+            y, dict(zip(noms, parametres.T)), nivell, pendent, estacional, tendencia, estacionalitat, passos_estat
+        )
+        actual = _sse(y, parametres, noms, nivell, pendent, estacional, tendencia, estacionalitat)
+        passos = np.full((lot, d), 0.1)
+
+        # Cerca de patrons: cada iteració prova ±pas a cada dimensió i mou cada sèrie al millor candidat
+        for _ in range(iteracions):
+            if limits is not None:
+                limits.comprovar()
+            proves = np.clip(parametres[:, np.newaxis] + direccions[np.newaxis] * passos[:, np.newaxis], inferiors, superiors)
+            sse = _sse(
+                np.repeat(y, 2 * d, axis=0), proves.reshape(lot * 2 * d, d), noms,
+                np.repeat(nivell, 2 * d), np.repeat(pendent, 2 * d), np.repeat(estacional, 2 * d, axis=0), tendencia, estacionalitat
+            ).reshape(lot, 2 * d)
+            millors = np.argmin(sse, axis=1)
+            millora = sse[np.arange(lot), millors] < actual
+            parametres[millora] = proves[millora, millors[millora]]
+            actual[millora] = sse[millora, millors[millora]]
+            passos[~millora] /= 2
+            if np.all(passos < 1e-4):
+                break
+
+    valors = dict(zip(noms, parametres.T))
+    nivell, pendent, estacional = _refinar_estat(y, valors, nivell, pendent, estacional, tendencia, estacionalitat, passos_estat)
+    return valors, nivell, pendent, estacional
+
+def ajustar_holt_winters_lot(dades, seasonal="add", seasonal_periods=1, trend="add", damped_trend=False, iteracions=60, limits=None):
+    """
+    Ajusta un model Holt-Winters a cada columna de `dades` alhora amb el motor natiu (NumPy).
+
+    Els paràmetres de suavització i l'estat inicial (nivell i pendent) s'optimitzen minimitzant la
+    suma d'errors quadràtics a un pas; els factors estacionals inicials s'estimen dels cicles complets.
+
+    Arguments:
+    - dades: DataFrame (una sèrie per columna) o Serie temporal, sense valors nuls.
+    - seasonal: Tipus d'estacionalitat ("add", "mul" o None).
+    - seasonal_periods: Període d'estacionalitat.
+    - trend: Tipus de tendència ("add" o None).
+    - damped_trend: Indica si la tendència ha d'estar esmorteïda.
+    - iteracions: Nombre màxim d'iteracions de la cerca de patrons.
+    - limits: LimitsAjust (opcional); els límits es comproven a cada iteració de la cerca.
+
+    Retorna:
+    - Diccionari {columna: EstatHoltWinters}.
+    """
+    if isinstance(dades, pd.Series):
+        dades = dades.to_frame()
+    if trend not in ("add", None):
+        raise ValueError("El motor natiu només admet tendència additiva o sense tendència.")
+    if seasonal not in ("add", "mul", None):
+        raise ValueError(f"Estacionalitat '{seasonal}' no vàlida.")
+
+    y = dades.to_numpy(dtype=np.float64).T
+    m = int(seasonal_periods or 1) if seasonal else 1
+    if np.isnan(y).any():
+        raise ValueError("Les sèries no poden tindre valors nuls.")
+    if seasonal and y.shape[1] < 2 * m:
+        raise ValueError(f"Calen almenys {2 * m} observacions per estimar l'estacionalitat.")
+    if seasonal == "mul" and np.any(y <= 0):
+        raise ValueError("L'estacionalitat multiplicativa necessita valors positius.")
+
+    inici = time.perf_counter()
+    parametres, nivell, pendent, estacional = _optimitzar(y, m, trend, seasonal, damped_trend and bool(trend), iteracions, limits=limits)
+    lot = y.shape[0]
+    alfa = parametres["alfa"]
+    beta = parametres.get("beta", np.zeros(lot))
+    gamma = parametres.get("gamma", np.zeros(lot))
+    phi = parametres.get("phi", np.ones(lot))
+    ajustats, nivell_final, pendent_final, estacional_final = recursions(
+        y, alfa, beta, gamma, phi, nivell, pendent, estacional, trend, seasonal
+    )
+    residus = y - ajustats
+
+    estats = {}
+    for i, columna in enumerate(dades.columns):
+        estat = EstatHoltWinters()
+        estat.tendencia = trend
+        estat.estacionalitat = seasonal
+        estat.m = m
+        estat.alfa, estat.beta, estat.gamma, estat.phi = float(alfa[i]), float(beta[i]), float(gamma[i]), float(phi[i])
+        estat.nivell = float(nivell_final[i])
+        estat.pendent = float(pendent_final[i])
+        estat.estacional = estacional_final[i].copy() if seasonal else np.zeros(0)
+        estat.inicials = (float(nivell[i]), float(pendent[i]) if trend else None, estacional[i].copy() if seasonal else None)
+        estat.sigma2 = float(np.mean(residus[i] ** 2))
+        estat.biaix = float(np.mean(residus[i]))
+        estat._inicialitzar_index(dades.index)
+        estats[columna] = estat
+
+    print(f"{lot} models Holt-Winters (motor natiu) ajustats en {time.perf_counter() - inici:.2f} segons.")
+    return estats
+
+def ajustar_holt_winters_natiu(train, seasonal="add", seasonal_periods=1, trend="add", damped_trend=False, limits=None):
+    """
+    Ajusta un model Holt-Winters amb el motor natiu. Equivalent a `ajustar_holt_winters`,
+    però retorna directament un EstatHoltWinters.
+
+    Retorna:
+    - EstatHoltWinters ajustat o None si hi ha un error (el motiu queda a `limits.fallades`).
+    """
+    try:
+        iniciar_candidat(limits)
+        estats = ajustar_holt_winters_lot(train, seasonal, seasonal_periods, trend, damped_trend, limits=limits)
+        print(
+            f"Model Holt-Winters (natiu) ajustat correctament amb estacionalitat {seasonal}, període {seasonal_periods}, tendència {trend} i damped_trend {damped_trend}.")
+        return next(iter(estats.values()))
+
+    except Exception as e:
+        print(f"S'ha produït un error en ajustar Holt-Winters (natiu): {e}")
+        registrar_fallada(limits, e, "Holt-Winters natiu")
+        return None
+
+def valors_ajustats(estat, train):
+    """
+    Prediccions a un pas d'un EstatHoltWinters sobre `train`, recorrent les recursions des de l'estat inicial.
+    """
+    nivell, pendent, estacional = estat.inicials
+    y = np.asarray(train, dtype=np.float64).reshape(1, -1)
+    ajustats, *_ = recursions(
+        y,
+        np.array([estat.alfa]), np.array([estat.beta]), np.array([estat.gamma]), np.array([estat.phi]),
+        np.array([nivell]), np.array([pendent or 0.0]),
+        np.asarray(estacional if estacional is not None else [0.0], dtype=np.float64).reshape(1, -1),
+        estat.tendencia, estat.estacionalitat
+    )
+    return ajustats[0]
+
+def comprovar_paritat(estat, train):
+    """
+    Compara el motor natiu amb statsmodels amb els mateixos paràmetres i estat inicial.
+
+    Arguments:
+    - estat: EstatHoltWinters amb els estats inicials (`inicials`).
+    - train: Sèrie temporal d'entrenament.
+
+    Retorna:
+    - Diccionari amb la diferència màxima dels valors ajustats i de l'estat final.
+    """
+    y = train.iloc[:, 0] if isinstance(train, pd.DataFrame) else train
+    resultats = estat.a_model(y)
+    diferencies = {
+        "ajustats": np.max(np.abs(valors_ajustats(estat, y) - (np.asarray(resultats.fittedvalues) - estat.biaix))),
+        "nivell": abs(estat.nivell - float(np.asarray(resultats.level)[-1])),
+    }
+    if estat.tendencia:
+        diferencies["pendent"] = abs(estat.pendent - float(np.asarray(resultats.trend)[-1]))
+    if estat.estacionalitat:
+        diferencies["estacional"] = np.max(np.abs(estat.estacional - np.asarray(resultats.season)[-estat.m:]))
+    return diferencies
+
+def comparar_motors(estat, train, horitzo=None):
+    """
+    Compara l'ajust del motor natiu amb el de statsmodels (`ajustar_holt_winters`) sobre la mateixa sèrie.
+
+    A diferència de `comprovar_paritat`, que reprodueix les recursions amb els paràmetres del motor
+    natiu, ací cada motor optimitza els seus paràmetres: la comparació mostra si la cerca del motor
+    natiu arriba a un ajust equivalent al de statsmodels.
+
+    Arguments:
+    - estat: EstatHoltWinters ajustat amb el motor natiu sobre `train`.
+    - train: Sèrie temporal d'entrenament.
+    - horitzo: Nombre de períodes de predicció a comparar (per defecte, un cicle estacional).
+
+    Retorna:
+    - Diccionari amb la SSE de cada motor, la diferència relativa de SSE respecte a statsmodels, la
+      diferència màxima dels paràmetres de suavització i la diferència màxima de les prediccions,
+      relativa al valor màxim de la sèrie.
+    """
+    y = train.iloc[:, 0] if isinstance(train, pd.DataFrame) else train
+    horitzo = horitzo or estat.m
+    resultats = ajustar_holt_winters(
+        y.to_frame(), seasonal=estat.estacionalitat, seasonal_periods=estat.m,
+        trend=estat.tendencia, damped_trend=estat.phi != 1.0
+    )
+    if resultats is None:
+        raise RuntimeError("No s'ha pogut ajustar el model de referència de statsmodels.")
+    referencia = compactar_model(resultats)
+
+    sse_natiu = float(np.sum((np.asarray(y, dtype=np.float64) - valors_ajustats(estat, y)) ** 2))
+    sse_statsmodels = float(resultats.sse)
+    parametres = {nom: abs(getattr(estat, nom) - getattr(referencia, nom)) for nom in ("alfa", "beta", "gamma", "phi")}
+    prediccions = np.asarray(estat.forecast(horitzo)) - np.asarray(resultats.forecast(horitzo))
+    return {
+        "sse_natiu": sse_natiu,
+        "sse_statsmodels": sse_statsmodels,
+        "sse": (sse_natiu - sse_statsmodels) / max(sse_statsmodels, np.finfo(float).tiny),
+        **{f"parametre_{nom}": diferencia for nom, diferencia in parametres.items()},
+        "parametres": max(parametres.values()),
+        "prediccions": float(np.max(np.abs(prediccions))) / max(float(np.max(np.abs(y))), np.finfo(float).tiny),
+    }
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+def quantils_nivells(nivells):
+    """
+    Converteix nivells de confiança en la llista ordenada de quantils que els delimiten.
+
+    Arguments:
+    - nivells: Nivells dels intervals (per exemple, (0.8, 0.95)).
+
+    Retorna:
+    - Array ordenat de quantils (per exemple, [0.025, 0.1, 0.9, 0.975]).
+    """
+    quantils = set()
+    for nivell in nivells:
+        if not 0 < nivell < 1:
+            raise ValueError(f"El nivell {nivell} ha d'estar entre 0 i 1.")
+        quantils.add(round((1 - nivell) / 2, 10))
+        quantils.add(round((1 + nivell) / 2, 10))
+    return np.array(sorted(quantils), dtype=np.float64)
+
+class PrediccioInterval:
+    """
+    Predicció puntual i quantils d'un model guardats en arrays contigus.
+
+    La mitjana té forma (horitzó,) i els quantils es guarden en una única matriu
+    `valors` de forma (nombre de quantils, horitzó).
+    """
+    __slots__ = ("index", "mitjana", "quantils", "valors")
+
+    def __init__(self, index, mitjana, quantils, valors):
+        self.index = pd.Index(index)
+        self.mitjana = np.ascontiguousarray(mitjana, dtype=np.float64)
+        self.quantils = np.ascontiguousarray(quantils, dtype=np.float64)
+        self.valors = np.ascontiguousarray(valors, dtype=np.float64).reshape(len(self.quantils), len(self.mitjana))
+
+    @classmethod
+    def des_de_normal(cls, index, mitjana, desviacio, nivells):
+        """
+        Construeix els quantils a partir d'una predicció gaussiana (mitjana i error estàndard).
+        """
+        quantils = quantils_nivells(nivells)
+        mitjana = np.asarray(mitjana, dtype=np.float64)
+        desviacio = np.asarray(desviacio, dtype=np.float64)
+        valors = mitjana[np.newaxis, :] + norm.ppf(quantils)[:, np.newaxis] * desviacio[np.newaxis, :]
+        return cls(index, mitjana, quantils, valors)
+
+    @classmethod
+    def des_de_mostres(cls, index, mitjana, mostres, nivells):
+        """
+        Construeix els quantils empírics a partir de trajectòries simulades de forma (horitzó, repeticions).
+        """
+        quantils = quantils_nivells(nivells)
+        valors = np.quantile(np.asarray(mostres, dtype=np.float64), quantils, axis=1)
+        return cls(index, mitjana, quantils, valors)
+
+    def quantil(self, q):
+        """
+        Retorna la fila corresponent al quantil `q`.
+        """
+        posicio = np.flatnonzero(np.isclose(self.quantils, q))
+        if len(posicio) == 0:
+            raise KeyError(f"El quantil {q} no s'ha calculat.")
+        return self.valors[posicio[0]]
+
+    def interval(self, nivell):
+        """
+        Retorna els límits inferior i superior de l'interval del nivell indicat.
+        """
+        return self.quantil((1 - nivell) / 2), self.quantil((1 + nivell) / 2)
+
+    @property
+    def nivells(self):
+        """
+        Nivells dels intervals simètrics disponibles, de més estret a més ample.
+        """
+        inferiors = self.quantils[self.quantils < 0.5]
+        return sorted(round(1 - 2 * q, 10) for q in inferiors)
+
+    def a_dataframe(self):
+        """
+        Converteix la predicció en un DataFrame amb la mitjana i una columna per quantil.
+        """
+        df = pd.DataFrame(self.valors.T, index=self.index, columns=[f"q{q:g}" for q in self.quantils])
+        df.insert(0, "Predicció", self.mitjana)
+        return df
+
+    def __len__(self):
+        return len(self.mitjana)
+
+    def __repr__(self):
+        return f"PrediccioInterval(horitzo={len(self)}, nivells={self.nivells})"
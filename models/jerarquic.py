@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+METODES_RECONCILIACIO = ("bottom_up", "ols", "wls", "mint")
+
+def _fulles(node, jerarquia, visitats=()):
+    if node not in jerarquia:
+        return [node]
+    if node in visitats:
+        raise ValueError(f"La jerarquia té un cicle al node '{node}'.")
+    fulles = []
+    for fill in jerarquia[node]:
+        fulles.extend(_fulles(fill, jerarquia, visitats + (node,)))
+    return fulles
+
+def estructura_jerarquia(jerarquia):
+    """
+    Construeix la matriu de sumació S d'una jerarquia.
+
+    Arguments:
+    - jerarquia: Diccionari {agregat: [fills]}; els fills poden ser altres agregats
+      (per exemple, {"total": ["nacional", "internacional"]}).
+
+    Retorna:
+    - noms: Llista de nodes (primer els agregats, després les sèries inferiors).
+    - S: Matriu dispersa (nodes × sèries inferiors) tal que y = S · y_inferiors.
+    - nivells: Diccionari {node: profunditat}, amb 0 per als agregats superiors.
+    """
+    agregats = list(jerarquia)
+    fills = {fill for llista in jerarquia.values() for fill in llista}
+    inferiors = []
+    for agregat in agregats:
+        for fulla in _fulles(agregat, jerarquia):
+            if fulla not in inferiors:
+                inferiors.append(fulla)
+
+    noms = agregats + inferiors
+    posicio = {nom: j for j, nom in enumerate(inferiors)}
+    files, columnes = [], []
+    for i, agregat in enumerate(agregats):
+        for fulla in _fulles(agregat, jerarquia):
+            files.append(i)
+            columnes.append(posicio[fulla])
+    files.extend(range(len(agregats), len(noms)))
+    columnes.extend(range(len(inferiors)))
+    S = sparse.csr_matrix((np.ones(len(files)), (files, columnes)), shape=(len(noms), len(inferiors)))
+
+    nivells = {}
+    pendents = [(node, 0) for node in agregats if node not in fills]
+    while pendents:
+        node, nivell = pendents.pop()
+        nivells[node] = max(nivell, nivells.get(node, 0))
+        pendents.extend((fill, nivell + 1) for fill in jerarquia.get(node, []))
+
+    return noms, S, nivells
+
+def _restriccions(S):
+    # C = [I | -A]: cada agregat menys la suma de les seues sèries inferiors ha de ser zero
+    n_agregats = S.shape[0] - S.shape[1]
+    return sparse.hstack([sparse.identity(n_agregats, format="csr"), -S[:n_agregats]], format="csr")
+
+def _parametre_contraccio(residus):
+    # Paràmetre de contracció de Schäfer-Strimmer cap a la diagonal calculat sense formar
+    # cap matriu nodes × nodes: les sumes sobre parells (i, j) es redueixen a matrius T × T.
+    T = residus.shape[0]
+    escala = np.sqrt(np.mean(residus ** 2, axis=0))
+    escala[escala == 0] = 1.0
+    xs = residus / escala
+    xs2 = xs ** 2
+
+    gram = xs @ xs.T
+    suma_v = (np.sum(np.sum(xs2, axis=1) ** 2) - np.sum(gram ** 2) / T) / (T * (T - 1))
+    diag_v = (np.sum(xs2 ** 2, axis=0) - np.sum(xs2, axis=0) ** 2 / T) / (T * (T - 1))
+    suma_d = np.sum(gram ** 2) / T ** 2 - xs.shape[1]
+
+    if suma_d <= 0:
+        return 1.0
+    return float(np.clip((suma_v - np.sum(diag_v)) / suma_d, 0.0, 1.0))
+
+def reconciliar(prediccions, S, metode="mint", residus=None):
+    """
+    Reconcilia prediccions de base perquè siguen coherents amb la jerarquia.
+
+    Usa la forma amb restriccions ỹ = ŷ - W Cᵀ (C W Cᵀ)⁻¹ C ŷ, que només resol un sistema de la
+    mida del nombre d'agregats i s'aplica a tots els horitzons alhora. Per a MinT, la covariància
+    contreta W = λ·D + (1-λ)·EᵀE/T s'aplica a Cᵀ sense formar-la mai explícitament.
+
+    Arguments:
+    - prediccions: Array (nodes × horitzó) amb les prediccions de base, en l'ordre de `S`.
+    - S: Matriu de sumació (vegeu `estructura_jerarquia`).
+    - metode: "bottom_up", "ols", "wls" (variància dels residus) o "mint" (covariància contreta).
+    - residus: Array (observacions × nodes) de residus dins la mostra (necessari per a "wls" i "mint").
+
+    Retorna:
+    - Array (nodes × horitzó) amb les prediccions reconciliades.
+    """
+    if metode not in METODES_RECONCILIACIO:
+        raise ValueError(f"Mètode de reconciliació '{metode}' no vàlid. Opcions: {METODES_RECONCILIACIO}")
+
+    prediccions = np.asarray(prediccions, dtype=np.float64)
+    un_horitzo = prediccions.ndim == 1
+    if un_horitzo:
+        prediccions = prediccions[:, np.newaxis]
+    S = sparse.csr_matrix(S)
+    n_agregats = S.shape[0] - S.shape[1]
+
+    if metode == "bottom_up":
+        reconciliades = S @ prediccions[n_agregats:]
+        return reconciliades[:, 0] if un_horitzo else reconciliades
+
+    C = _restriccions(S)
+    if metode == "ols":
+        WCt = C.T.toarray()
+    else:
+        if residus is None:
+            raise ValueError(f"El mètode '{metode}' necessita els residus dins la mostra.")
+        residus = np.asarray(residus, dtype=np.float64)
+        residus = residus[~np.isnan(residus).any(axis=1)]
+        diagonal = np.mean(residus ** 2, axis=0)
+        WCt = C.T.multiply(diagonal[:, np.newaxis]).toarray()
+        if metode == "mint":
+            lambda_ = _parametre_contraccio(residus)
+            print(f"Paràmetre de contracció MinT: λ={lambda_:.3f}")
+            WCt = lambda_ * WCt + (1 - lambda_) * (residus.T @ (C @ residus.T).T) / residus.shape[0]
+
+    correccio = WCt @ np.linalg.solve(C @ WCt, C @ prediccions)
+    reconciliades = prediccions - correccio
+    return reconciliades[:, 0] if un_horitzo else reconciliades
+
+def metriques_jerarquia(reals, prediccions, nivells, calcular_metriques):
+    """
+    Calcula les mètriques per node i les agrega per nivell de la jerarquia.
+
+    Arguments:
+    - reals: DataFrame (horitzó × nodes) amb els valors reals.
+    - prediccions: DataFrame (horitzó × nodes) amb les prediccions.
+    - nivells: Diccionari {node: nivell}.
+    - calcular_metriques: Funció (real, predicció) → dict de mètriques.
+
+    Retorna:
+    - DataFrame amb una fila per node i una per nivell (mitjana dels nodes del nivell).
+    """
+    files = []
+    for node in prediccions.columns:
+        metriques = calcular_metriques(reals[node], prediccions[node])
+        files.append({"node": node, "nivell": nivells.get(node), **metriques})
+
+    taula = pd.DataFrame(files)
+    per_nivell = taula.drop(columns="node").groupby("nivell").mean().reset_index()
+    per_nivell.insert(0, "node", [f"nivell {n}" for n in per_nivell["nivell"]])
+    return pd.concat([taula, per_nivell], ignore_index=True)
@@ -0,0 +1,247 @@
+import multiprocessing
+import threading
+import time
+import psutil
+
+class AjustInterromput(Exception):
+    """
+    Ajust aturat per un límit. `abast` indica si afecta només el candidat actual ('candidat')
+    o tot l'ajust del model ('model'); en el segon cas no s'han de provar més candidats.
+    """
+    tipus = "interromput"
+
+    def __init__(self, missatge, abast="model"):
+        super().__init__(missatge)
+        self.abast = abast
+        self.candidat = None
+
+class TempsEsgotat(AjustInterromput):
+    tipus = "temps"
+
+class MemoriaExcedida(AjustInterromput):
+    tipus = "memoria"
+
+class AjustCancellat(AjustInterromput):
+    tipus = "cancellat"
+
+class ErrorAjust(RuntimeError):
+    """
+    Error d'un ajust executat en un altre procés que no és cap interrupció dels límits.
+    """
+    tipus = "error"
+
+class RegistreFallada:
+    """
+    Descripció estructurada d'un ajust o d'un candidat que no s'ha pogut completar.
+    """
+    __slots__ = ("model", "serie", "candidat", "tipus", "missatge", "durada")
+
+    def __init__(self, model=None, serie=None, candidat=None, tipus="error", missatge="", durada=0.0):
+        self.model = model
+        self.serie = serie
+        self.candidat = candidat
+        self.tipus = tipus
+        self.missatge = missatge
+        self.durada = durada
+
+    @classmethod
+    def des_de_error(cls, error, candidat=None, durada=0.0, model=None, serie=None):
+        original = getattr(error, "fallada", None)
+        if original is not None:
+            # Excepció d'un procés fill (vegeu `error_de_fallada`): es conserva el registre original
+            candidat = candidat if candidat is not None else original.candidat
+            return cls(model, serie, candidat, original.tipus, original.missatge, durada or original.durada)
+        tipus = error.tipus if isinstance(error, AjustInterromput) else "error"
+        candidat = candidat if candidat is not None else getattr(error, "candidat", None)
+        return cls(model, serie, candidat, tipus, f"{type(error).__name__}: {error}", durada)
+
+    @classmethod
+    def des_de_dict(cls, dades):
+        return cls(**dades)
+
+    def a_dict(self):
+        return {camp: getattr(self, camp) for camp in self.__slots__}
+
+    def __repr__(self):
+        return f"RegistreFallada({self.a_dict()})"
+
+class LimitsAjust:
+    """
+    Límits d'un ajust: temps màxim per candidat i per model, memòria màxima del procés i cancel·lació externa.
+
+    Els límits es comproven de manera cooperativa: a cada iteració de l'optimitzador (a través del
+    `callback` de scipy que accepten pmdarima i statsmodels) i entre candidats. Per a límits estrictes
+    (codi que no crida el callback, com Stan dins de Prophet), vegeu `executar_aillat`.
+
+    `memoria_proces_mb` mesura tot el procés: amb diversos ajustos alhora en fils, l'ajust interromput és el
+    que la comprova quan se supera, encara que la memòria siga d'un altre. La memòria de cada ajust només es
+    pot limitar en un procés propi (vegeu `executar_aillat`).
+    """
+
+    def __init__(self, temps_candidat=None, temps_model=None, memoria_proces_mb=None, cancellacio=None):
+        self.temps_candidat = temps_candidat
+        self.temps_model = temps_model
+        self.memoria_proces_mb = memoria_proces_mb
+        self.cancellacio = cancellacio or threading.Event()
+        self.fallades = []
+        self.interrupcio = None
+        self.inici_model = time.perf_counter()
+        self.inici_candidat = self.inici_model
+        self._proces = psutil.Process()
+
+    @classmethod
+    def des_de_config(cls, config, cancellacio=None):
+        """
+        Construeix els límits a partir de la clau 'limits' de la configuració.
+        """
+        opcions = config.get("limits") or {}
+        return cls(opcions.get("temps_candidat"), opcions.get("temps_model"), opcions.get("memoria_proces_mb"), cancellacio)
+
+    def iniciar_candidat(self):
+        self.inici_candidat = time.perf_counter()
+        self.interrupcio = None
+        self.comprovar()
+
+    def comprovar(self, *_):
+        """
+        Llança l'excepció corresponent si s'ha superat algun límit. Es pot passar directament com a
+        `callback` dels optimitzadors (rep i ignora el vector de paràmetres).
+
+        La darrera interrupció del candidat queda a `interrupcio`, perquè es puga classificar encara que
+        l'ajust la capture (per exemple, `auto_arima` amb error_action='warn').
+        """
+        if self.cancellacio.is_set():
+            self._interrompre(AjustCancellat("L'ajust s'ha cancel·lat."))
+        ara = time.perf_counter()
+        if self.temps_model is not None and ara - self.inici_model > self.temps_model:
+            self._interrompre(TempsEsgotat(f"S'ha superat el temps màxim del model ({self.temps_model} s)."))
+        if self.temps_candidat is not None and ara - self.inici_candidat > self.temps_candidat:
+            self._interrompre(TempsEsgotat(f"S'ha superat el temps màxim per candidat ({self.temps_candidat} s).", abast="candidat"))
+        if self.memoria_proces_mb is not None:
+            memoria = self._proces.memory_info().rss / 2**20
+            if memoria > self.memoria_proces_mb:
+                self._interrompre(MemoriaExcedida(f"El procés usa {memoria:.0f} MB (màxim de tot el procés: {self.memoria_proces_mb} MB)."))
+
+    def _interrompre(self, error):
+        self.interrupcio = error
+        raise error
+
+    def arguments_ajust(self):
+        """
+        Arguments d'ajust de pmdarima (i de `MLEModel.fit` de statsmodels) que connecten els límits.
+        """
+        return {"callback": self.comprovar}
+
+    def registrar(self, error, candidat=None, durada=None):
+        """
+        Guarda la fallada d'un candidat. Si l'error atura tot l'ajust (límit de model, memòria o
+        cancel·lació), el torna a llançar perquè no es proven més candidats; en aquest cas el
+        registre el fa qui captura l'excepció, amb el candidat guardat a `error.candidat`.
+        """
+        if isinstance(error, AjustInterromput) and error.abast != "candidat":
+            error.candidat = candidat
+            raise error
+        durada = time.perf_counter() - self.inici_candidat if durada is None else durada
+        self.fallades.append(RegistreFallada.des_de_error(error, candidat, durada))
+
+def error_de_fallada(fallada):
+    """
+    Excepció equivalent a una fallada rebuda d'un procés fill: les interrupcions recuperen la seua classe
+    (TempsEsgotat, MemoriaExcedida...) i la resta d'errors es llancen com a ErrorAjust. El registre
+    original queda a `fallada`, perquè `RegistreFallada.des_de_error` en conserve el tipus, el candidat i el missatge.
+    """
+    classes = {classe.tipus: classe for classe in (AjustInterromput, TempsEsgotat, MemoriaExcedida, AjustCancellat)}
+    error = classes.get(fallada.tipus, ErrorAjust)(fallada.missatge)
+    error.candidat = fallada.candidat
+    error.fallada = fallada
+    return error
+
+def arguments_ajust(limits):
+    return limits.arguments_ajust() if limits is not None else {}
+
+def iniciar_candidat(limits):
+    if limits is not None:
+        limits.iniciar_candidat()
+
+def interrupcio(limits):
+    return limits.interrupcio if limits is not None else None
+
+def registrar_fallada(limits, error, candidat=None, durada=None):
+    if limits is not None:
+        limits.registrar(error, candidat, durada)
+
+def desconnectar_limits(model):
+    """
+    Elimina el callback dels límits que statsmodels guarda amb els resultats de l'ajust (`mle_settings`),
+    perquè el model es puga desar i no torne a comprovar els límits en actualitzacions posteriors.
+    """
+    # ModelArimaFourier embolcalla el model de pmdarima a l'atribut `model`
+    resultats = getattr(model, "arima_res_", None) or getattr(getattr(model, "model", None), "arima_res_", None)
+    for objecte in (resultats, getattr(resultats, "mlefit", None)):
+        configuracio = getattr(objecte, "mle_settings", None)
+        if isinstance(configuracio, dict):
+            configuracio.pop("callback", None)
+
+def _executar_fill(connexio, funcio, arguments):
+    try:
+        connexio.send(("ok", funcio(*arguments)))
+    except BaseException as e:
+        connexio.send(("error", RegistreFallada.des_de_error(e).a_dict()))
+    finally:
+        connexio.close()
+
+def executar_aillat(funcio, arguments, temps_maxim=None, memoria_mb=None, cancellacio=None, interval=0.1):
+    """
+    Executa `funcio(*arguments)` en un procés independent i el finalitza si supera el temps o la
+    memòria (RSS del procés fill) indicats, o si es cancel·la.
+
+    A diferència de `LimitsAjust`, els límits s'apliquen encara que el codi no coopere, a canvi
+    d'arrencar un procés nou per ajust. `funcio` i `arguments` s'han de poder serialitzar.
+
+    Arguments:
+    - funcio: Funció de nivell de mòdul que fa l'ajust.
+    - arguments: Tupla d'arguments.
+    - temps_maxim: Segons màxims d'execució.
+    - memoria_mb: Memòria màxima del procés fill, en MB.
+    - cancellacio: threading.Event que, si s'activa, finalitza el procés.
+    - interval: Segons entre comprovacions.
+
+    Retorna:
+    - El resultat de la funció. Llança TempsEsgotat, MemoriaExcedida o AjustCancellat si s'ha
+      finalitzat el procés, o l'excepció equivalent a la fallada del fill (vegeu `error_de_fallada`).
+    """
+    context = multiprocessing.get_context("spawn")
+    receptor, emissor = context.Pipe(duplex=False)
+    proces = context.Process(target=_executar_fill, args=(emissor, funcio, arguments), daemon=True)
+    inici_temps = time.perf_counter()
+    proces.start()
+    emissor.close()
+
+    try:
+        fill = psutil.Process(proces.pid)
+        while True:
+            if receptor.poll(interval):
+                estat, resultat = receptor.recv()
+                break
+            if not proces.is_alive():
+                raise RuntimeError(f"El procés d'ajust ha acabat inesperadament (codi {proces.exitcode}).")
+            if cancellacio is not None and cancellacio.is_set():
+                raise AjustCancellat("L'ajust s'ha cancel·lat.")
+            if temps_maxim is not None and time.perf_counter() - inici_temps > temps_maxim:
+                raise TempsEsgotat(f"S'ha superat el temps màxim del model ({temps_maxim} s).")
+            if memoria_mb is not None:
+                try:
+                    memoria = fill.memory_info().rss / 2**20
+                except psutil.NoSuchProcess:
+                    continue
+                if memoria > memoria_mb:
+                    raise MemoriaExcedida(f"El procés d'ajust usa {memoria:.0f} MB (màxim {memoria_mb} MB).")
+    finally:
+        if proces.is_alive():
+            proces.kill()
+        proces.join()
+        receptor.close()
+
+    if estat == "error":
+        raise error_de_fallada(RegistreFallada.des_de_dict(resultat))
+    return resultat
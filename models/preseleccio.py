@@ -0,0 +1,303 @@
+from pmdarima.arima import ARIMA, ndiffs, nsdiffs
+from scipy.stats import norm
+from statsmodels.tsa.stattools import acf, pacf
+import itertools
+import time
+import numpy as np
+import pandas as pd
+from .limits import arguments_ajust, iniciar_candidat, registrar_fallada
+
+def diferenciar(y, d=0, D=0, m=1):
+    """
+    Aplica D diferències estacionals de període m i d diferències regulars.
+    """
+    w = np.asarray(y, dtype=np.float64)
+    for _ in range(D):
+        w = w[m:] - w[:-m]
+    for _ in range(d):
+        w = np.diff(w)
+    return w
+
+def _retards_polinomi(ordre, ordre_estacional, m):
+    # Retards del producte (1 - φ(B))(1 - Φ(B^m)); els termes creuats s'estimen com a coeficients lliures
+    return sorted({i + j * m for i in range(ordre + 1) for j in range(ordre_estacional + 1)} - {0})
+
+def _retards(serie, retards, inici, final):
+    # Columna j: serie[t - retards[j]] per a t en [inici, final)
+    if not retards:
+        return np.empty((final - inici, 0))
+    return np.column_stack([serie[inici - retard:final - retard] for retard in retards])
+
+def rss_mascares(Z, objectiu, mascares):
+    """
+    Suma de quadrats dels residus de moltes regressions MCO que usen subconjunts de les columnes de Z.
+
+    Cada fila de `mascares` (1 = columna inclosa) defineix una regressió. Totes comparteixen la matriu
+    de Gram ZᵀZ; les columnes excloses es substitueixen per la identitat i el lot de sistemes es
+    resol amb una sola crida.
+
+    Arguments:
+    - Z: Matriu de regressors (N × K).
+    - objectiu: Variable dependent (N,).
+    - mascares: Array (candidats × K) de zeros i uns.
+
+    Retorna:
+    - Array amb la suma de quadrats dels residus de cada regressió.
+    """
+    G = Z.T @ Z
+    b = Z.T @ objectiu
+    Gc = G[np.newaxis] * mascares[:, :, np.newaxis] * mascares[:, np.newaxis, :] + np.eye(len(G)) * (1 - mascares[:, np.newaxis, :])
+    bc = b[np.newaxis] * mascares
+    coeficients = np.linalg.solve(Gc, bc[:, :, np.newaxis])[:, :, 0]
+    return np.maximum(objectiu @ objectiu - np.sum(coeficients * bc, axis=1), np.finfo(float).tiny)
+
+def limits_acf_pacf(w, m=1, max_p=2, max_q=2, max_P=1, max_Q=1, alpha=0.05):
+    """
+    Acota els ordres candidats amb l'ACF i la PACF de la sèrie diferenciada.
+
+    L'ordre p (q) arriba fins a l'últim retard significatiu de la PACF (ACF) entre 1 i max_p (max_q);
+    els ordres estacionals P i Q, fins a l'últim múltiple significatiu de m.
+
+    Arguments:
+    - w: Sèrie diferenciada.
+    - m: Període d'estacionalitat.
+    - max_p, max_q, max_P, max_Q: Ordres màxims.
+    - alpha: Nivell de significació de les bandes de confiança.
+
+    Retorna:
+    - Diccionari amb els ordres màxims (p, q, P, Q) i els valors de l'ACF i la PACF.
+    """
+    n_retards = min(len(w) // 2 - 1, max(max_p, max_q, max_P * m, max_Q * m))
+    valors_acf = acf(w, nlags=n_retards, fft=True)
+    valors_pacf = pacf(w, nlags=n_retards, method="ols")
+    llindar = norm.ppf(1 - alpha / 2) / np.sqrt(len(w))
+
+    def ultim_significatiu(valors, maxim, pas=1):
+        return max((k for k in range(1, maxim + 1) if k * pas <= n_retards and abs(valors[k * pas]) > llindar), default=0)
+
+    return {
+        "p": ultim_significatiu(valors_pacf, max_p),
+        "q": ultim_significatiu(valors_acf, max_q),
+        "P": ultim_significatiu(valors_pacf, max_P, m) if m > 1 else 0,
+        "Q": ultim_significatiu(valors_acf, max_Q, m) if m > 1 else 0,
+        "acf": valors_acf,
+        "pacf": valors_pacf,
+    }
+
+def aic_hannan_rissanen(w, candidats, m=1, constant=False):
+    """
+    AIC aproximat de cada ordre candidat amb el mètode de Hannan-Rissanen.
+
+    1. S'ajusta un AR llarg per MCO i se'n guarden els residus com a estimació de les innovacions.
+    2. Cada candidat (p, q, P, Q) és una regressió MCO de w_t sobre els seus retards de w (part AR)
+       i dels residus (part MA). Totes les regressions comparteixen la mostra efectiva i la matriu de
+       Gram, de manera que es resolen alhora com un lot de sistemes emmascarats.
+
+    Arguments:
+    - w: Sèrie ja diferenciada.
+    - candidats: Llista de tuples (p, q, P, Q).
+    - m: Període d'estacionalitat.
+    - constant: Si s'inclou una constant a la regressió.
+
+    Retorna:
+    - Array amb l'AIC aproximat de cada candidat.
+    """
+    w = np.asarray(w, dtype=np.float64)
+    n = len(w)
+    candidats = np.asarray(candidats, dtype=int)
+    max_p, max_q, max_P, max_Q = candidats.max(axis=0)
+    retards_ar = _retards_polinomi(max_p, max_P, m)
+    retards_ma = _retards_polinomi(max_q, max_Q, m)
+
+    # 1. AR llarg
+    k_llarg = min(n // 3, max(10, 2 * max(retards_ar + retards_ma + [1])))
+    X = _retards(w, list(range(1, k_llarg + 1)), k_llarg, n)
+    if constant:
+        X = np.column_stack([np.ones(len(X)), X])
+    coeficients, *_ = np.linalg.lstsq(X, w[k_llarg:], rcond=None)
+    innovacions = np.full(n, np.nan)
+    innovacions[k_llarg:] = w[k_llarg:] - X @ coeficients
+
+    # 2. Regressions de tots els candidats sobre una mostra comuna
+    inici = max(k_llarg + max(retards_ma, default=0), max(retards_ar, default=0))
+    N = n - inici
+    Z = np.hstack([
+        np.ones((N, 1 if constant else 0)),
+        _retards(w, retards_ar, inici, n),
+        _retards(innovacions, retards_ma, inici, n),
+    ])
+    if N <= Z.shape[1] + 2:
+        raise ValueError(f"La sèrie és massa curta ({n} observacions) per als ordres candidats.")
+    objectiu = w[inici:]
+
+    mascares = np.zeros((len(candidats), Z.shape[1]))
+    mascares[:, :int(constant)] = 1.0
+    for c, (p, q, P, Q) in enumerate(candidats):
+        mascares[c, int(constant) + np.searchsorted(retards_ar, _retards_polinomi(p, P, m))] = 1.0
+        mascares[c, int(constant) + len(retards_ar) + np.searchsorted(retards_ma, _retards_polinomi(q, Q, m))] = 1.0
+
+    n_parametres = candidats.sum(axis=1) + int(constant) + 1
+    return N * np.log(rss_mascares(Z, objectiu, mascares) / N) + 2 * n_parametres
+
+def preseleccionar_ordres(train, m=1, d=None, D=None, max_p=2, max_q=2, max_P=1, max_Q=1, max_ordre=5, llista_curta=5):
+    """
+    Preselecciona els ordres ARIMA més prometedors sense cap ajust de màxima versemblança.
+
+    Arguments:
+    - train: Sèrie temporal d'entrenament.
+    - m: Període d'estacionalitat.
+    - d, D: Ordres de diferenciació (per defecte, estimats amb els tests ADF i OCSB).
+    - max_p, max_q, max_P, max_Q: Ordres màxims, com a la cerca exhaustiva.
+    - max_ordre: Màxim de p + q + P + Q.
+    - llista_curta: Nombre de candidats que es retornen.
+
+    Retorna:
+    - Diccionari amb d, D, els límits de l'ACF/PACF, la taula de candidats amb l'AIC aproximat i la llista curta.
+    """
+    y = np.asarray(train, dtype=np.float64).ravel()
+    if m <= 1:
+        max_P = max_Q = D = 0
+    if D is None:
+        D = nsdiffs(y, m, max_D=2)
+    if d is None:
+        d = ndiffs(diferenciar(y, 0, D, m), test="adf", max_d=2)
+
+    w = diferenciar(y, d, D, m)
+    limits = limits_acf_pacf(w, m, max_p, max_q, max_P, max_Q)
+    candidats = [
+        ordre for ordre in itertools.product(range(limits["p"] + 1), range(limits["q"] + 1), range(limits["P"] + 1), range(limits["Q"] + 1))
+        if sum(ordre) <= max_ordre
+    ]
+    constant = d + D in (0, 1)
+    aic = aic_hannan_rissanen(w, candidats, m, constant)
+
+    taula = pd.DataFrame(candidats, columns=["p", "q", "P", "Q"]).assign(aic_aproximat=aic).sort_values("aic_aproximat")
+    seleccionats = [
+        ((int(fila.p), d, int(fila.q)), (int(fila.P), D, int(fila.Q), m if m > 1 else 0))
+        for fila in taula.head(llista_curta).itertuples()
+    ]
+    return {"d": d, "D": D, "constant": constant, "limits": limits, "candidats": taula, "llista_curta": seleccionats}
+
+def preseleccionar_diferenciacions(train, m=1, d=None, D=None, parelles=2, llista_curta=5):
+    """
+    Preselecciona els ordres de totes les diferenciacions (d i D de 0 a 2, com la cerca exhaustiva) i
+    conserva les `parelles` (d, D) amb el millor AIC aproximat.
+
+    L'AIC aproximat ordena les diferenciacions de la mateixa manera que l'AIC exacte amb què les compara
+    `ajustar_auto_arima`; els tests de diferenciació (ADF, OCSB) en canvi poden descartar D > 0 en sèries
+    amb una estacionalitat clara però canviant, i la cerca acaba en un model molt pitjor.
+
+    Arguments:
+    - train: Sèrie temporal d'entrenament.
+    - m: Període d'estacionalitat.
+    - d, D: Ordres de diferenciació fixos (per defecte, es proven de 0 a 2).
+    - parelles: Nombre de diferenciacions que es conserven (None, totes).
+    - llista_curta: Nombre de candidats de cada diferenciació.
+
+    Retorna:
+    - Llista de preseleccions (vegeu `preseleccionar_ordres`), de millor a pitjor AIC aproximat.
+    """
+    diferenciacions = itertools.product(range(3) if d is None else [d], range(3) if D is None and m > 1 else [D or 0])
+
+    preseleccions = []
+    for d_actual, D_actual in diferenciacions:
+        try:
+            preseleccions.append(preseleccionar_ordres(train, m=m, d=d_actual, D=D_actual, llista_curta=llista_curta))
+        except ValueError as e:
+            print(f"S'ha produït un error en la preselecció amb d={d_actual}, D={D_actual}: {e}")
+
+    preseleccions.sort(key=lambda preseleccio: preseleccio["candidats"]["aic_aproximat"].iloc[0])
+    return preseleccions[:parelles]
+
+def ajustar_auto_arima_preseleccio(train, m=1, llista_curta=5, d=None, D=None, totes_diferenciacions=False, parelles=2, X=None, limits=None):
+    """
+    Ajusta un ARIMA automàtic: preselecció aproximada dels ordres i ajust exacte només de la llista curta.
+
+    Arguments:
+    - train: Sèrie temporal d'entrenament.
+    - m: Període d'estacionalitat.
+    - llista_curta: Nombre de candidats per diferenciació que s'ajusten per màxima versemblança.
+    - d, D: Ordres de diferenciació fixos (per defecte, es trien amb `preseleccionar_diferenciacions`).
+    - totes_diferenciacions: Si és True, ajusta les llistes curtes de totes les diferenciacions
+      (d i D de 0 a 2) i en compara l'AIC exacte.
+    - parelles: Nombre de diferenciacions (d, D) amb millor AIC aproximat que s'ajusten.
+    - X: Variables exògenes de l'entrenament (opcional). La preselecció no les té en compte;
+      només s'afegeixen en l'ajust exacte.
+    - limits: LimitsAjust amb els límits de cada ajust exacte (opcional).
+
+    Retorna:
+    - El millor model ARIMA de la llista curta segons AIC.
+    """
+    inici_temps = time.time()
+    preseleccions = preseleccionar_diferenciacions(train, m, d, D, None if totes_diferenciacions else parelles, llista_curta)
+
+    seleccionats = []
+    for preseleccio in preseleccions:
+        print(f"Preselecció de {len(preseleccio['candidats'])} candidats amb d={preseleccio['d']}, D={preseleccio['D']} "
+              f"(AIC aproximat={preseleccio['candidats']['aic_aproximat'].iloc[0]:.1f}).")
+        seleccionats.extend((ordre, ordre_estacional, preseleccio["constant"]) for ordre, ordre_estacional in preseleccio["llista_curta"])
+
+    print(f"Preselecció completada en {time.time() - inici_temps:.2f} segons. Ajustant {len(seleccionats)} candidats:")
+
+    millor_model = None
+    millor_aic = float("inf")
+    for ordre, ordre_estacional, constant in seleccionats:
+        try:
+            inici_ajust = time.time()
+            iniciar_candidat(limits)
+            model = ARIMA(
+                order=ordre,
+                seasonal_order=ordre_estacional,
+                with_intercept=constant,
+                suppress_warnings=True
+            ).fit(train, X=X, **arguments_ajust(limits))
+            aic = model.aic()
+            ordre_str = f"ARIMA{ordre}{ordre_estacional}"
+            print(f" {ordre_str:<35}: AIC={aic:.3f}, Temps={time.time() - inici_ajust:.2f} segons")
+
+            if aic < millor_aic:
+                millor_aic = aic
+                millor_model = model
+
+        except Exception as e:
+            print(f"S'ha produït un error amb ARIMA{ordre}{ordre_estacional}: {e}")
+            registrar_fallada(limits, e, f"ARIMA{ordre}{ordre_estacional}")
+            continue
+
+    if millor_model is None:
+        return None
+
+    print(f"Model òptim seleccionat: ARIMA{millor_model.order}{millor_model.seasonal_order} | AIC={millor_aic:.3f} | "
+          f"Temps total={time.time() - inici_temps:.2f} segons")
+    return millor_model
+
+def comparar_cerca(train, m=1, llista_curta=5):
+    """
+    Compara el temps i l'AIC de la cerca exhaustiva (`ajustar_auto_arima`) amb la preselecció, tant amb
+    les millors diferenciacions segons l'AIC aproximat com ajustant les de totes (com l'exhaustiva).
+
+    Retorna:
+    - DataFrame amb el model triat, l'AIC i el temps de cada cerca.
+    """
+    from .auto_arima import ajustar_auto_arima
+
+    files = []
+    for nom, ajustar in (
+        ("exhaustiva", lambda: ajustar_auto_arima(train, m=m)),
+        ("preselecció", lambda: ajustar_auto_arima_preseleccio(train, m=m, llista_curta=llista_curta)),
+        ("preselecció (totes d, D)", lambda: ajustar_auto_arima_preseleccio(train, m=m, llista_curta=llista_curta, totes_diferenciacions=True)),
+    ):
+        inici_temps = time.time()
+        model = ajustar()
+        files.append({
+            "cerca": nom,
+            "model": f"ARIMA{model.order}{model.seasonal_order}" if model is not None else None,
+            "AIC": model.aic() if model is not None else np.nan,
+            "temps": time.time() - inici_temps,
+        })
+
+    taula = pd.DataFrame(files)
+    print("=" * 50)
+    print(taula.to_string(index=False, float_format="%.2f"))
+    print("=" * 50)
+    return taula
@@ -1,14 +1,35 @@
 from prophet import Prophet
+# Prophet importa cmdstanpy de manera diferida en crear cada model; importar-lo ací evita
+# errors d'importació circular quan diversos models Prophet es creen alhora en fils diferents
+import cmdstanpy
+import threading
+import numpy as np
 import pandas as pd
+from utils.preprocessing import alinear_index, dies_per_periode
+from .intervals import PrediccioInterval
+from .limits import iniciar_candidat
 
-def ajustar_prophet(train, m=1, d=0):
+# El mostreig de Prophet usa l'estat aleatori global de NumPy: es llavora i s'executa en exclusiva
+BLOQUEIG_MOSTREIG = threading.Lock()
+
+# Estacionalitats que Prophet ja incorpora (període en dies)
+ESTACIONALITATS_INTEGRADES = {"yearly": 365.25, "weekly": 7.0}
+
+def ajustar_prophet(train, m=1, d=0, X=None, limits=None):
     """
     Ajusta un model Prophet amb estacionalitat segons el valor de m i diferenciació si cal.
 
+    Prophet mesura els períodes en dies: m es converteix amb la freqüència de l'índex (m=12 amb
+    dades mensuals són 365.25 dies, m=7 amb dades diàries són 7 dies). Si el període coincideix
+    amb una estacionalitat integrada (anual o setmanal) no s'afegeix cap component nova.
+
     Arguments:
     - train: Sèrie temporal d'entrenament.
-    - m: Període d'estacionalitat.
+    - m: Període d'estacionalitat, en nombre d'observacions.
     - d: Nombre de diferenciacions aplicades abans de l'entrenament.
+    - X: Variables exògenes de l'entrenament (DataFrame, opcional); cada columna s'afegeix com a regressor.
+    - limits: LimitsAjust (opcional). L'optimització de Stan no es pot interrompre: els límits només es
+      comproven abans d'ajustar (per a límits estrictes, vegeu `executar_aillat`).
 
     Retorna:
     - Model Prophet ajustat.
@@ -17,18 +38,32 @@ def ajustar_prophet(train, m=1, d=0):
 
     model = Prophet(yearly_seasonality=True, changepoint_prior_scale=0.05)
 
-    if m == 7:
-        model.add_seasonality(name="daily", period=7, fourier_order=5)
-    elif m == 12:
-        model.add_seasonality(name="monthly", period=12, fourier_order=15)
-    elif m == 52:
-        model.add_seasonality(name="weekly", period=52, fourier_order=20)
+    if m > 1:
+        periode = m * (dies_per_periode(train.index.freq) if train.index.freq is not None else 1)
+        if not any(np.isclose(periode, integrat, rtol=0.02) for integrat in ESTACIONALITATS_INTEGRADES.values()):
+            # Pocs harmònics per als períodes curts, fins a 10 per als llargs
+            model.add_seasonality(name="estacional", period=periode, fourier_order=int(min(10, max(1, m // 2))))
 
+    if X is not None:
+        for columna in X.columns:
+            model.add_regressor(columna)
+            df_train[columna] = X[columna].to_numpy()
+
+    iniciar_candidat(limits)
     model.fit(df_train)
 
     return model
 
-def predir_prophet(model, periods, freq="M", train=None, d=0):
+def afegir_regressors(future, X):
+    """
+    Afegeix al DataFrame de dates futures els valors de les variables exògenes.
+    """
+    if X is not None:
+        for columna in X.columns:
+            future[columna] = X[columna].to_numpy()
+    return future
+
+def predir_prophet(model, periods, freq="M", train=None, d=0, X=None):
     """
     Genera prediccions amb un model Prophet i assegura que es corresponen amb el test.
     Si s'ha aplicat diferenciació (d > 0), es reintegra la predicció a l'escala original.
@@ -39,21 +74,56 @@ def predir_prophet(model, periods, freq="M", train=None, d=0):
     - freq: Freqüència de la predicció (per defecte "M" per mensual).
     - train: Conjunt d'entrenament original (necessari per a reintegració si d > 0).
     - d: Nombre de diferenciacions aplicades.
+    - X: Variables exògenes de l'horitzó de predicció, si el model en té.
 
     Retorna:
     - Sèrie de prediccions amb l'índex corregit.
     """
-    future = model.make_future_dataframe(periods=periods, freq=freq)
+    future = afegir_regressors(model.make_future_dataframe(periods=periods, freq=freq, include_history=False), X)
 
     forecast = model.predict(future)
     forecast["ds"] = pd.to_datetime(forecast["ds"])
 
     prediccions = forecast.set_index("ds")["yhat"].iloc[-periods:]
     prediccions.index.name = "data"
-    prediccions.index = prediccions.index + pd.offsets.MonthEnd(0)
+    prediccions.index = alinear_index(prediccions.index, freq).rename("data")
 
     if d > 0 and train is not None:
         ultim_valor_train = train.iloc[-1, 0]
         prediccions = prediccions.cumsum() + ultim_valor_train
 
-    return prediccions.rename("Predicció")
\ No newline at end of file
+    return prediccions.rename("Predicció")
+
+def predir_prophet_interval(model, periods, freq="M", index=None, nivells=(0.8, 0.95), X=None, llavor=None):
+    """
+    Genera la predicció puntual i els quantils d'un model Prophet amb un sol mostreig.
+
+    La predicció puntual (mitjana) i els quantils s'obtenen de les mateixes mostres de la
+    distribució predictiva, només per a l'horitzó de predicció. Prophet mostreja amb l'estat
+    aleatori global de NumPy i no admet cap generador, de manera que la llavor s'hi fixa en
+    exclusiva només durant el mostreig.
+
+    Arguments:
+    - model: Model Prophet ajustat.
+    - periods: Nombre de períodes a predir.
+    - freq: Freqüència de la predicció (per defecte "M" per mensual).
+    - index: Índex de les prediccions (per defecte, les dates generades per Prophet).
+    - nivells: Nivells dels intervals de predicció.
+    - X: Variables exògenes de l'horitzó de predicció, si el model en té.
+    - llavor: Llavor del mostreig (None per no fixar-la).
+
+    Retorna:
+    - PrediccioInterval amb la mitjana i els quantils.
+    """
+    future = afegir_regressors(model.make_future_dataframe(periods=periods, freq=freq, include_history=False), X)
+
+    with BLOQUEIG_MOSTREIG:
+        if llavor is not None:
+            np.random.seed(llavor)
+        mostres = model.predictive_samples(future)["yhat"]
+    mitjana = mostres.mean(axis=1)
+
+    if index is None:
+        index = alinear_index(pd.DatetimeIndex(future["ds"], name="data"), freq)
+
+    return PrediccioInterval.des_de_mostres(index, mitjana, mostres, nivells)
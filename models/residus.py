@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from .estat import EstatModel, EstatHoltWinters
+from .holt_winters_natiu import valors_ajustats
+from .fourier import ModelArimaFourier
+
+def residus_model(model, train, descartar=0):
+    """
+    Calcula els residus dins la mostra (real - ajustat) d'un model complet o d'un estat compacte.
+
+    Arguments:
+    - model: Model ajustat (pmdarima, ARIMA amb Fourier, statsmodels Holt-Winters, Prophet o estat compacte).
+    - train: Sèrie temporal d'entrenament amb què s'ha ajustat el model.
+    - descartar: Nombre d'observacions inicials que es marquen com a NaN (per exemple, el període
+      d'escalfament dels models ARIMA amb inicialització difusa).
+
+    Retorna:
+    - Array amb un residu per observació d'entrenament.
+    """
+    y = train.iloc[:, 0] if isinstance(train, pd.DataFrame) else train
+
+    if hasattr(model, "arima_res_") or isinstance(model, ModelArimaFourier):
+        residus = np.asarray(model.resid(), dtype=np.float64)
+    elif type(model).__name__.startswith("HoltWintersResults"):
+        residus = np.asarray(model.resid, dtype=np.float64)
+    elif isinstance(model, EstatHoltWinters):
+        # L'estat guarda l'estat inicial: les recursions es tornen a aplicar sobre l'entrenament
+        residus = y.to_numpy(dtype=np.float64) - valors_ajustats(model, y) - model.biaix
+    elif type(model).__name__ == "Prophet":
+        mostres_originals = model.uncertainty_samples
+        try:
+            model.uncertainty_samples = 0
+            ajustats = model.predict(model.history[["ds", *model.extra_regressors]].copy())["yhat"].to_numpy()
+        finally:
+            model.uncertainty_samples = mostres_originals
+        residus = y.to_numpy(dtype=np.float64) - ajustats
+    elif isinstance(model, EstatModel):
+        # La resta d'estats només guarden l'estat final: es reconstrueix el model complet
+        return residus_model(model.a_model(train), train, descartar)
+    else:
+        raise TypeError(f"No es poden calcular els residus d'un model de tipus {type(model).__name__}.")
+
+    residus = residus.copy()
+    residus[:descartar] = np.nan
+    return residus
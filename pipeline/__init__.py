@@ -0,0 +1,6 @@
+from .config import CONFIG_PER_DEFECTE, SECCIONS_PER_DEFECTE, carregar_config, crear_config
+from .dag import Etapa, executar_dag
+from .execucio import construir_etapes, executar, executar_configs
+from .planificacio import carregar_historial, planificar
+from .monitor import historial_monitor
+from .benchmark import benchmark_models
@@ -0,0 +1,109 @@
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from models import ajustar_model, obtindre_prediccio_interval, comparar_cerca
+from utils import analysis, preprocessing as prep
+from .config import carregar_config
+
+CONFIG_BENCHMARK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "configs", "sintetica_diaria.json")
+MODELS_BENCHMARK = ("ARIMA Fourier", "Holt-Winters", "Holt-Winters natiu", "Prophet")
+
+def benchmark_models(config, dades, models=MODELS_BENCHMARK, repeticions=1):
+    """
+    Mesura el temps d'ajust i de predicció i la precisió al test de cada model amb les mateixes
+    funcions del registre que usa l'execució (mateix tall d'entrenament i mateixa llavor).
+
+    Parameters:
+        config (dict): Configuració ('columna', 'm', 'freq', 'periodes_estacionals', 'proporcio_train'...).
+        dades (pd.DataFrame): Dades amb la columna config['columna'] i índex de dates.
+        models (list): Models del registre que es comparen.
+        repeticions (int): Ajustos de cada model; es guarda la mediana dels temps.
+
+    Returns:
+        pd.DataFrame: Per model, temps d'ajust i de predicció (segons), RMSE, MAPE i cobertura dels intervals.
+    """
+    columna = config["columna"]
+    train, test = prep.dividir_dades(dades[[columna]], proporcio=config["proporcio_train"])
+    funcions = obtindre_prediccio_interval(config)
+
+    files = []
+    for model_name in models:
+        temps_ajust, temps_prediccio = [], []
+        try:
+            for _ in range(max(1, repeticions)):
+                inici_temps = time.perf_counter()
+                model = ajustar_model(config, model_name, train)
+                temps_ajust.append(time.perf_counter() - inici_temps)
+                if model is None:
+                    raise RuntimeError("l'ajust no ha convergit")
+
+                inici_temps = time.perf_counter()
+                interval = funcions[model_name](model, len(test), config["freq"], test.index)
+                temps_prediccio.append(time.perf_counter() - inici_temps)
+        except Exception as e:
+            print(f"El model {model_name} ha fallat: {e}")
+            files.append({"model": model_name, "temps_ajust": np.nan, "temps_prediccio": np.nan, "error": str(e)})
+            continue
+
+        prediccio = pd.Series(interval.mitjana, index=test.index, name="Predicció")
+        files.append({
+            "model": model_name,
+            "temps_ajust": float(np.median(temps_ajust)),
+            "temps_prediccio": float(np.median(temps_prediccio)),
+            **analysis.calcular_metriques(test[columna], prediccio, interval),
+        })
+
+    return pd.DataFrame(files).set_index("model")
+
+def crear_parser():
+    parser = argparse.ArgumentParser(
+        description="Temps i precisió dels models amb dades diàries (per defecte, data/sintetica_diaria.csv).",
+    )
+    parser.add_argument("--config", default=CONFIG_BENCHMARK, help="Fitxer de configuració (dataset, columna, m i períodes estacionals).")
+    parser.add_argument("--sintetica", action="store_true",
+                        help="Genera la sèrie amb generar_serie_sintetica en lloc de llegir el dataset de la configuració.")
+    parser.add_argument("--llavor", type=int, default=20, help="Llavor de la sèrie sintètica.")
+    parser.add_argument("--models", nargs="+", metavar="MODEL", default=list(MODELS_BENCHMARK), help="Models que es comparen.")
+    parser.add_argument("--repeticions", type=int, default=1, help="Ajustos de cada model (es mostra la mediana dels temps).")
+    parser.add_argument("--cerca-arima", action="store_true",
+                        help="Compara també el temps i l'AIC de la cerca ARIMA exhaustiva i de la preselecció (AUTO-ARIMA HR).")
+    parser.add_argument("--sortida", help="Fitxer CSV on es desa la taula (la comparació de cerques, amb el sufix '_cerca_arima').")
+    return parser
+
+def main(argv=None):
+    """
+    Punt d'entrada del benchmark: `python -m pipeline.benchmark`.
+    """
+    args = crear_parser().parse_args(argv)
+    config = carregar_config(args.config)["config"]
+
+    if args.sintetica:
+        dades = prep.generar_serie_sintetica(periodes=tuple(config.get("periodes_estacionals") or [config["m"]]), llavor=args.llavor)
+        origen = f"sèrie sintètica (llavor {args.llavor})"
+    else:
+        dades = prep.carregar_dades(config["dataset_path"], freq=config["freq"])
+        origen = config["dataset_path"]
+
+    print("=" * 50)
+    print(f"BENCHMARK: {origen}, {len(dades)} observacions, m={config['m']}, períodes={config.get('periodes_estacionals')}")
+    print("=" * 50)
+    taula = benchmark_models(config, dades, args.models, args.repeticions)
+
+    print("=" * 50)
+    print(taula.to_string(float_format=lambda valor: f"{valor:.2f}"))
+    print("=" * 50)
+    if args.sortida:
+        taula.to_csv(args.sortida, float_format="%.4f")
+
+    if args.cerca_arima:
+        train, _ = prep.dividir_dades(dades[[config["columna"]]], proporcio=config["proporcio_train"])
+        cerca = comparar_cerca(train, m=config["m"])
+        if args.sortida:
+            arrel, extensio = os.path.splitext(args.sortida)
+            cerca.to_csv(f"{arrel}_cerca_arima{extensio or '.csv'}", index=False, float_format="%.4f")
+    return taula
+
+if __name__ == "__main__":
+    main()
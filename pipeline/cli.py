@@ -0,0 +1,106 @@
+import argparse
+from .config import SECCIONS_PER_DEFECTE, _combinar, carregar_config, crear_config
+from .execucio import executar_configs
+from .planificacio import carregar_historial, mostrar_plan, planificar
+
+# Seccions que es poden triar amb --etapes (a més de 'grafiques.<tipus>' per a cada gràfica)
+ETAPES = [clau for clau in SECCIONS_PER_DEFECTE if clau not in ("grafiques", "models")] + ["grafiques"]
+
+def crear_parser():
+    parser = argparse.ArgumentParser(
+        description="Anàlisi i predicció de sèries temporals. Els arguments sobreescriuen els fitxers de configuració.",
+    )
+    parser.add_argument("configs", nargs="*", help="Fitxers de configuració JSON (per defecte, la configuració per defecte).")
+    parser.add_argument("--dataset", help="Ruta del fitxer CSV de dades.")
+    parser.add_argument("--columna", nargs="+", help="Columna o columnes que es prediuen (una execució per columna).")
+    parser.add_argument("--freq", help="Freqüència de pandas de les dades (ME, W, D...).")
+    parser.add_argument("--m", type=int, help="Període estacional.")
+    parser.add_argument("--models", nargs="+", metavar="MODEL", help=f"Models actius: {', '.join(SECCIONS_PER_DEFECTE['models'])}.")
+    parser.add_argument("--etapes", nargs="+", metavar="ETAPA",
+                        help=f"Etapes actives: {', '.join(ETAPES)} o grafiques.<tipus>. La resta es desactiven.")
+    parser.add_argument("--sortida", help="Directori arrel de les execucions.")
+    parser.add_argument("--models-path", help="Directori dels models desats.")
+    parser.add_argument("--treballadors", type=int, default=4, help="Etapes simultànies dins de cada execució.")
+    parser.add_argument("--processos", type=int, help="Execucions simultànies (per defecte, una per configuració).")
+    parser.add_argument("--plan", action="store_true",
+                        help="No executa res: mostra el nombre d'ajustos i el temps estimat a partir de les execucions anteriors.")
+    return parser
+
+def _seccions_etapes(etapes, parser):
+    """
+    Seccions amb només les etapes indicades actives.
+    """
+    grafiques = SECCIONS_PER_DEFECTE["grafiques"]
+    seccions = {clau: False for clau in ETAPES if clau != "grafiques"}
+    seccions["grafiques"] = {clau: False for clau in grafiques}
+    for etapa in etapes:
+        if etapa == "grafiques":
+            seccions["grafiques"] = {clau: True for clau in grafiques}
+        elif etapa.startswith("grafiques.") and etapa.split(".", 1)[1] in grafiques:
+            seccions["grafiques"][etapa.split(".", 1)[1]] = True
+        elif etapa in seccions:
+            seccions[etapa] = True
+        else:
+            parser.error(f"Etapa desconeguda: '{etapa}'. Opcions: {', '.join(ETAPES)} o grafiques.<tipus>.")
+    return seccions
+
+def construir_execucions(args, parser=None):
+    """
+    Converteix els arguments de la línia d'ordres en la llista de configuracions completes que s'executaran.
+
+    Parameters:
+        args (argparse.Namespace): Arguments de `crear_parser`.
+        parser (argparse.ArgumentParser): Parser per informar dels errors.
+
+    Returns:
+        list: Configuracions completes ('config' i 'seccions').
+    """
+    parser = parser or crear_parser()
+    base = [carregar_config(ruta) for ruta in args.configs] or [crear_config()]
+
+    config = {}
+    for clau, valor in (("dataset_path", args.dataset), ("freq", args.freq), ("m", args.m),
+                        ("sortida_path", args.sortida), ("models_path", args.models_path)):
+        if valor is not None:
+            config[clau] = valor
+
+    seccions = {}
+    if args.models:
+        desconeguts = set(args.models) - set(SECCIONS_PER_DEFECTE["models"])
+        if desconeguts:
+            parser.error(f"Models desconeguts: {', '.join(sorted(desconeguts))}.")
+        seccions["models"] = {model: model in args.models for model in SECCIONS_PER_DEFECTE["models"]}
+    if args.etapes:
+        seccions.update(_seccions_etapes(args.etapes, parser))
+
+    execucions = []
+    for execucio in base:
+        execucio = {"config": _combinar(execucio["config"], config), "seccions": _combinar(execucio["seccions"], seccions)}
+        if not args.columna:
+            execucions.append(execucio)
+            continue
+        for columna in args.columna:
+            nom = execucio["config"]["nom"] if len(args.columna) == 1 else f"{execucio['config']['nom']}_{columna}"
+            execucions.append({"config": _combinar(execucio["config"], {"columna": columna, "nom": nom}), "seccions": execucio["seccions"]})
+    return execucions
+
+def main(argv=None):
+    """
+    Punt d'entrada de la línia d'ordres: executa les configuracions o, amb --plan, només n'estima el cost.
+    """
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+    execucions = construir_execucions(args, parser)
+
+    if args.plan:
+        historials = {}
+        plans = []
+        for execucio in execucions:
+            sortida = execucio["config"]["sortida_path"]
+            if sortida not in historials:
+                historials[sortida] = carregar_historial(sortida)
+            plans.append(planificar(execucio, args.treballadors, historials[sortida]))
+        mostrar_plan(plans)
+        return plans
+
+    return executar_configs(execucions, processos=args.processos, treballadors=args.treballadors)
@@ -0,0 +1,129 @@
+import copy
+import hashlib
+import json
+import os
+
+CONFIG_PER_DEFECTE = {
+    "nom": "passatgers",
+    "dataset_path": "data/passatgers.csv",
+    "sortida_path": "runs",
+    "models_path": "saved_models",
+    "freq": "ME",
+    "columna": "nacional",
+    "m": 12, # Opcions: 1, 7, 12, 52, 365
+    "anomalies": None, # Per exemple, {"llindar": 3.5, "winsoritzar": true, "retall": 0, "logaritmica": null}
+    "exogenes": None, # Per exemple, {"calendari": true, "festius": "ES", "retards": {"internacional": [12]}}
+    "periodes_estacionals": None, # Períodes de l'ARIMA amb Fourier, per exemple [7, 365.25] per a dades diàries (per defecte, [m])
+    "proporcio_dataset": 1,
+    "proporcio_train": 0.95,
+    "nivells_interval": [0.8, 0.95],
+    "llavor": 20,
+    "models_compactes": False,
+    "limits": {
+        "temps_candidat": None, # Segons màxims per candidat (ordre ARIMA, configuració de Holt-Winters...)
+        "temps_model": None, # Segons màxims per ajust complet d'un model
+        "memoria_mb": None, # Memòria màxima de cada ajust; només s'aplica amb 'aillat', on es mesura el procés fill
+        "memoria_proces_mb": None, # Memòria màxima de tot el procés: interromp l'ajust en curs encara que la memòria siga d'altres ajustos
+        "temps_execucio": None, # Segons màxims de l'execució; després es cancel·len els ajustos pendents
+        "aillat": False, # Ajusta cada model en un procés independent, amb límits estrictes
+    },
+    "monitor": None, # Per exemple, {"llindar": 1.5, "finestra": 12}: reutilitza els models desats si l'error no ha derivat
+    "paritat": None, # Per exemple, {"tolerancia": 1e-6, "tolerancia_motors": 0.05}: compara cada ajust del motor natiu de Holt-Winters amb statsmodels
+    "distribucio_dades": "compartida", # Com reben les dades els ajustos aïllats. Opcions: compartida, memmap, copia
+    "informe": {
+        "cache_path": None, # Memòria cau de gràfiques compartida entre execucions (per defecte, <sortida_path>/cache_informe)
+        "processos": None, # Processos per generar les gràfiques (per defecte, un per CPU)
+        "dpi": 1200,
+    },
+    "jerarquia": None, # Per exemple, {"total": ["nacional", "internacional"]}
+    "reconciliacio": "mint", # Opcions: bottom_up, ols, wls, mint
+    "ensemble": {
+        "metode": "pesos", # Opcions: mitjana, mediana, pesos
+        "membres": None, # Per defecte, tots els models actius
+        "validacio": None, # Observacions finals de l'entrenament per calcular els pesos (per defecte, l'horitzó de predicció)
+    },
+}
+
+SECCIONS_PER_DEFECTE = {
+    "descriptiva": True,
+    "grafiques": {
+        "serie_temporal": True,
+        "acf_pacf": True,
+        "descomposicio": True,
+        "histograma_residus": True,
+        "qqplot_residus": True,
+        "boxplot_mes": True,
+        "prediccio": True,
+        "comparativa": True,
+    },
+    "descomposicio": True,
+    "soroll_blanc": True,
+    "estacionarietat": True,
+    "models": {
+        "ARIMA": True,
+        "AUTO-ARIMA": True,
+        "AUTO-ARIMA HR": False,
+        "ARIMA Fourier": False,
+        "Holt-Winters": True,
+        "Holt-Winters natiu": False,
+        "Prophet": True,
+        "Ensemble": True,
+    },
+    "resum": True,
+    "metriques": True,
+}
+
+def _combinar(base, canvis):
+    resultat = copy.deepcopy(base)
+    for clau, valor in canvis.items():
+        if isinstance(valor, dict) and isinstance(resultat.get(clau), dict):
+            resultat[clau] = _combinar(resultat[clau], valor)
+        else:
+            resultat[clau] = copy.deepcopy(valor)
+    return resultat
+
+def crear_config(config=None, seccions=None):
+    """
+    Combina una configuració parcial amb els valors per defecte.
+
+    Parameters:
+        config (dict): Claus de configuració que se sobreescriuen.
+        seccions (dict): Seccions que s'activen o desactiven.
+
+    Returns:
+        dict: Diccionari amb les claus 'config' i 'seccions' complets.
+    """
+    return {
+        "config": _combinar(CONFIG_PER_DEFECTE, config or {}),
+        "seccions": _combinar(SECCIONS_PER_DEFECTE, seccions or {}),
+    }
+
+def carregar_config(filepath):
+    """
+    Carrega una configuració d'execució des d'un fitxer JSON amb les claus 'config' i 'seccions'.
+
+    Parameters:
+        filepath (str): Ruta del fitxer JSON.
+
+    Returns:
+        dict: Configuració completa combinada amb els valors per defecte.
+    """
+    try:
+        with open(filepath, encoding="utf-8") as f:
+            contingut = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"El fitxer de configuració '{filepath}' no existeix.")
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Error en llegir la configuració '{filepath}': {e}")
+
+    execucio = crear_config(contingut.get("config"), contingut.get("seccions"))
+    if "nom" not in contingut.get("config", {}):
+        execucio["config"]["nom"] = os.path.splitext(os.path.basename(filepath))[0]
+    return execucio
+
+def hash_config(execucio):
+    """
+    Retorna un hash curt i estable de la configuració, per identificar execucions equivalents.
+    """
+    text = json.dumps(execucio, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:8]
@@ -0,0 +1,113 @@
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+class Etapa:
+    """
+    Etapa d'una execució: una funció que rep el context compartit i les etapes de les quals depèn.
+
+    Les dependències de `dependencies` han d'acabar correctament; les d'`opcionals` només han
+    d'haver acabat (encara que hagen fallat), com ara les mètriques respecte de cada model.
+    """
+    __slots__ = ("nom", "funcio", "dependencies", "opcionals")
+
+    def __init__(self, nom, funcio, dependencies=(), opcionals=()):
+        self.nom = nom
+        self.funcio = funcio
+        self.dependencies = tuple(dependencies)
+        self.opcionals = tuple(opcionals)
+
+    def __repr__(self):
+        return f"Etapa({self.nom!r}, dependencies={list(self.dependencies + self.opcionals)})"
+
+def ordenar_etapes(etapes):
+    """
+    Comprova que el graf d'etapes és vàlid i en retorna un ordre topològic.
+
+    Arguments:
+    - etapes: Llista d'objectes Etapa.
+
+    Retorna:
+    - Llista de noms d'etapa en ordre topològic.
+    """
+    noms = [etapa.nom for etapa in etapes]
+    if len(noms) != len(set(noms)):
+        raise ValueError("Hi ha etapes amb noms duplicats.")
+
+    pendents = {}
+    for etapa in etapes:
+        dependencies = set(etapa.dependencies + etapa.opcionals)
+        desconegudes = dependencies - set(noms)
+        if desconegudes:
+            raise ValueError(f"L'etapa '{etapa.nom}' depèn d'etapes inexistents: {sorted(desconegudes)}")
+        pendents[etapa.nom] = dependencies
+
+    ordre = []
+    while pendents:
+        llestes = [nom for nom, dependencies in pendents.items() if not dependencies]
+        if not llestes:
+            raise ValueError(f"El graf d'etapes té un cicle entre: {sorted(pendents)}")
+        for nom in llestes:
+            ordre.append(nom)
+            del pendents[nom]
+        for dependencies in pendents.values():
+            dependencies.difference_update(llestes)
+
+    return ordre
+
+def _executar_etapa(etapa, context):
+    print(f"[{etapa.nom}] Inici")
+    inici_temps = time.perf_counter()
+    etapa.funcio(context)
+    temps_execucio = time.perf_counter() - inici_temps
+    print(f"[{etapa.nom}] Completada en {temps_execucio:.2f} segons")
+    return temps_execucio
+
+def executar_dag(etapes, context, treballadors=4):
+    """
+    Executa les etapes respectant les dependències i llançant en paral·lel les que són independents.
+
+    Si una etapa falla, les que en depenen s'ometen, però la resta del graf continua.
+
+    Arguments:
+    - etapes: Llista d'objectes Etapa.
+    - context: Diccionari compartit entre etapes.
+    - treballadors: Nombre màxim d'etapes executades alhora.
+
+    Retorna:
+    - Diccionari amb el temps de cada etapa completada, els errors i les etapes omeses.
+    """
+    ordenar_etapes(etapes)
+
+    pendents = {etapa.nom: etapa for etapa in etapes}
+    temps = {}
+    errors = {}
+    omeses = []
+    en_curs = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, treballadors)) as executor:
+        while pendents or en_curs:
+            for nom, etapa in list(pendents.items()):
+                acabades = temps.keys() | errors.keys() | set(omeses)
+                if any(dep in errors or dep in omeses for dep in etapa.dependencies):
+                    print(f"[{nom}] Omesa perquè ha fallat una dependència.")
+                    omeses.append(nom)
+                    del pendents[nom]
+                elif all(dep in temps for dep in etapa.dependencies) and all(dep in acabades for dep in etapa.opcionals):
+                    en_curs[executor.submit(_executar_etapa, etapa, context)] = nom
+                    del pendents[nom]
+
+            if not en_curs:
+                continue
+
+            fets, _ = wait(en_curs, return_when=FIRST_COMPLETED)
+            for futur in fets:
+                nom = en_curs.pop(futur)
+                try:
+                    temps[nom] = futur.result()
+                except Exception as e:
+                    errors[nom] = f"{type(e).__name__}: {e}"
+                    print(f"[{nom}] Error: {errors[nom]}")
+                    traceback.print_exception(e)
+
+    return {"temps": temps, "errors": errors, "omeses": omeses}
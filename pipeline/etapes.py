@@ -0,0 +1,530 @@
+import glob
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from utils import analysis, utils, anomalies as anom, exogenes as exog, informe, memoria_compartida as mem, preprocessing as prep, visualization as visual
+from models import obtindre_model, obtindre_prediccio_interval, compactar_model, MODELS_AMB_EXOGENES
+from models import ajustar_model, ajustar_model_aillat, executar_aillat, comprovar_paritat, comparar_motors, LimitsAjust, RegistreFallada
+from .config import hash_config
+from . import monitor
+
+# pyplot manté un estat global: les gràfiques es generen d'una en una encara que les etapes vagin en paral·lel
+BLOQUEIG_GRAFIQUES = threading.Lock()
+# Els registres d'ajustos i de fallades s'afegeixen des de les etapes d'ajust, que s'executen en fils diferents
+BLOQUEIG_REGISTRES = threading.Lock()
+
+def nom_fitxer_model(model_name):
+    return model_name.lower().replace(' ', '_')
+
+def _grafica_activa(ctx, nom):
+    return bool(ctx["seccions"].get("grafiques", {}).get(nom, False))
+
+def _ruta_grafica(ctx, filepath):
+    return os.path.join(ctx["dirs"]["imatges"], filepath)
+
+def grafica(ctx, filepath, funcio, **arguments):
+    """
+    Genera una gràfica de `visualization` o, amb config['informe'], la registra a ctx['artefactes']
+    perquè l'etapa d'informe la construïsca (només si les seues dependències han canviat).
+    """
+    if ctx["config"].get("informe"):
+        with BLOQUEIG_REGISTRES:
+            ctx.setdefault("artefactes", []).append(informe.Artefacte(filepath, funcio, arguments))
+        return
+    with BLOQUEIG_GRAFIQUES:
+        funcio(**arguments, filepath=_ruta_grafica(ctx, filepath), mostrar=False)
+
+def guardar_covariables(ctx, dades):
+    """
+    Guarda les covariables amb retards de l'especificació d'exògenes abans de seleccionar les columnes.
+    """
+    retards = (ctx["config"].get("exogenes") or {}).get("retards") or {}
+    falten = [columna for columna in retards if columna not in dades.columns]
+    if falten:
+        raise ValueError(f"Les covariables {falten} no existeixen al dataset.")
+    ctx["covariables"] = dades[list(retards)] if retards else None
+
+def carregar(ctx):
+    config = ctx["config"]
+    dades = prep.carregar_dades(config["dataset_path"], freq=config["freq"])
+    guardar_covariables(ctx, dades)
+    dades = prep.afegir_ordre_temporal(dades)
+    dades, columna = prep.seleccionar_columnes(dades, config)
+    ctx["dades"] = prep.filtrar_dades(dades, config)
+    ctx["columna"] = columna
+
+def grafica_serie(ctx):
+    columna = ctx["columna"]
+    grafica(ctx, "analisi/serie.pdf", visual.grafiar_serie_temporal, data=ctx["dades"][[columna]], title=f"Sèrie temporal de '{columna}'")
+
+def descriptiva(ctx):
+    analysis.descriptiva(ctx["dades"], ctx["columna"], ctx["config"])
+
+def descomposicio(ctx):
+    dades, columna, m = ctx["dades"], ctx["columna"], ctx["config"]["m"]
+    ctx["descomposicio"] = analysis.descomposicio_estacional(dades[columna], freq=m)
+
+    if _grafica_activa(ctx, "descomposicio"):
+        grafica(ctx, "analisi/descomposicio.pdf", visual.grafiar_descomposicio, data=dades[columna], model='additive', freq=m)
+    if _grafica_activa(ctx, "boxplot_mes"):
+        grafica(ctx, "analisi/boxplot_mes.pdf", visual.grafiar_boxplot_mes,
+                data=dades, columna=columna, title=f"Box plot per mesos ({columna})")
+
+    print(f"Força de la tendència: {analysis.pes_tendencia(ctx['descomposicio']):.2f}/1")
+    print(f"Força de l'estacionalitat: {analysis.pes_estacionalitat(ctx['descomposicio']):.2f}/1")
+
+def soroll_blanc(ctx):
+    residus = ctx["descomposicio"].resid
+    analysis.test_jarque_bera(residus)
+    analysis.test_shapiro_wilk(residus)
+
+    if _grafica_activa(ctx, "histograma_residus"):
+        grafica(ctx, "analisi/histograma_residus.pdf", visual.grafiar_histograma_residus, residuals=residus)
+    if _grafica_activa(ctx, "qqplot_residus"):
+        grafica(ctx, "analisi/qqplot_residus.pdf", visual.grafiar_qqplot_residus, residuals=residus)
+
+def estacionarietat(ctx):
+    dades, columna, m = ctx["dades"], ctx["columna"], ctx["config"]["m"]
+    d = analysis.test_estacionarietat(dades[columna])
+    D = analysis.test_estacionarietat_estacional(dades[columna], m=m)
+    print(f"Ordre de diferenciació: d={d}, D={D}")
+    ctx["diferenciacio"] = (d, D)
+
+    if _grafica_activa(ctx, "acf_pacf"):
+        dades_dif = analysis.diferenciar_serie(dades[columna], m=m, d=d, D=D).dropna()
+        grafica(ctx, "analisi/acf_pacf.pdf", visual.grafiar_acf_pacf, data=dades_dif[[columna]], lags=40)
+
+def dividir(ctx):
+    columna = ctx["columna"]
+    ctx["train"], ctx["test"] = prep.dividir_dades(ctx["dades"][[columna]], proporcio=ctx["config"]["proporcio_train"])
+
+def netejar_train(ctx, columnes):
+    """
+    Detecta els punts anòmals de les columnes d'entrenament indicades (totes alhora), guarda la taula
+    a 'altres/anomalies.csv' i retorna les sèries winsoritzades si la configuració ho demana.
+    """
+    config = ctx["config"]
+    opcions = config["anomalies"]
+    inici_temps = time.perf_counter()
+    netes, taula = anom.netejar_anomalies(
+        ctx["train"][columnes], config["m"],
+        llindar=opcions.get("llindar", 3.5),
+        winsoritzar_punts=opcions.get("winsoritzar", True),
+        retall=opcions.get("retall", 0.0),
+        logaritmica=opcions.get("logaritmica"),
+    )
+    taula.to_csv(os.path.join(ctx["dirs"]["altres"], "anomalies.csv"), index=False, float_format="%.2f")
+    ctx["anomalies"] = taula
+
+    accio = "winsoritzats" if opcions.get("winsoritzar", True) else "detectats"
+    print(f"{len(taula)} punts anòmals {accio} en {len(columnes)} sèries ({time.perf_counter() - inici_temps:.3f} segons).")
+    if not taula.empty:
+        print(taula.to_string(index=False, float_format="%.2f"))
+    return netes
+
+def anomalies(ctx):
+    columna = ctx["columna"]
+    netes = netejar_train(ctx, [columna])
+    if ctx["config"]["anomalies"].get("winsoritzar", True):
+        ctx["train"] = netes
+
+def exogenes(ctx):
+    """
+    Construeix (o reutilitza de la memòria cau) les variables exògenes de tot l'índex: entrenament i horitzó.
+    """
+    config = ctx["config"]
+    ctx["exogenes"] = exog.obtindre_exogenes(
+        ctx["dades"].index, config["freq"], config["exogenes"], ctx.get("covariables"), horitzo=len(ctx["test"])
+    )
+    matriu = ctx["exogenes"]
+    print(f"Variables exògenes ({matriu.mida_bytes() / 1024:.1f} KB): {', '.join(matriu.columnes)}")
+
+def distribuir_dades(config):
+    """
+    Indica si cal publicar les dades en memòria compartida: només quan els ajustos s'executen en processos aïllats.
+    """
+    return bool((config.get("limits") or {}).get("aillat")) and config.get("distribucio_dades", "compartida") != "copia"
+
+def compartir_dades(ctx):
+    """
+    Publica una sola vegada l'entrenament (ja net) i el test, i les variables exògenes si n'hi ha, en memòria
+    compartida o en un fitxer mapat, perquè cada ajust aïllat rep només descriptors i construeix l'entrenament
+    i les exògenes com a vistes sense còpia.
+    """
+    backend = ctx["config"].get("distribucio_dades", "compartida")
+    dades = pd.concat([ctx["train"], ctx["test"]])
+    compartides = mem.DadesCompartides(dades, backend)
+    ctx["dades_compartides"] = compartides
+    print(f"Dades publicades ({compartides.descriptor.backend}): {len(dades.columns)} sèries, {compartides.mida_bytes() / 1024:.1f} KB")
+
+    if ctx.get("exogenes") is not None:
+        matriu = ctx["exogenes"]
+        exogenes = mem.DadesCompartides(pd.DataFrame(matriu.valors, index=matriu.index, columns=matriu.columnes), backend)
+        ctx["exogenes_compartides"] = exogenes
+        print(f"Variables exògenes publicades ({backend}): {len(matriu.columnes)} variables, {exogenes.mida_bytes() / 1024:.1f} KB")
+
+def entrenament_publicat(compartides, train):
+    """
+    Indica si `train` són exactament les primeres observacions publicades de les seues columnes (mateixes dates
+    i valors). Els ajustos amb un altre entrenament (per exemple, el del monitor) reben les dades serialitzades.
+    """
+    descriptor = compartides.descriptor
+    if len(train) > descriptor.forma[1] or not set(train.columns) <= set(descriptor.columnes):
+        return False
+    publicat = mem.vista_dades(descriptor, list(train.columns)).iloc[:len(train)]
+    return publicat.index.equals(train.index) and np.array_equal(publicat.to_numpy(), train.to_numpy(dtype=np.float64), equal_nan=True)
+
+def ajustar_compartit(config, model_name, descriptor, columnes, n_train, descriptor_exogenes=None, inici_exogenes=0):
+    """
+    Ajust dins d'un procés fill a partir de les dades compartides: l'entrenament són les primeres `n_train`
+    observacions de `columnes` i les variables exògenes, les files corresponents a partir de `inici_exogenes`.
+    """
+    train = mem.vista_dades(descriptor, columnes).iloc[:n_train]
+    X = None
+    if descriptor_exogenes is not None:
+        X = mem.vista_dades(descriptor_exogenes).iloc[inici_exogenes:inici_exogenes + n_train]
+    return ajustar_model_aillat(config, model_name, train, X)
+
+def exogenes_model(ctx, model_name, index):
+    """
+    Variables exògenes del model per a les dates de `index`, o None si no n'hi ha o el model no les admet.
+    """
+    if ctx.get("exogenes") is None or model_name not in MODELS_AMB_EXOGENES:
+        return None
+    return ctx["exogenes"].seleccionar(index)
+
+def ruta_model(ctx, model_name, columna=None, n_train=None):
+    """
+    Ruta del model desat, identificat pel dataset, la columna, el model, m, les variables exògenes i la mida d'entrenament.
+    """
+    config = ctx["config"]
+    columna = columna or ctx["columna"]
+    n_train = n_train or len(ctx["train"])
+    dataset_name = os.path.splitext(os.path.basename(config["dataset_path"]))[0]
+    model_name_m = f"{nom_fitxer_model(model_name)}_{config['m']}"
+    if config.get("exogenes") and model_name in MODELS_AMB_EXOGENES:
+        model_name_m += f"_x{exog.hash_exogenes(config['exogenes'])}"
+    if config.get("anomalies") and config["anomalies"].get("winsoritzar", True):
+        # Els models ajustats amb l'entrenament winsoritzat no són intercanviables amb els originals
+        model_name_m += f"_w{hash_config(config['anomalies'])}"
+    return os.path.join(ctx["dirs"]["models"], f"{dataset_name}_{columna}_{model_name_m}_{n_train}.pkl")
+
+def registrar_fallades(ctx, model_name, columna, fallades):
+    """
+    Afegeix a ctx['fallades'] els registres d'un ajust, amb el model i la sèrie a què pertanyen.
+    """
+    for fallada in fallades:
+        fallada.model, fallada.serie = model_name, columna
+    with BLOQUEIG_REGISTRES:
+        ctx.setdefault("fallades", []).extend(fallades)
+
+def registrar_ajust(ctx, model_name, columna, n_train, durada, series=1):
+    """
+    Afegeix a ctx['ajustos'] la durada d'un ajust completat (la usa `--plan` per estimar execucions futures).
+    """
+    config = ctx["config"]
+    registre = {
+        "model": model_name, "serie": columna, "series": series, "n_train": n_train,
+        "m": config["m"], "freq": config["freq"], "durada": durada,
+    }
+    with BLOQUEIG_REGISTRES:
+        ctx.setdefault("ajustos", []).append(registre)
+
+def entrenar_model(ctx, model_name, train, columna):
+    """
+    Ajusta un model amb els límits de config['limits'].
+
+    Els límits per candidat i per model es comproven dins de l'optimitzador del mateix procés; amb
+    'aillat' l'ajust s'executa en un procés independent que es finalitza si supera el temps o la
+    memòria del model. Les fallades dels candidats i de l'ajust es registren a ctx['fallades'].
+
+    Parameters:
+        ctx (dict): Context de l'execució.
+        model_name (str): Nom del model del registre.
+        train (pd.Series | pd.DataFrame): Entrenament.
+        columna (str): Sèrie a què correspon l'ajust.
+
+    Returns:
+        El model ajustat. Llança RuntimeError (o l'excepció del límit superat) si no s'ha pogut ajustar.
+    """
+    config = ctx["config"]
+    opcions = config.get("limits") or {}
+    X = exogenes_model(ctx, model_name, train.index)
+    limits = LimitsAjust.des_de_config(config, ctx.get("cancellacio"))
+
+    try:
+        if opcions.get("aillat"):
+            # Les dades compartides només serveixen si `train` és l'entrenament publicat
+            compartides = ctx.get("dades_compartides")
+            if compartides is not None and entrenament_publicat(compartides, train):
+                descriptor_exogenes, inici_exogenes = None, 0
+                if X is not None:
+                    descriptor_exogenes = ctx["exogenes_compartides"].descriptor
+                    inici_exogenes = ctx["exogenes"].index.get_loc(train.index[0])
+                funcio = ajustar_compartit
+                arguments = (config, model_name, compartides.descriptor, list(train.columns), len(train), descriptor_exogenes, inici_exogenes)
+            else:
+                funcio, arguments = ajustar_model_aillat, (config, model_name, train, X)
+            model, fallades = executar_aillat(
+                funcio, arguments,
+                temps_maxim=opcions.get("temps_model"), memoria_mb=opcions.get("memoria_mb"), cancellacio=limits.cancellacio,
+            )
+            limits.fallades.extend(RegistreFallada.des_de_dict(fallada) for fallada in fallades)
+        else:
+            model = ajustar_model(config, model_name, train, X, limits)
+    except Exception as e:
+        limits.fallades.append(RegistreFallada.des_de_error(e, durada=time.perf_counter() - limits.inici_model))
+        raise
+    finally:
+        registrar_fallades(ctx, model_name, columna, limits.fallades)
+
+    if model is None:
+        motiu = limits.fallades[-1].missatge if limits.fallades else "cap candidat no ha convergit"
+        raise RuntimeError(f"No s'ha pogut ajustar el model {model_name} ({columna}): {motiu}")
+    registrar_ajust(ctx, model_name, columna, len(train), time.perf_counter() - limits.inici_model)
+    return model
+
+def models_desats(ctx, model_name, columna):
+    """
+    Models desats de la sèrie amb la mateixa configuració i qualsevol mida d'entrenament.
+
+    Returns:
+        list: Parells (mida d'entrenament, ruta), de la mida més gran a la més petita.
+    """
+    prefix = ruta_model(ctx, model_name, columna, n_train=1)[:-len("1.pkl")]
+    desats = []
+    for ruta in glob.glob(glob.escape(prefix) + "*.pkl"):
+        mida = ruta[len(prefix):-len(".pkl")]
+        if mida.isdigit():
+            desats.append((int(mida), ruta))
+    return sorted(desats, reverse=True)
+
+def reutilitzar_model(ctx, model_name, train, columna):
+    """
+    Monitor de precisió: avalua el darrer model desat amb menys observacions que `train` sobre les
+    observacions noves i, si l'error no ha derivat, el reutilitza sense reentrenar-lo.
+
+    L'avaluació es registra a ctx['monitor'] i a l'historial 'monitor.csv' del directori de models. L'estat
+    reutilitzat es desa amb la mida de `train`, de manera que les execucions següents amb el mateix
+    entrenament el carreguen directament (amb les mateixes prediccions) i no el tornen a avaluar.
+
+    Returns:
+        L'estat compacte del model actualitzat fins al final de `train`, o None si cal reentrenar
+        (no hi ha cap model anterior, el model no té estat compacte o l'error ha derivat).
+    """
+    config = ctx["config"]
+    anteriors = [(n_model, ruta) for n_model, ruta in models_desats(ctx, model_name, columna) if n_model < len(train)]
+    if not anteriors:
+        return None
+
+    n_model, ruta = anteriors[0]
+    model = utils.carregar_model(ruta)
+    try:
+        estadistiques, estat, residus = monitor.avaluar_deriva(model, train, n_model, config["monitor"], descartar=config["m"] + 1)
+    except (TypeError, NotImplementedError) as e:
+        print(f"{e} No es pot monitorar el model {model_name} ({columna}): es reentrena.")
+        return None
+
+    accio = "reentrenar" if estadistiques["deriva"] else "reutilitzar"
+    registre = monitor.registre_avaluacio(config, model_name, columna, estadistiques, accio)
+    with BLOQUEIG_REGISTRES:
+        ctx.setdefault("monitor", []).append(registre)
+    monitor.registrar_avaluacio(os.path.join(ctx["dirs"]["models"], "monitor.csv"), registre)
+    print(f"Monitor {model_name} ({columna}): {estadistiques['n_noves']} observacions noves, error recent / referència = "
+          f"{estadistiques['rati']:.2f}, MAPE={estadistiques['MAPE']:.2f} → {accio}")
+
+    if estadistiques["deriva"]:
+        return None
+    utils.guardar_model(estat, ruta_model(ctx, model_name, columna, len(train)))
+    # Els residus (dins la mostra i a un pas) substitueixen els del model complet en la reconciliació
+    with BLOQUEIG_REGISTRES:
+        ctx.setdefault("residus_monitor", {})[(model_name, columna)] = residus
+    return estat
+
+def ajustar_o_carregar(ctx, model_name, train, columna):
+    """
+    Carrega el model desat o, si no existeix, l'entrena i el desa. Amb config['monitor'], abans
+    d'entrenar es prova de reutilitzar el model desat anterior (vegeu `reutilitzar_model`).
+    """
+    model_path = ruta_model(ctx, model_name, columna, len(train))
+    try:
+        return utils.carregar_model(model_path)
+    except FileNotFoundError:
+        if ctx["config"].get("monitor"):
+            model = reutilitzar_model(ctx, model_name, train, columna)
+            if model is not None:
+                return model
+        print(f"Model {model_name} ({columna}) no trobat. Entrenant...")
+        model = entrenar_model(ctx, model_name, train, columna)
+        utils.guardar_model(model, model_path)
+        return model
+
+def ajustar(model_name):
+    def etapa(ctx):
+        model = ajustar_o_carregar(ctx, model_name, ctx["train"], ctx["columna"])
+
+        if ctx["seccions"].get("resum", False):
+            try:
+                print(model.summary())
+            except AttributeError:
+                print(f"El model {model_name} no té un mètode summary().")
+
+        # En memòria només es conserva l'estat compacte; el fitxer desat manté el model complet
+        if ctx["config"].get("models_compactes", False):
+            try:
+                model = compactar_model(model)
+                print(f"Model {model_name} compactat: {model.mida_bytes() / 1024:.1f} KB")
+            except (TypeError, NotImplementedError) as e:
+                print(f"{e} Es conserva el model complet.")
+
+        ctx["models"][model_name] = model
+    return etapa
+
+def registrar_paritat(ctx, model_name, estats, train):
+    """
+    Compara els estats del motor natiu de Holt-Winters amb statsmodels amb els mateixos paràmetres i
+    estat inicial (vegeu `comprovar_paritat`) i afegeix a ctx['paritat'] la desviació màxima de cada
+    sèrie, també relativa al valor màxim de la sèrie. A més, ajusta statsmodels sobre la mateixa sèrie
+    (vegeu `comparar_motors`) i hi afegeix les diferències de SSE, paràmetres i prediccions de l'horitzó
+    de test; les que superen config['paritat']['tolerancia_motors'] es mostren com a avís.
+
+    Parameters:
+        ctx (dict): Context de l'execució.
+        model_name (str): Nom del model del registre.
+        estats (dict): EstatHoltWinters per columna.
+        train (pd.DataFrame): Entrenament amb què s'han ajustat els estats.
+
+    Returns:
+        list: Registres de paritat. Llança RuntimeError si alguna sèrie supera config['paritat']['tolerancia'].
+    """
+    opcions = ctx["config"].get("paritat") or {}
+    tolerancia = opcions.get("tolerancia", 1e-6)
+    tolerancia_motors = opcions.get("tolerancia_motors", 0.05)
+    registres = []
+    for columna, estat in estats.items():
+        y = train[columna]
+        diferencies = {clau: float(valor) for clau, valor in comprovar_paritat(estat, y).items()}
+        maxima = max(diferencies.values())
+        relativa = maxima / max(float(np.max(np.abs(y))), np.finfo(float).tiny)
+        print(f"Paritat {model_name} ({columna}) amb statsmodels: desviació màxima {maxima:.3g} (relativa {relativa:.3g})")
+
+        motors = comparar_motors(estat, y, len(ctx["test"]))
+        superades = [clau for clau in ("sse", "parametres", "prediccions") if abs(motors[clau]) > tolerancia_motors]
+        print(
+            f"Ajust {model_name} ({columna}) respecte a statsmodels: SSE {motors['sse']:+.1%}, "
+            f"paràmetres {motors['parametres']:.3g}, prediccions {motors['prediccions']:.1%}"
+        )
+        if superades:
+            print(f"Avís: el motor natiu difereix de statsmodels més de {tolerancia_motors:g} en: {', '.join(superades)}")
+        registres.append({
+            "model": model_name, "serie": columna, **diferencies, "relativa": relativa, "correcta": relativa <= tolerancia,
+            "motors": {**motors, "superades": superades},
+        })
+
+    with BLOQUEIG_REGISTRES:
+        ctx.setdefault("paritat", []).extend(registres)
+    fallides = [registre["serie"] for registre in registres if not registre["correcta"]]
+    if fallides:
+        raise RuntimeError(f"El motor natiu difereix de statsmodels més de {tolerancia:g} (relatiu) a: {', '.join(fallides)}")
+    return registres
+
+def paritat(model_name):
+    def etapa(ctx):
+        registrar_paritat(ctx, model_name, {ctx["columna"]: ctx["models"][model_name]}, ctx["train"])
+    return etapa
+
+def membres_ensemble(ctx):
+    """
+    Models ja ajustats que formen l'ensemble: els indicats a config['ensemble']['membres'] o, per defecte, tots.
+    """
+    noms = ctx["config"].get("ensemble", {}).get("membres")
+    return {nom: model for nom, model in ctx["models"].items() if nom != "Ensemble" and (not noms or nom in noms)}
+
+def ajustar_ensemble(ctx):
+    # No es desa ni es compacta: només guarda referències als membres, que ja estan ajustats i en memòria
+    membres = membres_ensemble(ctx)
+    if not membres:
+        raise RuntimeError("Cap membre de l'ensemble s'ha pogut ajustar.")
+    prediccions = {nom: ctx["intervals"][nom] for nom in membres if nom in ctx["intervals"]}
+    # Amb el mètode "pesos" els membres es validen al final de l'entrenament amb els paràmetres ja ajustats
+    ajust = obtindre_model(ctx["config"], membres, prediccions)["Ensemble"]
+    X = exogenes_model(ctx, "Ensemble", ctx["train"].index)
+    limits = LimitsAjust.des_de_config(ctx["config"], ctx.get("cancellacio"))
+    ctx["models"]["Ensemble"] = ajust(ctx["train"], limits=limits) if X is None else ajust(ctx["train"], X=X, limits=limits)
+
+def predir(model_name):
+    def etapa(ctx):
+        config, test = ctx["config"], ctx["test"]
+        prediccions = obtindre_prediccio_interval(config)
+        if model_name not in prediccions:
+            raise ValueError(f"Model {model_name} no implementat.")
+
+        X = exogenes_model(ctx, model_name, test.index)
+        interval = prediccions[model_name](ctx["models"][model_name], len(test), config["freq"], test.index, **({} if X is None else {"X": X}))
+
+        ctx["intervals"][model_name] = interval
+        predicted = pd.Series(interval.mitjana, index=test.index, name='Predicció')
+        ctx["metriques"][model_name] = analysis.calcular_metriques(test[ctx["columna"]], predicted, interval)
+        print(f"R^2 ({model_name}): {analysis.coeficient_r2(test[ctx['columna']], predicted):.2f}")
+    return etapa
+
+def grafiques_model(model_name):
+    def etapa(ctx):
+        columna, train, test = ctx["columna"], ctx["train"], ctx["test"]
+        interval = ctx["intervals"][model_name]
+        prediction = pd.DataFrame({'Predicció': interval.mitjana.round(0).astype(int)}, index=test.index)
+        comparativa = analysis.taula_comparativa(test, prediction, columna)
+        nom = nom_fitxer_model(model_name)
+
+        if _grafica_activa(ctx, "prediccio"):
+            grafica(ctx, f"prediccions/prediccio_{nom}.pdf", visual.grafiar_prediccio,
+                    train=train[[columna]], test=test[[columna]], prediction=prediction, model_name=model_name, interval=interval)
+        if _grafica_activa(ctx, "comparativa"):
+            grafica(ctx, f"prediccions/error_{nom}.pdf", visual.grafiar_comparativa,
+                    comparativa=comparativa, columna=columna, model_name=model_name)
+    return etapa
+
+def metriques(ctx):
+    taula_metriques = ctx["metriques"]
+    if not taula_metriques:
+        raise RuntimeError("Cap model ha generat prediccions.")
+    print(pd.DataFrame(taula_metriques))
+    analysis.guardar_taula_metriques(taula_metriques, filepath=os.path.join(ctx["dirs"]["altres"], "metriques.csv"))
+
+def construir_informe(ctx):
+    """
+    Construcció incremental de l'informe de l'execució: genera (en paral·lel) només les gràfiques
+    registrades les dependències de les quals han canviat, copia la resta de la memòria cau i escriu el
+    resum amb les taules d'altres/ i totes les gràfiques a 'informe.html' i 'informe.tex'.
+    """
+    config = ctx["config"]
+    opcions = config["informe"]
+    memoria_cau = informe.MemoriaCauInforme(opcions.get("cache_path") or os.path.join(config["sortida_path"], "cache_informe"))
+
+    inici_temps = time.perf_counter()
+    registres = informe.construir_artefactes(
+        ctx.get("artefactes", []), ctx["dirs"]["imatges"], memoria_cau,
+        prefix_clau=config["nom"], dpi=opcions.get("dpi"), processos=opcions.get("processos"),
+    )
+    ctx["informe"] = registres
+
+    estats = pd.Series([registre["estat"] for registre in registres], dtype=object).value_counts()
+    print(f"Informe: {estats.get('generada', 0)} gràfiques generades, {estats.get('reutilitzada', 0)} reutilitzades "
+          f"({time.perf_counter() - inici_temps:.2f} segons).")
+    for registre in registres:
+        if registre["estat"] != "reutilitzada":
+            print(f" {registre['ruta']}: {registre['estat']} ({registre['motiu']})")
+
+    series = ", ".join(ctx["jerarquia"][0]) if ctx.get("jerarquia") else ctx.get("columna", config["columna"])
+    dades = {"Execució": ctx.get("run_id", ""), "Dataset": config["dataset_path"], "Sèries": series,
+             "m": config["m"], "Freqüència": config["freq"], "Models": ", ".join(ctx["metriques"]) or "cap"}
+    grafiques = [os.path.join("imatges", registre["ruta"]) for registre in registres if registre["estat"] != "error"]
+    ruta_html, _ = informe.escriure_resum(ctx["dirs"]["arrel"], f"Informe de l'execució {config['nom']}", dades,
+                                          informe.llegir_taules(ctx["dirs"]["altres"]), grafiques)
+    print(f"Resum guardat a: {ruta_html}")
+
+    errors = [registre for registre in registres if registre["estat"] == "error"]
+    if errors:
+        raise RuntimeError(f"No s'han pogut generar {len(errors)} gràfiques: {', '.join(registre['ruta'] for registre in errors)}")
@@ -0,0 +1,207 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from . import etapes, jerarquic
+from .config import carregar_config, hash_config
+from .dag import Etapa, executar_dag
+
+def preparar_directoris(execucio):
+    """
+    Crea el directori propi de l'execució amb els subdirectoris d'imatges, taules i models.
+
+    Parameters:
+        execucio (dict): Configuració completa ('config' i 'seccions').
+
+    Returns:
+        str, dict: Identificador de l'execució i diccionari de directoris.
+    """
+    config = execucio["config"]
+    run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{hash_config(execucio)}-{os.getpid()}"
+    arrel = os.path.abspath(os.path.join(config["sortida_path"], config["nom"], run_id))
+
+    dirs = {
+        "arrel": arrel,
+        "imatges": os.path.join(arrel, "imatges"),
+        "altres": os.path.join(arrel, "altres"),
+        "models": os.path.abspath(config["models_path"]) if config.get("models_path") else os.path.join(arrel, "models"),
+    }
+    for path in dirs.values():
+        os.makedirs(path, exist_ok=True)
+
+    return run_id, dirs
+
+def construir_etapes(seccions, config=None):
+    """
+    Construeix el graf d'etapes (càrrega → anàlisi → divisió → [anomalies, exògenes] → ajust → predicció → mètriques → gràfiques → informe).
+
+    Parameters:
+        seccions (dict): Seccions actives de l'execució.
+        config (dict): Configuració; les claus 'anomalies' i 'exogenes' afegeixen les etapes de neteja de
+            l'entrenament i de construcció de les variables exògenes, 'paritat' la comprovació del motor natiu
+            de Holt-Winters amb statsmodels, i els ajustos aïllats ('limits.aillat'),
+            la de publicació de les dades en memòria compartida. Amb 'informe', les gràfiques es construeixen
+            de manera incremental en una etapa final que també escriu el resum de l'execució.
+
+    Returns:
+        list: Llista d'objectes Etapa.
+    """
+    grafiques = seccions.get("grafiques", {})
+    llista = [Etapa("carregar", etapes.carregar)]
+
+    if grafiques.get("serie_temporal"):
+        llista.append(Etapa("grafica_serie", etapes.grafica_serie, ["carregar"]))
+    if seccions.get("descriptiva"):
+        llista.append(Etapa("descriptiva", etapes.descriptiva, ["carregar"]))
+    if seccions.get("descomposicio"):
+        llista.append(Etapa("descomposicio", etapes.descomposicio, ["carregar"]))
+        if seccions.get("soroll_blanc"):
+            llista.append(Etapa("soroll_blanc", etapes.soroll_blanc, ["descomposicio"]))
+    if seccions.get("estacionarietat"):
+        llista.append(Etapa("estacionarietat", etapes.estacionarietat, ["carregar"]))
+
+    llista.append(Etapa("dividir", etapes.dividir, ["carregar"]))
+    # Els models s'ajusten amb l'entrenament ja net i les variables exògenes, que es comparteixen entre tots
+    previes = ["dividir"]
+    if (config or {}).get("anomalies"):
+        llista.append(Etapa("anomalies", etapes.anomalies, ["dividir"]))
+        previes = previes + ["anomalies"]
+    if (config or {}).get("exogenes"):
+        llista.append(Etapa("exogenes", etapes.exogenes, ["dividir"]))
+        previes = previes + ["exogenes"]
+    if etapes.distribuir_dades(config or {}):
+        llista.append(Etapa("compartir", etapes.compartir_dades, previes))
+        previes = previes + ["compartir"]
+
+    prediccions = []
+    for model_name, actiu in seccions.get("models", {}).items():
+        if not actiu:
+            continue
+        if model_name == "Ensemble":
+            # L'ensemble espera els membres (i les seues prediccions) encara que algun falle
+            membres = [f"predir:{nom}" for nom, membre_actiu in seccions["models"].items() if membre_actiu and nom != "Ensemble"]
+            llista.append(Etapa("ajustar:Ensemble", etapes.ajustar_ensemble, previes, opcionals=membres))
+        else:
+            llista.append(Etapa(f"ajustar:{model_name}", etapes.ajustar(model_name), previes))
+        if model_name == "Holt-Winters natiu" and (config or {}).get("paritat"):
+            llista.append(Etapa(f"paritat:{model_name}", etapes.paritat(model_name), [f"ajustar:{model_name}"]))
+        llista.append(Etapa(f"predir:{model_name}", etapes.predir(model_name), [f"ajustar:{model_name}"]))
+        if grafiques.get("prediccio") or grafiques.get("comparativa"):
+            llista.append(Etapa(f"grafiques:{model_name}", etapes.grafiques_model(model_name), [f"predir:{model_name}"]))
+        prediccions.append(f"predir:{model_name}")
+
+    if seccions.get("metriques") and prediccions:
+        llista.append(Etapa("metriques", etapes.metriques, opcionals=prediccions))
+    if (config or {}).get("informe"):
+        # L'informe espera totes les etapes (també les que fallen) per incloure les taules i gràfiques disponibles
+        llista.append(Etapa("informe", etapes.construir_informe, opcionals=[etapa.nom for etapa in llista]))
+
+    return llista
+
+def executar(execucio, treballadors=4):
+    """
+    Executa una configuració completa en un directori de sortida propi.
+
+    Parameters:
+        execucio (dict | str): Configuració completa o ruta d'un fitxer JSON.
+        treballadors (int): Nombre d'etapes que es poden executar alhora.
+
+    Returns:
+        dict: Manifest de l'execució (identificador, directoris, temps i errors per etapa i fallades d'ajust).
+    """
+    if isinstance(execucio, str):
+        execucio = carregar_config(execucio)
+
+    run_id, dirs = preparar_directoris(execucio)
+    config = dict(execucio["config"], graphics_path=dirs["imatges"], others_path=dirs["altres"])
+    seccions = execucio["seccions"]
+
+    print("=" * 50)
+    print(f"EXECUCIÓ {config['nom']} ({run_id})")
+    print(f"Directori de sortida: {dirs['arrel']}")
+    print("=" * 50)
+
+    ctx = {
+        "config": config,
+        "seccions": seccions,
+        "dirs": dirs,
+        "run_id": run_id,
+        "models": {},
+        "intervals": {},
+        "metriques": {},
+        "ajustos": [],
+        "fallades": [],
+        "monitor": [],
+        "paritat": [],
+        "artefactes": [],
+        "informe": [],
+        "cancellacio": threading.Event(),
+    }
+
+    # Passat el temps màxim de l'execució, els ajustos en curs s'aturen a la següent comprovació
+    temps_execucio = (config.get("limits") or {}).get("temps_execucio")
+    temporitzador = threading.Timer(temps_execucio, ctx["cancellacio"].set) if temps_execucio else None
+    if temporitzador is not None:
+        temporitzador.daemon = True
+        temporitzador.start()
+
+    inici_temps = time.perf_counter()
+    if config.get("jerarquia"):
+        llista_etapes = jerarquic.construir_etapes(seccions, config)
+    else:
+        llista_etapes = construir_etapes(seccions, config)
+    try:
+        resultat = executar_dag(llista_etapes, ctx, treballadors=treballadors)
+    finally:
+        if temporitzador is not None:
+            temporitzador.cancel()
+        for clau in ("dades_compartides", "exogenes_compartides"):
+            if ctx.get(clau) is not None:
+                ctx[clau].tancar()
+
+    manifest = {
+        "run_id": run_id,
+        "execucio": execucio,
+        "dirs": dirs,
+        "temps_total": time.perf_counter() - inici_temps,
+        **resultat,
+        "ajustos": ctx["ajustos"],
+        "fallades": [fallada.a_dict() for fallada in ctx["fallades"]],
+        "monitor": ctx["monitor"],
+        "paritat": ctx["paritat"],
+        "informe": ctx["informe"],
+    }
+    with open(os.path.join(dirs["arrel"], "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False, default=str)
+
+    if ctx["fallades"]:
+        print("=" * 50)
+        print(f"AJUSTOS I CANDIDATS FALLITS ({len(ctx['fallades'])})")
+        for fallada in ctx["fallades"]:
+            candidat = f" [{fallada.candidat}]" if fallada.candidat else ""
+            print(f" {fallada.model} ({fallada.serie}){candidat}: {fallada.tipus} - {fallada.missatge}")
+
+    print("=" * 50)
+    print(f"Execució {run_id} completada en {manifest['temps_total']:.2f} segons ({len(resultat['errors'])} errors).")
+    print("=" * 50)
+    return manifest
+
+def executar_configs(execucions, processos=None, treballadors=4):
+    """
+    Executa diverses configuracions alhora, cadascuna en un procés independent.
+
+    Parameters:
+        execucions (list): Configuracions completes o rutes de fitxers JSON.
+        processos (int): Nombre màxim de processos (per defecte, un per configuració).
+        treballadors (int): Etapes simultànies dins de cada execució.
+
+    Returns:
+        list: Manifests de les execucions, en el mateix ordre.
+    """
+    if len(execucions) == 1:
+        return [executar(execucions[0], treballadors)]
+
+    with ProcessPoolExecutor(max_workers=processos or len(execucions)) as executor:
+        futurs = [executor.submit(executar, execucio, treballadors) for execucio in execucions]
+        return [futur.result() for futur in futurs]
@@ -0,0 +1,174 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from utils import analysis, preprocessing as prep
+from models import obtindre_prediccio_interval, ajustar_holt_winters_lot, LimitsAjust, RegistreFallada
+from models.jerarquic import estructura_jerarquia, reconciliar, metriques_jerarquia
+from models.residus import residus_model
+from . import etapes
+from .dag import Etapa
+
+def carregar(ctx):
+    config = ctx["config"]
+    noms, S, nivells = estructura_jerarquia(config["jerarquia"])
+    dades = prep.carregar_dades(config["dataset_path"], freq=config["freq"])
+    etapes.guardar_covariables(ctx, dades)
+
+    falten = [node for node in noms if node not in dades.columns]
+    if falten:
+        raise ValueError(f"Les columnes {falten} de la jerarquia no existeixen al dataset.")
+
+    dades = prep.filtrar_dades(dades[noms], config)
+    n_agregats = len(noms) - S.shape[1]
+    incoherencia = np.max(np.abs(S @ dades[noms[n_agregats:]].to_numpy().T - dades[noms].to_numpy().T))
+    print(f"Jerarquia amb {len(noms)} nodes ({n_agregats} agregats). Incoherència màxima a les dades: {incoherencia:.2f}")
+
+    ctx["dades"] = dades
+    ctx["jerarquia"] = (noms, S, nivells)
+    ctx["base"] = {}
+    ctx["reconciliades"] = {}
+
+def dividir(ctx):
+    ctx["train"], ctx["test"] = prep.dividir_dades(ctx["dades"], proporcio=ctx["config"]["proporcio_train"])
+
+def anomalies(ctx):
+    # La detecció es fa sobre tots els nodes alhora; només es winsoritzen les sèries de base i els
+    # agregats es tornen a sumar perquè l'entrenament continue sent coherent
+    noms, S, _ = ctx["jerarquia"]
+    netes = etapes.netejar_train(ctx, noms)
+    if ctx["config"]["anomalies"].get("winsoritzar", True):
+        base = netes[noms[len(noms) - S.shape[1]:]].to_numpy()
+        train = ctx["train"].copy()
+        train[noms] = base @ S.T
+        ctx["train"] = train
+
+def _necessita_residus(config):
+    return config.get("reconciliacio", "mint") in ("wls", "mint")
+
+def ajustar_node(model_name, node):
+    def etapa(ctx):
+        config, test = ctx["config"], ctx["test"]
+        train = ctx["train"][[node]]
+        model = etapes.ajustar_o_carregar(ctx, model_name, train, node)
+
+        X = etapes.exogenes_model(ctx, model_name, test.index)
+        interval = obtindre_prediccio_interval(config)[model_name](
+            model, len(test), config["freq"], test.index, **({} if X is None else {"X": X})
+        )
+
+        residus = None
+        if _necessita_residus(config):
+            residus = ctx.get("residus_monitor", {}).get((model_name, node))
+            if residus is None:
+                residus = residus_model(model, train, descartar=config["m"] + 1)
+        ctx["base"].setdefault(model_name, {})[node] = (interval, residus)
+    return etapa
+
+def ajustar_lot(model_name):
+    # El motor natiu de Holt-Winters ajusta tots els nodes en una sola crida vectoritzada (sense desar-los)
+    def etapa(ctx):
+        config, train, test = ctx["config"], ctx["train"], ctx["test"]
+        noms, _, _ = ctx["jerarquia"]
+        limits = LimitsAjust.des_de_config(config, ctx.get("cancellacio"))
+        try:
+            estats = ajustar_holt_winters_lot(train[noms], seasonal="add", seasonal_periods=config["m"], limits=limits)
+        except Exception as e:
+            etapes.registrar_fallades(ctx, model_name, ", ".join(noms), [RegistreFallada.des_de_error(e, durada=time.perf_counter() - limits.inici_model)])
+            raise
+        etapes.registrar_ajust(ctx, model_name, ", ".join(noms), len(train), time.perf_counter() - limits.inici_model, series=len(noms))
+
+        ctx.setdefault("estats_lot", {})[model_name] = estats
+        prediccio = obtindre_prediccio_interval(config)[model_name]
+        for node, estat in estats.items():
+            interval = prediccio(estat, len(test), config["freq"], test.index)
+            residus = residus_model(estat, train[[node]], descartar=config["m"] + 1) if _necessita_residus(config) else None
+            ctx["base"].setdefault(model_name, {})[node] = (interval, residus)
+    return etapa
+
+def paritat_lot(model_name):
+    def etapa(ctx):
+        etapes.registrar_paritat(ctx, model_name, ctx["estats_lot"][model_name], ctx["train"])
+    return etapa
+
+def reconciliar_model(model_name):
+    def etapa(ctx):
+        config, test = ctx["config"], ctx["test"]
+        noms, S, nivells = ctx["jerarquia"]
+        base = ctx["base"][model_name]
+        metode = config.get("reconciliacio", "mint")
+
+        prediccions = np.vstack([base[node][0].mitjana for node in noms])
+        residus = np.column_stack([base[node][1] for node in noms]) if _necessita_residus(config) else None
+        reconciliades = reconciliar(prediccions, S, metode, residus)
+
+        prediccions_base = pd.DataFrame(prediccions.T, index=test.index, columns=noms)
+        ctx["reconciliades"][model_name] = pd.DataFrame(reconciliades.T, index=test.index, columns=noms)
+
+        taules = []
+        for nom_prediccio, taula_prediccions in (("base", prediccions_base), (metode, ctx["reconciliades"][model_name])):
+            taula = metriques_jerarquia(test[noms], taula_prediccions, nivells, analysis.calcular_metriques)
+            taula.insert(0, "prediccio", nom_prediccio)
+            taula.insert(0, "model", model_name)
+            taules.append(taula)
+        ctx["metriques"][model_name] = pd.concat(taules, ignore_index=True)
+    return etapa
+
+def metriques(ctx):
+    if not ctx["metriques"]:
+        raise RuntimeError("Cap model ha generat prediccions.")
+    taula = pd.concat(ctx["metriques"].values(), ignore_index=True)
+    print(taula.to_string(index=False, float_format="%.2f"))
+
+    filepath = os.path.join(ctx["dirs"]["altres"], "metriques_jerarquiques.csv")
+    taula.to_csv(filepath, index=False, float_format="%.2f")
+    for model_name, reconciliades in ctx["reconciliades"].items():
+        reconciliades.to_csv(os.path.join(ctx["dirs"]["altres"], f"reconciliades_{etapes.nom_fitxer_model(model_name)}.csv"), float_format="%.2f")
+
+def construir_etapes(seccions, config):
+    """
+    Construeix el graf d'etapes del mode jeràrquic: cada node de la jerarquia s'ajusta en una etapa
+    independent i, per a cada model, la reconciliació espera totes les prediccions de base. Les variables
+    exògenes, si n'hi ha, es construeixen una sola vegada i les comparteixen tots els nodes.
+
+    Parameters:
+        seccions (dict): Seccions actives de l'execució.
+        config (dict): Configuració amb la clau 'jerarquia'.
+
+    Returns:
+        list: Llista d'objectes Etapa.
+    """
+    noms, _, _ = estructura_jerarquia(config["jerarquia"])
+    llista = [Etapa("carregar", carregar), Etapa("dividir", dividir, ["carregar"])]
+    previes = ["dividir"]
+    if config.get("anomalies"):
+        llista.append(Etapa("anomalies", anomalies, ["dividir"]))
+        previes = previes + ["anomalies"]
+    if config.get("exogenes"):
+        llista.append(Etapa("exogenes", etapes.exogenes, ["dividir"]))
+        previes = previes + ["exogenes"]
+    if etapes.distribuir_dades(config):
+        llista.append(Etapa("compartir", etapes.compartir_dades, previes))
+        previes = previes + ["compartir"]
+
+    reconciliacions = []
+    for model_name, actiu in seccions.get("models", {}).items():
+        if not actiu or model_name == "Ensemble":
+            continue
+        if model_name == "Holt-Winters natiu":
+            nodes = [f"ajustar:{model_name}"]
+            llista.append(Etapa(nodes[0], ajustar_lot(model_name), previes))
+            if config.get("paritat"):
+                llista.append(Etapa(f"paritat:{model_name}", paritat_lot(model_name), nodes))
+        else:
+            nodes = [f"ajustar:{model_name}:{node}" for node in noms]
+            llista.extend(Etapa(nom, ajustar_node(model_name, node), previes) for nom, node in zip(nodes, noms))
+        llista.append(Etapa(f"reconciliar:{model_name}", reconciliar_model(model_name), nodes))
+        reconciliacions.append(f"reconciliar:{model_name}")
+
+    if reconciliacions:
+        llista.append(Etapa("metriques", metriques, opcionals=reconciliacions))
+    if config.get("informe"):
+        llista.append(Etapa("informe", etapes.construir_informe, opcionals=[etapa.nom for etapa in llista]))
+
+    return llista
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from utils import analysis
+from models import compactar_model
+from models.estat import EstatProphet
+from models.residus import residus_model
+
+OPCIONS_PER_DEFECTE = {"llindar": 1.5, "finestra": 12}
+
+# El fitxer d'historial és compartit per totes les etapes (i execucions) que usen el mateix directori de models
+_BLOQUEIG_HISTORIAL = threading.Lock()
+
+def errors_un_pas(estat, valors):
+    """
+    Errors de predicció a un pas de les noves observacions, sense reajustar el model.
+
+    Per a cada observació es prediu el període següent i després s'incorpora a l'estat compacte
+    (filtre de Kalman o recursions de Holt-Winters). Prophet no té estat recursiu: la predicció de
+    tot el tram es fa d'una vegada.
+
+    Parameters:
+        estat (EstatModel): Estat compacte al final de l'entrenament del model (es modifica).
+        valors (np.ndarray): Noves observacions.
+
+    Returns:
+        np.ndarray, np.ndarray: Prediccions i errors (real - predicció), un per observació.
+    """
+    valors = np.asarray(valors, dtype=np.float64).ravel()
+    if isinstance(estat, EstatProphet):
+        prediccions = estat.forecast(len(valors)).to_numpy()
+        estat.actualitzar(valors)
+    else:
+        prediccions = np.empty(len(valors))
+        for i, y in enumerate(valors):
+            prediccions[i] = estat.forecast(1).iloc[0]
+            estat.actualitzar([y])
+    return prediccions, valors - prediccions
+
+def avaluar_deriva(model, train, n_model, opcions=None, descartar=0):
+    """
+    Avalua un model desat amb les observacions arribades després del seu entrenament.
+
+    L'estadístic de deriva és el quocient entre l'error absolut mitjà a un pas de les darreres
+    `finestra` observacions noves i l'error absolut mitjà dels residus dins la mostra del model:
+    un model que continua ajustant-se bé té un quocient proper a 1.
+
+    Parameters:
+        model: Model complet desat.
+        train (pd.DataFrame): Entrenament actual (les primeres `n_model` observacions són les del model).
+        n_model (int): Nombre d'observacions amb què es va ajustar el model.
+        opcions (dict): 'llindar' (quocient a partir del qual hi ha deriva) i 'finestra' (observacions recents avaluades).
+        descartar (int): Residus inicials que no compten per a l'error de referència.
+
+    Returns:
+        dict, EstatModel, np.ndarray: Estadístiques, estat actualitzat fins al final de `train` i residus
+            de tot l'entrenament (dins la mostra fins a `n_model` i errors a un pas després).
+            Llança TypeError o NotImplementedError si el model no té estat compacte.
+    """
+    opcions = {**OPCIONS_PER_DEFECTE, **(opcions or {})}
+    estat = compactar_model(model)
+    anteriors, noves = train.iloc[:n_model], train.iloc[n_model:]
+
+    residus = residus_model(model, anteriors, descartar=descartar)
+    _, errors = errors_un_pas(estat, noves.to_numpy())
+
+    finestra = min(int(opcions["finestra"]), len(errors))
+    real = noves.iloc[-finestra:, 0]
+    metriques = analysis.calcular_metriques(real, real - errors[-finestra:])
+    referencia = float(np.nanmean(np.abs(residus)))
+    recent = float(np.mean(np.abs(errors[-finestra:])))
+    rati = recent / referencia if referencia > 0 else np.inf
+
+    estadistiques = {
+        "n_model": int(n_model),
+        "n_noves": len(errors),
+        "finestra": finestra,
+        "mae_referencia": referencia,
+        "mae_recent": recent,
+        "rati": rati,
+        # Error mitjà amb signe relatiu a la referència: positiu si el model es queda curt de manera sistemàtica
+        "biaix": float(np.mean(errors[-finestra:]) / referencia) if referencia > 0 else np.nan,
+        "RMSE": float(metriques["RMSE"]),
+        "MAPE": float(metriques["MAPE"]),
+        "deriva": bool(rati > opcions["llindar"]),
+    }
+    return estadistiques, estat, np.concatenate([residus, errors])
+
+def registrar_avaluacio(ruta, registre):
+    """
+    Afegeix una avaluació a l'historial CSV del monitor (una fila per avaluació, sèrie i model).
+    """
+    fila = pd.DataFrame([registre])
+    with _BLOQUEIG_HISTORIAL:
+        nou = not os.path.exists(ruta)
+        fila.to_csv(ruta, mode="a", header=nou, index=False, float_format="%.6g")
+
+def historial_monitor(ruta, finestra=5):
+    """
+    Estadístiques mòbils de l'historial del monitor per sèrie i model.
+
+    Parameters:
+        ruta (str): Fitxer CSV de l'historial.
+        finestra (int): Nombre d'avaluacions recents que es resumeixen.
+
+    Returns:
+        pd.DataFrame: Per a cada (dataset, sèrie, model): avaluacions, quocient darrer i mitjà,
+            MAPE mitjà i nombre de derives a les darreres `finestra` avaluacions.
+    """
+    if not os.path.exists(ruta):
+        return pd.DataFrame()
+    historial = pd.read_csv(ruta, parse_dates=["data"]).sort_values("data")
+    recents = historial.groupby(["dataset", "serie", "model"]).tail(finestra).groupby(["dataset", "serie", "model"])
+    return pd.DataFrame({
+        "avaluacions": historial.groupby(["dataset", "serie", "model"]).size(),
+        "rati_darrer": recents["rati"].last(),
+        "rati_mitja": recents["rati"].mean(),
+        "MAPE_mitja": recents["MAPE"].mean(),
+        "derives": recents["deriva"].sum(),
+    })
+
+def registre_avaluacio(config, model_name, columna, estadistiques, accio):
+    return {
+        "data": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "dataset": os.path.splitext(os.path.basename(config["dataset_path"]))[0],
+        "serie": columna,
+        "model": model_name,
+        **estadistiques,
+        "accio": accio,
+    }
@@ -0,0 +1,154 @@
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+from . import etapes, jerarquic
+from .dag import ordenar_etapes
+from .execucio import construir_etapes
+
+def carregar_historial(sortida_path):
+    """
+    Llegeix els manifests de les execucions anteriors d'un directori de sortida.
+
+    Parameters:
+        sortida_path (str): Directori arrel de les execucions (config['sortida_path']).
+
+    Returns:
+        pd.DataFrame, pd.DataFrame: Ajustos completats (model, sèries, n_train, m, freq, durada) i
+            temps de la resta d'etapes (etapa, temps).
+    """
+    ajustos, temps = [], []
+    for ruta in glob.glob(os.path.join(sortida_path, "*", "*", "manifest.json")):
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        ajustos.extend(manifest.get("ajustos", []))
+        # El temps de les etapes d'ajust depén de si el model estava desat; s'estima a partir dels ajustos
+        temps.extend(
+            {"etapa": etapa, "temps": segons} for etapa, segons in manifest.get("temps", {}).items()
+            if not etapa.startswith("ajustar:")
+        )
+
+    ajustos = pd.DataFrame(ajustos, columns=["model", "serie", "series", "n_train", "m", "freq", "durada"])
+    ajustos["series"] = ajustos["series"].fillna(1)
+    return ajustos, pd.DataFrame(temps, columns=["etapa", "temps"])
+
+def estimar_ajust(ajustos, model_name, n_train, m, series=1):
+    """
+    Estima la durada d'un ajust com la mediana del temps per observació dels ajustos anteriors del
+    mateix model (amb el mateix m, si n'hi ha) multiplicada per les observacions de l'ajust nou.
+
+    Returns:
+        float, int: Segons estimats (NaN sense historial) i nombre d'ajustos anteriors utilitzats.
+    """
+    anteriors = ajustos[ajustos["model"] == model_name]
+    if (anteriors["m"] == m).any():
+        anteriors = anteriors[anteriors["m"] == m]
+    if anteriors.empty:
+        return np.nan, 0
+    per_observacio = anteriors["durada"] / (anteriors["n_train"] * anteriors["series"])
+    return float(per_observacio.median() * n_train * series), len(anteriors)
+
+def _ajustos_etapa(nom, ctx):
+    """
+    Model, sèries i nombre de sèries que ajusta una etapa 'ajustar:...', o None si no ajusta res.
+    """
+    parts = nom.split(":")
+    if parts[0] != "ajustar" or parts[1] == "Ensemble":
+        return None
+    if len(parts) == 3:
+        return parts[1], parts[2], 1
+    if ctx["config"].get("jerarquia"):
+        noms, _, _ = ctx["jerarquia"]
+        return parts[1], ", ".join(noms), len(noms)
+    return parts[1], ctx["columna"], 1
+
+def _cami_critic(llista_etapes, durades):
+    # Temps mínim amb treballadors il·limitats: el camí més llarg del graf (en ordre topològic)
+    per_nom = {etapa.nom: etapa for etapa in llista_etapes}
+    final = {}
+    for nom in ordenar_etapes(llista_etapes):
+        etapa = per_nom[nom]
+        previes = [final[dep] for dep in (*etapa.dependencies, *etapa.opcionals) if dep in final]
+        final[etapa.nom] = max(previes, default=0.0) + durades.get(etapa.nom, 0.0)
+    return max(final.values(), default=0.0)
+
+def planificar(execucio, treballadors=4, historial=None):
+    """
+    Estima el nombre d'ajustos i la durada d'una execució sense executar-la.
+
+    Només es carreguen i es divideixen les dades (per conéixer la mida de l'entrenament i quins models
+    ja estan desats). La durada de cada ajust s'estima amb `estimar_ajust` i la de la resta d'etapes amb
+    la mediana de les execucions anteriors; el temps total és el màxim entre el camí crític del graf i
+    la suma de temps repartida entre els treballadors.
+
+    Parameters:
+        execucio (dict): Configuració completa ('config' i 'seccions').
+        treballadors (int): Nombre d'etapes que s'executarien alhora.
+        historial (tuple): Resultat de `carregar_historial` (per defecte, el del directori de sortida de la configuració).
+
+    Returns:
+        dict: Ajustos previstos, desats i sense historial, taula per etapa i temps estimat.
+    """
+    config, seccions = execucio["config"], execucio["seccions"]
+    ajustos, temps = historial if historial is not None else carregar_historial(config["sortida_path"])
+
+    # Sense models_path els models es desen dins del directori de cada execució i mai no es reutilitzen
+    models_path = os.path.abspath(config["models_path"]) if config.get("models_path") else None
+    ctx = {"config": config, "seccions": seccions, "dirs": {"models": models_path}}
+    modul = jerarquic if config.get("jerarquia") else etapes
+    modul.carregar(ctx)
+    modul.dividir(ctx)
+    n_train = len(ctx["train"])
+
+    construir = jerarquic.construir_etapes if config.get("jerarquia") else construir_etapes
+    llista_etapes = construir(seccions, config)
+    files, durades = [], {}
+    for etapa in llista_etapes:
+        ajust = _ajustos_etapa(etapa.nom, ctx)
+        if ajust is None:
+            anteriors = temps.loc[temps["etapa"] == etapa.nom, "temps"]
+            durada, mostres = (float(anteriors.median()), len(anteriors)) if len(anteriors) else (np.nan, 0)
+            files.append({"etapa": etapa.nom, "ajustos": 0, "desats": 0, "temps": durada, "mostres": mostres})
+        else:
+            model_name, serie, series = ajust
+            # El lot natiu de Holt-Winters no es desa mai
+            desat = series == 1 and models_path is not None and os.path.exists(etapes.ruta_model(ctx, model_name, serie, n_train))
+            durada, mostres = (0.0, 0) if desat else estimar_ajust(ajustos, model_name, n_train, config["m"], series)
+            files.append({"etapa": etapa.nom, "ajustos": series, "desats": series if desat else 0, "temps": durada, "mostres": mostres})
+        durades[etapa.nom] = 0.0 if np.isnan(files[-1]["temps"]) else files[-1]["temps"]
+
+    taula = pd.DataFrame(files).set_index("etapa")
+    pendents = taula[(taula["ajustos"] > taula["desats"])]
+    suma = sum(durades.values())
+    return {
+        "nom": config["nom"],
+        "ajustos": int(taula["ajustos"].sum()),
+        "desats": int(taula["desats"].sum()),
+        "sense_historial": pendents.index[pendents["mostres"] == 0].tolist(),
+        "taula": taula,
+        "temps_sequencial": suma,
+        "temps_estimat": max(_cami_critic(llista_etapes, durades), suma / max(1, treballadors)),
+    }
+
+def mostrar_plan(plans):
+    """
+    Mostra el resum dels plans de diverses execucions i el total.
+    """
+    for plan in plans:
+        print("=" * 50)
+        print(f"PLA DE L'EXECUCIÓ {plan['nom']}")
+        print("=" * 50)
+        print(plan["taula"].to_string(float_format=lambda valor: f"{valor:.2f}"))
+        print(f"Ajustos: {plan['ajustos']} ({plan['desats']} ja desats, {plan['ajustos'] - plan['desats']} per entrenar)")
+        if plan["sense_historial"]:
+            print(f"Sense temps anteriors (no compten a l'estimació): {', '.join(plan['sense_historial'])}")
+        print(f"Temps estimat: {plan['temps_estimat']:.1f} segons ({plan['temps_sequencial']:.1f} segons en sèrie)")
+
+    print("=" * 50)
+    print(f"TOTAL: {sum(plan['ajustos'] - plan['desats'] for plan in plans)} ajustos per entrenar, "
+          f"{sum(plan['temps_estimat'] for plan in plans):.1f} segons estimats (execucions consecutives)")
+    print("=" * 50)
@@ -96,16 +96,17 @@ def diferenciar_serie(data, m=1, d=0, D=0):
 
     return df_dif
 
-def calcular_metriques(real, prediccio):
+def calcular_metriques(real, prediccio, interval=None):
     """
     Calcula les mètriques d'error entre els valors reals i les prediccions.
 
     Parameters:
         real (pd.Series): Valors reals.
         prediccio (pd.Series): Prediccions.
+        interval (PrediccioInterval): Intervals de predicció (opcional).
 
     Returns:
-        dict: Diccionari amb RMSE i MAPE.
+        dict: Diccionari amb RMSE, MAPE i, si hi ha intervals, la cobertura i l'amplada per nivell.
     """
     # Comprovar que les sèries tenen la mateixa longitud
     if len(real) != len(prediccio):
@@ -114,7 +115,34 @@ def calcular_metriques(real, prediccio):
     rmse = np.sqrt(np.mean((real - prediccio) ** 2))
     mape = np.mean(np.abs((real - prediccio) / real)) * 100
 
-    return {"RMSE": rmse, "MAPE": mape}
+    metriques = {"RMSE": rmse, "MAPE": mape}
+    if interval is not None:
+        metriques.update(cobertura_intervals(real, interval))
+
+    return metriques
+
+def cobertura_intervals(real, interval):
+    """
+    Calcula la cobertura empírica i l'amplada mitjana de cada interval de predicció.
+
+    Parameters:
+        real (pd.Series): Valors reals.
+        interval (PrediccioInterval): Intervals de predicció.
+
+    Returns:
+        dict: Cobertura (%) i amplada mitjana per a cada nivell.
+    """
+    real = np.asarray(real, dtype=np.float64)
+    if len(real) != len(interval):
+        raise ValueError("Les sèries real i interval han de tindre la mateixa longitud.")
+
+    resultat = {}
+    for nivell in interval.nivells:
+        inferior, superior = interval.interval(nivell)
+        resultat[f"Cobertura {nivell:.0%}"] = np.mean((real >= inferior) & (real <= superior)) * 100
+        resultat[f"Amplada {nivell:.0%}"] = np.mean(superior - inferior)
+
+    return resultat
 
 def guardar_taula_metriques(metriques, filepath="tex/altres/metriques.csv"):
     """
@@ -129,7 +157,6 @@ def guardar_taula_metriques(metriques, filepath="tex/altres/metriques.csv"):
     """
     # Convertir les mètriques a DataFrame
     df = pd.DataFrame(metriques).T
-    df.columns = ["RMSE", "MAPE"]
 
     # Desa el resultat com a CSV
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
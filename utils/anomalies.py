@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+
+# Constant que fa la MAD comparable amb la desviació típica d'una normal
+CONSTANT_MAD = 0.6745
+
+def _mitjana_mobil_centrada(valors, m):
+    """
+    Mitjana mòbil centrada de cada columna (2×m si m és parell, m si és senar).
+
+    Als extrems la finestra es retalla i es normalitza amb els pesos disponibles, de manera que
+    la tendència també s'estima per a les primeres i les últimes observacions.
+    """
+    if m % 2 == 0:
+        pesos = np.r_[0.5, np.ones(m - 1), 0.5] / m
+    else:
+        pesos = np.ones(m) / m
+    meitat = len(pesos) // 2
+
+    presents = ~np.isnan(valors)
+    valors = np.where(presents, valors, 0.0)
+    suma = np.zeros_like(valors)
+    normalitzacio = np.zeros_like(valors)
+    n = len(valors)
+    for k, pes in enumerate(pesos):
+        desplacament = k - meitat
+        origen = slice(max(0, desplacament), n + min(0, desplacament))
+        desti = slice(max(0, -desplacament), n - max(0, desplacament))
+        suma[desti] += pes * valors[origen]
+        normalitzacio[desti] += pes * presents[origen]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return suma / normalitzacio
+
+def residus_descomposicio(valors, m):
+    """
+    Residus d'una descomposició additiva clàssica calculada alhora per a totes les sèries.
+
+    La tendència és la mitjana mòbil centrada i l'estacionalitat, la mediana de cada fase de la
+    sèrie sense tendència (robusta davant dels mateixos valors anòmals que es volen detectar).
+
+    Parameters:
+        valors (np.ndarray): Matriu (observacions, sèries).
+        m (int): Període estacional (1 si no n'hi ha).
+
+    Returns:
+        np.ndarray: Residus amb la mateixa forma que `valors`.
+    """
+    valors = np.asarray(valors, dtype=np.float64)
+    if valors.ndim == 1:
+        return residus_descomposicio(valors[:, np.newaxis], m)[:, 0]
+
+    periode = max(int(m), 2)
+    if len(valors) < 2 * periode:
+        raise ValueError(f"Calen almenys {2 * periode} observacions per descompondre les sèries (n'hi ha {len(valors)}).")
+
+    sense_tendencia = valors - _mitjana_mobil_centrada(valors, periode)
+    if m <= 1:
+        return sense_tendencia - np.nanmedian(sense_tendencia, axis=0)
+
+    n, series = valors.shape
+    cicles = -(-n // m)
+    fases = np.full((cicles * m, series), np.nan)
+    fases[:n] = sense_tendencia
+    estacional = np.nanmedian(fases.reshape(cicles, m, series), axis=0)
+    estacional -= estacional.mean(axis=0)
+    return sense_tendencia - np.tile(estacional, (cicles, 1))[:n]
+
+def puntuacions_robustes(residus):
+    """
+    Puntuacions z robustes de cada residu: 0.6745·(r - mediana) / MAD, per columnes.
+
+    Si una sèrie té MAD nul·la (més de la meitat de residus iguals), s'usa la desviació absoluta mitjana.
+
+    Parameters:
+        residus (np.ndarray): Matriu (observacions, sèries) o vector; els NaN s'ignoren.
+
+    Returns:
+        np.ndarray: Puntuacions amb la mateixa forma que `residus` (NaN on el residu és NaN).
+    """
+    residus = np.asarray(residus, dtype=np.float64)
+    mediana = np.nanmedian(residus, axis=0)
+    desviacio = np.abs(residus - mediana)
+    escala = np.nanmedian(desviacio, axis=0) / CONSTANT_MAD
+    alternativa = np.nanmean(desviacio, axis=0) * np.sqrt(np.pi / 2)
+    escala = np.where(escala > 0, escala, alternativa)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(escala > 0, (residus - mediana) / escala, 0.0)
+
+def detectar_anomalies(dades, m=1, llindar=3.5, residus=None):
+    """
+    Marca els punts anòmals de totes les columnes de `dades` segons la puntuació z robusta dels residus.
+
+    Parameters:
+        dades (pd.DataFrame): Sèries (una per columna) amb índex de dates.
+        m (int): Període estacional de la descomposició.
+        llindar (float): Puntuació absoluta a partir de la qual un punt és anòmal.
+        residus (np.ndarray): Residus ja calculats (per exemple, d'un model ajustat); per defecte, els de la descomposició.
+
+    Returns:
+        pd.DataFrame, pd.DataFrame, np.ndarray: Màscara d'anomalies, puntuacions i residus.
+    """
+    valors = dades.to_numpy(dtype=np.float64)
+    if residus is None:
+        residus = residus_descomposicio(valors, m)
+    residus = np.asarray(residus, dtype=np.float64).reshape(valors.shape)
+    puntuacions = puntuacions_robustes(residus)
+    with np.errstate(invalid="ignore"):
+        mascara = np.abs(puntuacions) > llindar
+    return (
+        pd.DataFrame(mascara, index=dades.index, columns=dades.columns),
+        pd.DataFrame(puntuacions, index=dades.index, columns=dades.columns),
+        residus,
+    )
+
+def winsoritzar(dades, puntuacions, residus, llindar=3.5, retall=None):
+    """
+    Retalla els residus dels punts anòmals i reconstrueix la sèrie: y - r + r_retallat.
+
+    Parameters:
+        dades (pd.DataFrame): Sèries originals.
+        puntuacions (pd.DataFrame): Puntuacions z robustes (de `detectar_anomalies`).
+        residus (np.ndarray): Residus amb què s'han calculat les puntuacions.
+        llindar (float): Puntuació a partir de la qual un punt és anòmal.
+        retall (float): Puntuació que prenen els punts anòmals (per defecte, el llindar, que és la
+            winsorització clàssica; amb 0 el punt es substitueix pel valor de la descomposició).
+
+    Returns:
+        pd.DataFrame: Sèries amb els punts anòmals substituïts.
+    """
+    retall = llindar if retall is None else retall
+    z = puntuacions.to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        factor = np.where(np.abs(z) > llindar, retall / np.abs(z), 1.0)
+    # Escalar la distància a la mediana pel factor deixa la puntuació exactament en el retall
+    centrats = residus - np.nanmedian(residus, axis=0)
+    return dades + np.nan_to_num(centrats * (factor - 1.0))
+
+def resum_anomalies(mascara, puntuacions, dades):
+    """
+    Taula amb una fila per punt anòmal: data, sèrie, valor observat i puntuació.
+    """
+    files, columnes = np.nonzero(mascara.to_numpy())
+    return pd.DataFrame({
+        "data": mascara.index[files],
+        "serie": mascara.columns[columnes],
+        "valor": dades.to_numpy()[files, columnes],
+        "puntuacio": puntuacions.to_numpy()[files, columnes],
+    })
+
+def netejar_anomalies(dades, m=1, llindar=3.5, winsoritzar_punts=True, retall=0.0, logaritmica=None):
+    """
+    Detecta els punts anòmals de totes les sèries alhora i, opcionalment, els winsoritza.
+
+    Parameters:
+        dades (pd.DataFrame): Sèries (una per columna) amb índex de dates.
+        m (int): Període estacional de la descomposició.
+        llindar (float): Puntuació z robusta a partir de la qual un punt és anòmal.
+        winsoritzar_punts (bool): Si és True, els punts anòmals es retallen.
+        retall (float): Puntuació que prenen els punts anòmals retallats. Per defecte 0: el punt pren el
+            valor de la descomposició, que distorsiona menys els ajustos posteriors que retallar fins al llindar.
+        logaritmica (bool): Si és True, la descomposició es fa sobre el logaritme (estacionalitat
+            multiplicativa). Per defecte, només si tots els valors són positius.
+
+    Returns:
+        pd.DataFrame, pd.DataFrame: Sèries netes (o les originals) i taula de punts anòmals.
+    """
+    if logaritmica is None:
+        logaritmica = bool((dades.to_numpy(dtype=np.float64) > 0).all())
+    transformades = np.log(dades.astype(np.float64)) if logaritmica else dades.astype(np.float64)
+
+    mascara, puntuacions, residus = detectar_anomalies(transformades, m, llindar)
+    taula = resum_anomalies(mascara, puntuacions, dades)
+    if not winsoritzar_punts or taula.empty:
+        return dades, taula
+
+    netes = winsoritzar(transformades, puntuacions, residus, llindar, retall)
+    return (np.exp(netes) if logaritmica else netes), taula
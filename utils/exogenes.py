@@ -0,0 +1,207 @@
+import hashlib
+import json
+import threading
+import numpy as np
+import pandas as pd
+from .preprocessing import dies_per_periode
+
+NOMS_DIES = ['dilluns', 'dimarts', 'dimecres', 'dijous', 'divendres', 'dissabte', 'diumenge']
+
+# Les matrius es construeixen una sola vegada per índex, freqüència i especificació, i es comparteixen
+# entre tots els models i sèries de l'execució (les etapes s'executen en fils diferents)
+_CACHE = {}
+_BLOQUEIG_CACHE = threading.Lock()
+
+class MatriuExogenes:
+    """
+    Variables exògenes d'un índex de dates guardades en una única matriu contigua float32
+    de forma (observacions, variables).
+    """
+    __slots__ = ("index", "columnes", "valors")
+
+    def __init__(self, index, columnes, valors):
+        self.index = pd.DatetimeIndex(index)
+        self.columnes = list(columnes)
+        self.valors = np.ascontiguousarray(valors, dtype=np.float32).reshape(len(self.index), len(self.columnes))
+
+    def __len__(self):
+        return len(self.index)
+
+    def mida_bytes(self):
+        return self.valors.nbytes
+
+    def seleccionar(self, index):
+        """
+        Files de la matriu corresponents a les dates de `index`.
+
+        Si les dates són consecutives, el DataFrame retornat és una vista de la matriu (sense còpia).
+
+        Parameters:
+            index (pd.DatetimeIndex): Dates que es volen seleccionar (entrenament o horitzó de predicció).
+
+        Returns:
+            pd.DataFrame: Variables exògenes amb l'índex demanat.
+        """
+        posicions = self.index.get_indexer(index)
+        if len(posicions) and (posicions < 0).any():
+            falten = index[posicions < 0]
+            raise KeyError(f"No hi ha variables exògenes per a {len(falten)} dates (des de {falten[0]}).")
+
+        if len(posicions) and np.array_equal(posicions, np.arange(posicions[0], posicions[0] + len(posicions))):
+            valors = self.valors[posicions[0]:posicions[0] + len(posicions)]
+        else:
+            valors = self.valors[posicions]
+        return pd.DataFrame(valors, index=index, columns=self.columnes, copy=False)
+
+def dates_festius(index, pais):
+    """
+    Dates festives d'un país (paquet `holidays`) dins del rang de l'índex.
+
+    Parameters:
+        index (pd.DatetimeIndex): Índex de dates.
+        pais (str): Codi del país (per exemple, 'ES').
+
+    Returns:
+        np.ndarray: Dates festives com a `datetime64[D]`.
+    """
+    import holidays
+
+    anys = range(index.min().year - 1, index.max().year + 2)
+    return np.array(sorted(holidays.country_holidays(pais, years=anys)), dtype="datetime64[D]")
+
+def variables_calendari(index, freq, festius=None):
+    """
+    Variables de calendari segons la freqüència de la sèrie.
+
+    - Dades diàries (o més freqüents): un indicador per a cada dia de la setmana (diumenge és la referència)
+      i, si s'indiquen festius, un indicador de dia festiu.
+    - Dades setmanals o menys freqüents: nombre de dies del període, nombre de dies laborables
+      (descomptant els festius, si n'hi ha) i nombre de festius.
+
+    Parameters:
+        index (pd.DatetimeIndex): Índex de dates.
+        freq (str): Freqüència de pandas.
+        festius (np.ndarray): Dates festives (`datetime64[D]`) o None.
+
+    Returns:
+        dict: Nom de la variable → array amb un valor per data.
+    """
+    variables = {}
+    dies = index.to_numpy().astype("datetime64[D]")
+
+    if dies_per_periode(freq) < 7:
+        dia_setmana = index.dayofweek.to_numpy()
+        for numero, nom in enumerate(NOMS_DIES[:-1]):
+            variables[f"dia_{nom}"] = (dia_setmana == numero).astype(np.float32)
+        if festius is not None:
+            variables["festiu"] = np.isin(dies, festius).astype(np.float32)
+        return variables
+
+    periodes = pd.DatetimeIndex(index, freq=freq).to_period()
+    inicis = periodes.start_time.to_numpy().astype("datetime64[D]")
+    fins = periodes.end_time.to_numpy().astype("datetime64[D]") + np.timedelta64(1, "D")
+    variables["dies_periode"] = (fins - inicis).astype(np.float32)
+    variables["dies_laborables"] = np.busday_count(inicis, fins, holidays=festius if festius is not None else []).astype(np.float32)
+    if festius is not None:
+        variables["festius"] = (np.searchsorted(festius, fins) - np.searchsorted(festius, inicis)).astype(np.float32)
+    return variables
+
+def variables_retards(index, covariables, retards, horitzo=0):
+    """
+    Retards de covariables del dataset.
+
+    Només s'admeten retards d'almenys `horitzo` períodes: amb retards més curts, els valors futurs
+    de la variable dependrien d'observacions de la covariable que encara no es coneixen.
+
+    Parameters:
+        index (pd.DatetimeIndex): Índex de dates de la matriu.
+        covariables (pd.DataFrame): Covariables originals (poden cobrir un rang més ampli que `index`).
+        retards (dict): Nom de la covariable → llista de retards (per exemple, {"internacional": [12]}).
+        horitzo (int): Nombre de períodes que es prediran.
+
+    Returns:
+        dict: Nom de la variable ('<covariable>_r<retard>') → array amb un valor per data.
+    """
+    variables = {}
+    for columna, llista_retards in retards.items():
+        if covariables is None or columna not in covariables.columns:
+            raise ValueError(f"La covariable '{columna}' no existeix al dataset.")
+        for retard in llista_retards:
+            if retard < horitzo:
+                print(f"S'ignora el retard {retard} de '{columna}': és més curt que l'horitzó de predicció ({horitzo}).")
+                continue
+            # Les primeres observacions sense valor retardat prenen el primer valor disponible
+            valors = covariables[columna].shift(retard).bfill().reindex(index)
+            if valors.isnull().any():
+                raise ValueError(f"La covariable '{columna}' no cobreix totes les dates de la sèrie.")
+            variables[f"{columna}_r{retard}"] = valors.to_numpy(dtype=np.float32)
+    return variables
+
+def construir_exogenes(index, freq, especificacio, covariables=None, horitzo=0):
+    """
+    Construeix la matriu de variables exògenes d'un índex (entrenament i horitzó de predicció).
+
+    Parameters:
+        index (pd.DatetimeIndex): Totes les dates per a les quals cal el valor de les variables.
+        freq (str): Freqüència de pandas.
+        especificacio (dict): Claus 'calendari' (bool), 'festius' (codi de país o None) i
+            'retards' (covariable → llista de retards).
+        covariables (pd.DataFrame): Covariables del dataset, necessàries si hi ha retards.
+        horitzo (int): Nombre de períodes que es prediran.
+
+    Returns:
+        MatriuExogenes: Matriu amb totes les variables no constants.
+    """
+    festius = dates_festius(index, especificacio["festius"]) if especificacio.get("festius") else None
+
+    variables = {}
+    if especificacio.get("calendari", True) or festius is not None:
+        variables.update(variables_calendari(index, freq, festius))
+    variables.update(variables_retards(index, covariables, especificacio.get("retards") or {}, horitzo))
+
+    # Una variable constant és col·lineal amb la constant dels models
+    constants = [nom for nom, valors in variables.items() if np.ptp(valors) == 0]
+    if constants:
+        print(f"S'eliminen les variables exògenes constants: {', '.join(constants)}")
+    columnes = [nom for nom in variables if nom not in constants]
+    if not columnes:
+        raise ValueError("L'especificació no genera cap variable exògena.")
+
+    return MatriuExogenes(index, columnes, np.column_stack([variables[nom] for nom in columnes]))
+
+def clau_exogenes(index, freq, especificacio, covariables=None, horitzo=0):
+    """
+    Clau de la memòria cau: primera data, longitud i freqüència de l'índex, especificació, horitzó i
+    un resum de les covariables utilitzades.
+    """
+    text = json.dumps(especificacio, sort_keys=True, default=str)
+    resum = ""
+    if covariables is not None and especificacio.get("retards"):
+        columnes = covariables[sorted(especificacio["retards"])]
+        resum = hashlib.sha256(pd.util.hash_pandas_object(columnes).to_numpy().tobytes()).hexdigest()[:16]
+    return (index[0], len(index), freq, text, horitzo, resum)
+
+def obtindre_exogenes(index, freq, especificacio, covariables=None, horitzo=0):
+    """
+    Retorna la matriu de variables exògenes de la memòria cau o la construeix si no hi és.
+
+    Parameters:
+        Els mateixos que `construir_exogenes`.
+
+    Returns:
+        MatriuExogenes: Matriu compartida (no s'ha de modificar).
+    """
+    clau = clau_exogenes(index, freq, especificacio, covariables, horitzo)
+    with _BLOQUEIG_CACHE:
+        if clau not in _CACHE:
+            _CACHE[clau] = construir_exogenes(index, freq, especificacio, covariables, horitzo)
+        else:
+            print("Variables exògenes reutilitzades de la memòria cau.")
+        return _CACHE[clau]
+
+def hash_exogenes(especificacio):
+    """
+    Hash curt de l'especificació, per distingir els models desats amb i sense variables exògenes.
+    """
+    text = json.dumps(especificacio, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:8]
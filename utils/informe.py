@@ -0,0 +1,314 @@
+import hashlib
+import html
+import inspect
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from . import visualization as visual
+
+class Artefacte:
+    """
+    Gràfica de l'informe: la funció de `visualization` que la genera, els seus arguments i la ruta
+    relativa dins del directori d'imatges. Els arguments són també les dependències de la gràfica.
+
+    Parameters:
+        ruta (str): Ruta relativa de la gràfica (per exemple, 'analisi/serie.pdf').
+        funcio (callable): Funció de nivell de mòdul amb els arguments `filepath` i `mostrar`.
+        arguments (dict): La resta d'arguments de la funció, per nom.
+    """
+    __slots__ = ("ruta", "funcio", "arguments")
+
+    def __init__(self, ruta, funcio, arguments):
+        self.ruta = ruta
+        self.funcio = funcio
+        self.arguments = arguments
+
+    def dependencies(self, dpi):
+        """
+        Hash de cada dependència: un per argument, el del codi de la funció i el de la resolució.
+        """
+        dependencies = {nom: hash_contingut(valor) for nom, valor in sorted(self.arguments.items())}
+        dependencies["codi"] = hash_codi(self.funcio)
+        dependencies["dpi"] = hash_contingut(dpi)
+        return dependencies
+
+def _actualitzar_hash(h, objecte):
+    if isinstance(objecte, (pd.DataFrame, pd.Series, pd.Index)):
+        h.update(type(objecte).__name__.encode())
+        h.update(repr(list(objecte.columns) if isinstance(objecte, pd.DataFrame) else objecte.name).encode())
+        h.update(str(objecte.dtypes if isinstance(objecte, pd.DataFrame) else objecte.dtype).encode())
+        h.update(pd.util.hash_pandas_object(objecte, index=not isinstance(objecte, pd.Index)).to_numpy().tobytes())
+    elif isinstance(objecte, np.ndarray):
+        h.update(f"{objecte.dtype}{objecte.shape}".encode())
+        h.update(np.ascontiguousarray(objecte).tobytes())
+    elif isinstance(objecte, dict):
+        for clau in sorted(objecte, key=repr):
+            h.update(repr(clau).encode())
+            _actualitzar_hash(h, objecte[clau])
+    elif isinstance(objecte, (list, tuple)):
+        h.update(f"{type(objecte).__name__}{len(objecte)}".encode())
+        for valor in objecte:
+            _actualitzar_hash(h, valor)
+    elif hasattr(objecte, "__slots__") or hasattr(objecte, "__dict__"):
+        # Objectes de dades com PrediccioInterval: el tipus i cada atribut
+        camps = getattr(objecte, "__slots__", None) or sorted(vars(objecte))
+        h.update(f"{type(objecte).__module__}.{type(objecte).__qualname__}".encode())
+        for camp in camps:
+            h.update(camp.encode())
+            _actualitzar_hash(h, getattr(objecte, camp, None))
+    else:
+        h.update(pickle.dumps(objecte, protocol=4))
+
+def hash_contingut(objecte):
+    """
+    Hash curt del contingut d'un objecte (sèries, matrius, diccionaris, objectes de dades o valors simples).
+
+    Depén només dels valors, no de la identitat de l'objecte: dues còpies de les mateixes dades tenen el mateix hash.
+    """
+    h = hashlib.sha256()
+    _actualitzar_hash(h, objecte)
+    return h.hexdigest()[:16]
+
+def hash_codi(funcio):
+    """
+    Hash del codi font del mòdul de la funció: qualsevol canvi a les funcions de gràfiques invalida les gràfiques que en depenen.
+    """
+    h = hashlib.sha256(f"{funcio.__module__}.{funcio.__qualname__}".encode())
+    with open(inspect.getsourcefile(funcio), "rb") as f:
+        h.update(f.read())
+    return h.hexdigest()[:16]
+
+def hash_dependencies(dependencies):
+    text = json.dumps(dependencies, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:24]
+
+def renderitzar(funcio, arguments, ruta, dpi):
+    """
+    Genera una gràfica amb la resolució indicada. S'executa als processos treballadors (o al procés
+    principal si no n'hi ha) i escriu primer a un fitxer temporal perquè la memòria cau no continga
+    mai gràfiques a mig escriure.
+
+    Returns:
+        float: Segons de generació.
+    """
+    inici_temps = time.perf_counter()
+    # Amb una ruta absoluta, guardar_grafica no la resol dins de visualization.BASE_DIR
+    ruta = os.path.abspath(ruta)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    anterior, visual.DPI = visual.DPI, dpi
+    try:
+        funcio(**arguments, filepath=temporal, mostrar=False)
+    finally:
+        visual.DPI = anterior
+    os.replace(temporal, ruta)
+    return time.perf_counter() - inici_temps
+
+class MemoriaCauInforme:
+    """
+    Memòria cau de gràfiques adreçada pel contingut, compartida entre execucions.
+
+    Cada gràfica es desa a 'objectes/<hash>.<extensió>', on el hash combina els de totes les seues
+    dependències; per a cada clau (execució i ruta) es guarda a 'claus/' el darrer conjunt de
+    dependències, que permet explicar quina ha canviat quan una gràfica s'ha de tornar a generar.
+
+    Parameters:
+        directori (str): Directori de la memòria cau.
+    """
+
+    def __init__(self, directori):
+        self.directori = os.path.abspath(directori)
+        os.makedirs(os.path.join(self.directori, "objectes"), exist_ok=True)
+        os.makedirs(os.path.join(self.directori, "claus"), exist_ok=True)
+
+    def ruta_objecte(self, hash_artefacte, extensio):
+        return os.path.join(self.directori, "objectes", f"{hash_artefacte}{extensio}")
+
+    def _ruta_clau(self, clau):
+        return os.path.join(self.directori, "claus", f"{hashlib.sha256(clau.encode('utf-8')).hexdigest()[:24]}.json")
+
+    def dependencies_anteriors(self, clau):
+        try:
+            with open(self._ruta_clau(clau), encoding="utf-8") as f:
+                return json.load(f)["dependencies"]
+        except (OSError, json.JSONDecodeError, KeyError):
+            return None
+
+    def registrar(self, clau, dependencies):
+        # Escriptura atòmica: diverses execucions poden compartir la memòria cau
+        ruta = self._ruta_clau(clau)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({"clau": clau, "dependencies": dependencies}, f, indent=2, ensure_ascii=False)
+        os.replace(temporal, ruta)
+
+def motiu_regeneracio(anteriors, actuals):
+    """
+    Dependències que han canviat respecte de la darrera construcció de la mateixa gràfica.
+    """
+    if anteriors is None:
+        return "nova"
+    canviades = sorted(nom for nom in set(anteriors) | set(actuals) if anteriors.get(nom) != actuals.get(nom))
+    return "canvi: " + ", ".join(canviades) if canviades else "no és a la memòria cau"
+
+def construir_artefactes(artefactes, directori, memoria_cau, prefix_clau="", dpi=None, processos=None):
+    """
+    Construcció incremental de les gràfiques d'un informe.
+
+    Cada gràfica s'identifica pel hash de les seues dependències (arguments, codi de la funció i
+    resolució). Les que ja són a la memòria cau només es copien; la resta es generen en paral·lel en
+    processos independents (pyplot no es pot usar des de diversos fils) i s'afegeixen a la memòria cau.
+
+    Parameters:
+        artefactes (list): Objectes Artefacte.
+        directori (str): Directori on es copien les gràfiques (les rutes dels artefactes hi són relatives).
+        memoria_cau (MemoriaCauInforme): Memòria cau de gràfiques.
+        prefix_clau (str): Prefix de les claus (per exemple, el nom de l'execució) per explicar les regeneracions.
+        dpi (int): Resolució de les gràfiques (per defecte, visualization.DPI).
+        processos (int): Processos per generar les gràfiques (per defecte, un per CPU; 1 les genera al procés actual).
+
+    Returns:
+        list: Un registre per gràfica (ruta, hash, estat 'reutilitzada', 'generada' o 'error', motiu i durada).
+    """
+    dpi = visual.DPI if dpi is None else dpi
+    registres, pendents = [], {}
+    for artefacte in artefactes:
+        dependencies = artefacte.dependencies(dpi)
+        hash_artefacte = hash_dependencies(dependencies)
+        clau = f"{prefix_clau}/{artefacte.ruta}"
+        registre = {"ruta": artefacte.ruta, "hash": hash_artefacte, "estat": "reutilitzada", "motiu": "", "durada": 0.0}
+        objecte = memoria_cau.ruta_objecte(hash_artefacte, os.path.splitext(artefacte.ruta)[1])
+        if not os.path.exists(objecte):
+            registre["estat"] = "generada"
+            registre["motiu"] = motiu_regeneracio(memoria_cau.dependencies_anteriors(clau), dependencies)
+            # Dues rutes amb el mateix contingut es generen una sola vegada
+            pendents.setdefault(objecte, (artefacte, []))[1].append(registre)
+        registres.append((artefacte, registre, objecte, clau, dependencies))
+
+    processos = min(processos or os.cpu_count() or 1, len(pendents))
+    if processos > 1:
+        # 'spawn': el procés principal té fils actius (les etapes del graf)
+        with ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futurs = {objecte: executor.submit(renderitzar, artefacte.funcio, artefacte.arguments, objecte, dpi)
+                      for objecte, (artefacte, _) in pendents.items()}
+            resultats = {}
+            for objecte, futur in futurs.items():
+                try:
+                    resultats[objecte] = futur.result()
+                except Exception as e:
+                    resultats[objecte] = e
+    else:
+        resultats = {}
+        for objecte, (artefacte, _) in pendents.items():
+            try:
+                resultats[objecte] = renderitzar(artefacte.funcio, artefacte.arguments, objecte, dpi)
+            except Exception as e:
+                resultats[objecte] = e
+
+    for objecte, (_, registres_objecte) in pendents.items():
+        for registre in registres_objecte:
+            if isinstance(resultats[objecte], Exception):
+                registre["estat"] = "error"
+                registre["motiu"] = f"{type(resultats[objecte]).__name__}: {resultats[objecte]}"
+            else:
+                registre["durada"] = resultats[objecte]
+
+    for artefacte, registre, objecte, clau, dependencies in registres:
+        if registre["estat"] == "error":
+            continue
+        desti = os.path.join(directori, artefacte.ruta)
+        os.makedirs(os.path.dirname(desti), exist_ok=True)
+        shutil.copyfile(objecte, desti)
+        memoria_cau.registrar(clau, dependencies)
+    return [registre for _, registre, _, _, _ in registres]
+
+def _escapar_latex(text):
+    substitucions = {"\\": r"\textbackslash{}", "&": r"\&", "%": r"\%", "$": r"\$", "#": r"\#",
+                     "_": r"\_", "{": r"\{", "}": r"\}", "~": r"\textasciitilde{}", "^": r"\textasciicircum{}"}
+    return "".join(substitucions.get(caracter, caracter) for caracter in str(text))
+
+def _format_valor(valor):
+    if isinstance(valor, (float, np.floating)):
+        return "" if np.isnan(valor) else f"{valor:.2f}"
+    return str(valor)
+
+def taula_latex(taula, titol):
+    """
+    Taula LaTeX (entorn table amb tabular) a partir d'un DataFrame, sense dependències addicionals.
+    """
+    alineacio = "".join("r" if pd.api.types.is_numeric_dtype(taula[columna]) else "l" for columna in taula.columns)
+    linies = [
+        r"\begin{table}[htbp]",
+        r"\centering",
+        r"\small",
+        rf"\caption{{{_escapar_latex(titol)}}}",
+        rf"\begin{{tabular}}{{{alineacio}}}",
+        r"\hline",
+        " & ".join(_escapar_latex(columna) for columna in taula.columns) + r" \\",
+        r"\hline",
+    ]
+    for fila in taula.itertuples(index=False):
+        linies.append(" & ".join(_escapar_latex(_format_valor(valor)) for valor in fila) + r" \\")
+    linies += [r"\hline", r"\end{tabular}", r"\end{table}"]
+    return "\n".join(linies)
+
+def llegir_taules(directori):
+    """
+    Taules CSV d'un directori (per nom de fitxer, en ordre alfabètic), amb la columna d'índex sense nom anomenada ''.
+    """
+    taules = {}
+    for nom in sorted(os.listdir(directori)) if os.path.isdir(directori) else []:
+        if nom.endswith(".csv"):
+            taula = pd.read_csv(os.path.join(directori, nom))
+            taules[os.path.splitext(nom)[0]] = taula.rename(columns=lambda columna: "" if columna.startswith("Unnamed:") else columna)
+    return taules
+
+def escriure_resum(directori, titol, dades, taules, grafiques):
+    """
+    Escriu el resum de l'execució en HTML ('informe.html') i com a fragment LaTeX per incloure ('informe.tex').
+
+    Parameters:
+        directori (str): Directori arrel de l'execució; les rutes de les gràfiques hi són relatives.
+        titol (str): Títol de l'informe.
+        dades (dict): Parells descripció-valor de la capçalera (dataset, sèrie...).
+        taules (dict): DataFrames per nom.
+        grafiques (list): Rutes relatives de les gràfiques.
+
+    Returns:
+        str, str: Rutes dels fitxers HTML i LaTeX.
+    """
+    cos = [f"<h1>{html.escape(titol)}</h1>", "<table>"]
+    cos += [f"<tr><th>{html.escape(str(clau))}</th><td>{html.escape(str(valor))}</td></tr>" for clau, valor in dades.items()]
+    cos.append("</table>")
+    for nom, taula in taules.items():
+        cos.append(f"<h2>{html.escape(nom)}</h2>")
+        cos.append(taula.to_html(index=False, float_format=lambda valor: f"{valor:.2f}", na_rep="", border=0))
+    for ruta in grafiques:
+        cos.append(f'<figure><object data="{html.escape(ruta)}" type="application/pdf" width="800" height="500">'
+                   f'<a href="{html.escape(ruta)}">{html.escape(ruta)}</a></object>'
+                   f"<figcaption>{html.escape(ruta)}</figcaption></figure>")
+    pagina = ("<!DOCTYPE html>\n<html lang=\"ca\">\n<head><meta charset=\"utf-8\">"
+              f"<title>{html.escape(titol)}</title>\n"
+              "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:1em}"
+              "th,td{padding:2px 8px;border-bottom:1px solid #ccc;text-align:right}</style>\n"
+              "</head>\n<body>\n" + "\n".join(cos) + "\n</body>\n</html>\n")
+
+    latex = [f"% {titol}", r"\begin{itemize}"]
+    latex += [rf"\item \textbf{{{_escapar_latex(clau)}}}: {_escapar_latex(valor)}" for clau, valor in dades.items()]
+    latex.append(r"\end{itemize}")
+    latex += [taula_latex(taula, nom) for nom, taula in taules.items()]
+    for ruta in grafiques:
+        latex += [r"\begin{figure}[htbp]", r"\centering", rf"\includegraphics[width=\linewidth]{{{ruta}}}",
+                  rf"\caption{{{_escapar_latex(ruta)}}}", r"\end{figure}"]
+
+    ruta_html, ruta_latex = os.path.join(directori, "informe.html"), os.path.join(directori, "informe.tex")
+    with open(ruta_html, "w", encoding="utf-8") as f:
+        f.write(pagina)
+    with open(ruta_latex, "w", encoding="utf-8") as f:
+        f.write("\n".join(latex) + "\n")
+    return ruta_html, ruta_latex
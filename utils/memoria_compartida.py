@@ -0,0 +1,194 @@
+import os
+import sys
+import tempfile
+import uuid
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+# Blocs ja adjuntats en aquest procés: un treballador d'un pool obre cada bloc una sola vegada
+_ADJUNTADES = {}
+
+class DescriptorDades:
+    """
+    Referència lleugera (i serialitzable) a unes dades publicades amb `DadesCompartides`.
+
+    És l'únic que viatja als processos treballadors: el nom del bloc de memòria compartida o la ruta
+    del fitxer mapat, la forma de la matriu, les columnes i l'índex de dates (com a inici, longitud i
+    freqüència si és regular).
+    """
+    __slots__ = ("backend", "nom", "forma", "columnes", "index", "inici", "freq", "nom_index")
+
+    def __init__(self, backend, nom, forma, columnes, index):
+        self.backend = backend
+        self.nom = nom
+        self.forma = tuple(forma)
+        self.columnes = list(columnes)
+        self.nom_index = index.name
+        self.freq = index.freqstr if index.freq is not None else None
+        # Un índex regular es reconstrueix amb date_range; si no ho és, s'envien les dates
+        self.inici = index[0] if self.freq is not None and len(index) else None
+        self.index = None if self.freq is not None else index.to_numpy()
+
+    def __getstate__(self):
+        return {camp: getattr(self, camp) for camp in self.__slots__}
+
+    def __setstate__(self, estat):
+        for camp, valor in estat.items():
+            setattr(self, camp, valor)
+
+    def crear_index(self):
+        if self.freq is not None:
+            return pd.date_range(self.inici, periods=self.forma[1], freq=self.freq, name=self.nom_index)
+        return pd.DatetimeIndex(self.index, name=self.nom_index)
+
+class DadesCompartides:
+    """
+    Publica una sola vegada les sèries d'un DataFrame perquè els processos treballadors les llegisquen sense còpia.
+
+    Les dades es guarden com una matriu float64 de forma (sèries, observacions), de manera que cada
+    sèrie ocupa un bloc contigu, en memòria compartida (`backend="compartida"`) o en un fitxer .npy
+    mapat en memòria (`backend="memmap"`, que també es pot reutilitzar entre execucions). El procés que
+    crea l'objecte n'és el propietari i allibera les dades amb `tancar()` (o en sortir del bloc `with`).
+
+    Parameters:
+        dades (pd.DataFrame): Sèries numèriques (una per columna) amb índex de dates.
+        backend (str): 'compartida' o 'memmap'.
+        directori (str): Directori del fitxer mapat (per defecte, el temporal del sistema).
+    """
+
+    def __init__(self, dades, backend="compartida", directori=None):
+        valors = dades.to_numpy(dtype=np.float64).T
+        self._memoria = None
+        self._ruta = None
+
+        if backend == "compartida":
+            self._memoria = shared_memory.SharedMemory(create=True, size=max(valors.nbytes, 1))
+            desti = np.ndarray(valors.shape, dtype=np.float64, buffer=self._memoria.buf)
+            nom = self._memoria.name
+        elif backend == "memmap":
+            self._ruta = os.path.join(directori or tempfile.gettempdir(), f"dades_{uuid.uuid4().hex}.npy")
+            desti = np.lib.format.open_memmap(self._ruta, mode="w+", dtype=np.float64, shape=valors.shape)
+            nom = self._ruta
+        else:
+            raise ValueError(f"Backend '{backend}' no vàlid. Opcions: compartida, memmap.")
+
+        desti[:] = valors
+        self.descriptor = DescriptorDades(backend, nom, valors.shape, dades.columns, pd.DatetimeIndex(dades.index))
+        if backend == "memmap":
+            desti.flush()
+        else:
+            # El propietari llegeix directament el bloc que ha creat
+            desti.flags.writeable = False
+            _ADJUNTADES[nom] = (None, desti, self.descriptor.crear_index())
+        del desti
+
+    def mida_bytes(self):
+        return int(np.prod(self.descriptor.forma)) * np.dtype(np.float64).itemsize
+
+    def tancar(self):
+        """
+        Allibera les dades. Els processos que encara les tinguen adjuntades han d'haver acabat.
+        """
+        desadjuntar(self.descriptor)
+        if self._memoria is not None:
+            try:
+                self._memoria.close()
+            except BufferError:
+                # Encara hi ha vistes vives; el bloc s'allibera quan desapareguen
+                pass
+            self._memoria.unlink()
+            self._memoria = None
+        if self._ruta is not None:
+            try:
+                os.remove(self._ruta)
+            except OSError:
+                pass
+            self._ruta = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.tancar()
+
+def _obrir_memoria(nom):
+    # Els treballadors comparteixen el resource_tracker del procés propietari (multiprocessing li'l passa
+    # en crear-los), de manera que adjuntar no canvia qui elimina el bloc: només ho fa `tancar()`
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=nom, track=False)
+    return shared_memory.SharedMemory(name=nom)
+
+def adjuntar(descriptor):
+    """
+    Matriu (sèries, observacions) de només lectura amb les dades publicades, sense copiar-les.
+
+    Parameters:
+        descriptor (DescriptorDades): Descriptor de `DadesCompartides`.
+
+    Returns:
+        np.ndarray: Vista de la memòria compartida o del fitxer mapat.
+    """
+    if descriptor.nom not in _ADJUNTADES:
+        if descriptor.backend == "compartida":
+            memoria = _obrir_memoria(descriptor.nom)
+            valors = np.ndarray(descriptor.forma, dtype=np.float64, buffer=memoria.buf)
+        else:
+            memoria = None
+            valors = np.load(descriptor.nom, mmap_mode="r")
+        valors.flags.writeable = False
+        _ADJUNTADES[descriptor.nom] = (memoria, valors, descriptor.crear_index())
+    return _ADJUNTADES[descriptor.nom][1]
+
+def desadjuntar(descriptor):
+    """
+    Tanca les dades adjuntades en aquest procés (no les elimina).
+    """
+    memoria, _, _ = _ADJUNTADES.pop(descriptor.nom, (None, None, None))
+    if memoria is not None:
+        try:
+            memoria.close()
+        except BufferError:
+            # Encara hi ha vistes vives (DataFrames de l'usuari); el bloc es tancarà amb el procés
+            pass
+
+def vista_dades(descriptor, columnes=None):
+    """
+    DataFrame amb les columnes indicades construït sobre les dades compartides.
+
+    Una columna (o un rang de columnes consecutives) no es copia; una selecció arbitrària sí.
+
+    Parameters:
+        descriptor (DescriptorDades): Descriptor de `DadesCompartides`.
+        columnes (list | str): Columnes que es volen (per defecte, totes).
+
+    Returns:
+        pd.DataFrame: Sèries amb l'índex de dates original.
+    """
+    valors = adjuntar(descriptor)
+    index = _ADJUNTADES[descriptor.nom][2]
+    columnes = descriptor.columnes if columnes is None else ([columnes] if isinstance(columnes, str) else list(columnes))
+
+    posicions = [descriptor.columnes.index(columna) for columna in columnes]
+    if posicions == list(range(posicions[0], posicions[0] + len(posicions))):
+        files = valors[posicions[0]:posicions[0] + len(posicions)]
+    else:
+        files = valors[posicions]
+    return pd.DataFrame(files.T, index=index, columns=columnes, copy=False)
+
+def dividir_vista(descriptor, columnes=None, proporcio=0.8):
+    """
+    Entrenament i test sobre les dades compartides, amb el mateix tall que `prep.dividir_dades`
+    (les primeres int(n·proporcio) observacions), però sense còpia i sense missatges.
+
+    Parameters:
+        descriptor (DescriptorDades): Descriptor de `DadesCompartides`.
+        columnes (list | str): Columnes que es volen (per defecte, totes).
+        proporcio (float): Proporció de dades per a entrenament.
+
+    Returns:
+        pd.DataFrame, pd.DataFrame: Conjunts d'entrenament i test.
+    """
+    dades = vista_dades(descriptor, columnes)
+    train_size = int(len(dades) * proporcio)
+    return dades.iloc[:train_size], dades.iloc[train_size:]
@@ -1,4 +1,39 @@
+import numpy as np
 import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+def alinear_index(index, freq):
+    """
+    Alinea un índex de dates amb la freqüència indicada.
+
+    Per a freqüències ancorades (per exemple 'ME', 'W-SUN' o 'QE') cada data s'avança fins al
+    primer punt vàlid de la freqüència (2000-01-01 → 2000-01-31 amb 'ME'); per a freqüències de
+    dies o superiors s'eliminen les hores.
+
+    Parameters:
+        index (pd.DatetimeIndex): Índex de dates.
+        freq (str): Freqüència de pandas.
+
+    Returns:
+        pd.DatetimeIndex: Índex alineat, amb el mateix nom.
+    """
+    index = pd.DatetimeIndex(index)
+    offset = to_offset(freq)
+    if not isinstance(offset, pd.offsets.Tick) or offset.nanos % pd.Timedelta(days=1).value == 0:
+        index = index.normalize()
+    if not isinstance(offset, pd.offsets.Tick):
+        index = pd.DatetimeIndex([data if offset.is_on_offset(data) else offset.rollforward(data) for data in index], name=index.name)
+    return index
+
+def dies_per_periode(freq):
+    """
+    Durada mitjana d'un període de la freqüència, en dies (per exemple, 1 per a 'D', 7 per a 'W' i ~30.44 per a 'ME').
+    """
+    offset = to_offset(freq)
+    if isinstance(offset, pd.offsets.Tick):
+        return offset.nanos / pd.Timedelta(days=1).value
+    dates = pd.date_range("1800-01-01", periods=201, freq=offset)
+    return (dates[-1] - dates[0]) / pd.Timedelta(days=1) / 200
 
 def carregar_dades(filepath, freq='D', fill_method='ffill'):
     """
@@ -26,8 +61,10 @@ def carregar_dades(filepath, freq='D', fill_method='ffill'):
         print("S'han trobat duplicats a l'índex. S'estan eliminant...")
         dades = dades[~dades.index.duplicated(keep='first')]
 
-    if freq == "ME":
-        dades.index = dades.index + pd.offsets.MonthEnd(0)
+    dades.index = alinear_index(dades.index, freq).rename(dades.index.name)
+    if dades.index.duplicated().any():
+        print(f"Hi ha dates que coincideixen en alinear-les amb la freqüència '{freq}'. Es conserva la primera.")
+        dades = dades[~dades.index.duplicated(keep='first')]
 
     try:
         dades = dades.asfreq(freq)
@@ -108,4 +145,50 @@ def filtrar_dades(dades, CONFIG):
     dades = dades.iloc[-n:]
     print(f"Rang de dates: {dades.index.min()} a {dades.index.max()}")
     print(f"Número de registres: {len(dades)} ({CONFIG['proporcio_dataset']:.0%})")
-    return dades
\ No newline at end of file
+    return dades
+
+def generar_serie_sintetica(inici='2015-01-01', fi='2022-12-31', freq='D', periodes=(7, 365.25), amplituds=(8.0, 20.0),
+                            nivell=100.0, pendent=0.01, phi=0.6, sigma=3.0, llavor=20):
+    """
+    Genera una sèrie sintètica amb tendència lineal, diverses estacionalitats sinusoidals i soroll AR(1).
+
+    Serveix per provar els models amb períodes estacionals llargs o múltiples (per exemple, dades
+    diàries amb estacionalitat setmanal i anual).
+
+    Parameters:
+        inici (str): Primera data de la sèrie.
+        fi (str): Última data de la sèrie.
+        freq (str): Freqüència de pandas.
+        periodes (tuple): Períodes estacionals, en nombre d'observacions.
+        amplituds (tuple): Amplitud de cada component estacional.
+        nivell (float): Nivell inicial.
+        pendent (float): Increment del nivell per observació.
+        phi (float): Coeficient autoregressiu del soroll.
+        sigma (float): Desviació típica de les innovacions.
+        llavor (int): Llavor del generador aleatori.
+
+    Returns:
+        pd.DataFrame: DataFrame amb les columnes 'any', 'mes', 'dia' i 'valor', indexat per 'data'.
+    """
+    index = pd.date_range(inici, fi, freq=freq, name='data')
+    t = np.arange(len(index))
+    generador = np.random.default_rng(llavor)
+
+    soroll = np.zeros(len(index))
+    innovacions = generador.normal(0.0, sigma, len(index))
+    for i in range(1, len(index)):
+        soroll[i] = phi * soroll[i - 1] + innovacions[i]
+
+    valor = nivell + pendent * t + soroll
+    for periode, amplitud in zip(periodes, amplituds):
+        valor += amplitud * np.sin(2 * np.pi * t / periode) + 0.5 * amplitud * np.cos(4 * np.pi * t / periode)
+
+    ordre_dies = ['dilluns', 'dimarts', 'dimecres', 'dijous', 'divendres', 'dissabte', 'diumenge']
+    ordre_mesos = ['gener', 'febrer', 'març', 'abril', 'maig', 'juny',
+                   'juliol', 'agost', 'setembre', 'octubre', 'novembre', 'desembre']
+    return pd.DataFrame({
+        'any': index.year,
+        'mes': [ordre_mesos[mes - 1] for mes in index.month],
+        'dia': [ordre_dies[dia] for dia in index.dayofweek],
+        'valor': np.round(valor, 2),
+    }, index=index)
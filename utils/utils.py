@@ -1,12 +1,23 @@
+import os
 import pickle
+import tempfile
 
 def guardar_model(model, filepath):
-    with open(filepath, 'wb') as f:
-        pickle.dump(model, f)
+    # Escriptura atòmica: dues execucions simultànies mai no deixen un fitxer a mig escriure
+    dirpath = os.path.dirname(os.path.abspath(filepath))
+    os.makedirs(dirpath, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dirpath, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(model, f)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
     print(f"Model guardat a: {filepath}")
 
 def carregar_model(filepath):
     with open(filepath, 'rb') as f:
         model = pickle.load(f)
     print(f"Model carregat des de: {filepath}")
-    return model
\ No newline at end of file
+    return model
@@ -6,11 +6,13 @@ from statsmodels.graphics.tsaplots import plot_acf, plot_pacf
 from statsmodels.tsa.seasonal import seasonal_decompose
 
 BASE_DIR = "tex/imatges"  # Directori base per a les imatges
+DPI = 1200  # Resolució per defecte de les gràfiques guardades
 
-def guardar_grafica(filepath, fileformat='pdf', dpi=1200):
+def guardar_grafica(filepath, fileformat='pdf', dpi=None):
     """
-    Guarda la gràfica actual al fitxer especificat dins del directori base.
+    Guarda la gràfica actual al fitxer especificat dins del directori base (amb la resolució DPI si no se n'indica cap).
     """
+    dpi = DPI if dpi is None else dpi
     full_path = os.path.join(BASE_DIR, filepath)
 
     dirpath = os.path.dirname(full_path)
@@ -36,14 +38,20 @@ def grafiar_serie_temporal(data, title="Sèrie temporal", filepath=None, mostrar
         plt.show()
     plt.close()
 
-def grafiar_prediccio(train, test, prediction, model_name, filepath=None, mostrar=True):
+def grafiar_prediccio(train, test, prediction, model_name, interval=None, filepath=None, mostrar=True):
     """
-    Mostra o guarda la gràfica de prediccions amb el nom del model.
+    Mostra o guarda la gràfica de prediccions amb el nom del model i, si n'hi ha, els intervals de predicció.
     """
     plt.figure(figsize=(10, 6))
     plt.plot(train, label='Entrenament')
     plt.plot(test, label='Test')
     plt.plot(prediction, label='Predicció', linestyle='--')
+    if interval is not None:
+        nivells = interval.nivells
+        for i, nivell in enumerate(reversed(nivells)):
+            inferior, superior = interval.interval(nivell)
+            plt.fill_between(interval.index, inferior, superior, color='tab:green',
+                             alpha=0.15 + 0.15 * i, label=f'Interval {nivell:.0%}')
     plt.title(f'Predicció de la sèrie temporal - Model {model_name}')
     plt.xlabel('Data')
     plt.ylabel('Valor')